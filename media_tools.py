@@ -0,0 +1,3938 @@
+import os
+import sys
+import threading
+import re
+import fnmatch
+import json
+import sqlite3
+import collections
+import contextlib
+import errno
+import math
+import shutil
+import time
+import subprocess
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import importlib.util
+
+try:
+    from colorama import init as colorama_init, Fore, Style
+    colorama_init(autoreset=True)
+except ImportError:
+    print("Error: Required library 'colorama' is not installed.")
+    print("Please install it using: pip install colorama")
+    sys.exit(1)
+
+# yt_dlp and mutagen take hundreds of ms to import, so they are loaded on first use by the tool that needs them
+# (see load_yt_dlp / load_mutagen); a run that only renames files never pays for yt_dlp.
+yt_dlp = None
+mutagen = ID3 = MP4 = FLAC = None
+_lazy_import_lock = threading.Lock()
+
+MUTAGEN_AVAILABLE = importlib.util.find_spec('mutagen') is not None
+if not MUTAGEN_AVAILABLE:
+    print("Warning: Library 'mutagen' is not installed. 'MP3 Tools' will not be available.")
+    print("Please install it using: pip install mutagen")
+
+
+# --- Global Configuration & Constants --- #
+YOUTUBE_DOWNLOAD_SUBDIR_NAME = "YouTubeDownloads"
+YT_DL_INFO_CACHE_DIR_NAME = ".yt_info_cache"
+YT_DL_INFO_CACHE_TTL_SECONDS = 3 * 60 * 60  # Stream URLs expire after a few hours; 0 disables the cache
+YT_DL_BATCH_WORKERS = 4
+YT_DL_BATCH_MAX_PER_HOST = 4
+YT_DL_ALLOW_NATIVE_AUDIO = False  # Audio-only downloads keep the native m4a/opus audio instead of transcoding to MP3
+YT_DL_POSTPROCESS_WORKERS = 0  # ffmpeg postprocessing pool for batch downloads; 0 = one per CPU core
+YT_DL_POSTPROCESS_QUEUE_SIZE_PER_JOB = 2  # Downloaded items allowed to wait per postprocessing worker
+YT_DL_CHUNKED_CONNECTIONS = 4  # Parallel byte-range connections for large single-file downloads; 1 disables chunking
+YT_DL_CHUNKED_MIN_SIZE = 32 * 1024 * 1024  # Smaller files are fetched by yt-dlp over one connection
+YT_DL_CHUNK_SIZE = 8 * 1024 * 1024
+YT_DL_CHUNK_RETRIES = 10  # Reconnects per chunk; each one resumes where the dropped connection stopped
+YT_DL_CHUNK_TIMEOUT_SECONDS = 20
+YT_DL_FRAGMENT_CONCURRENCY = 4  # Fragments fetched in parallel for DASH/HLS formats
+
+VIDEO_CONVERTER_INPUT_DIR_NAME = "VideosToConvert"
+VIDEO_CONVERTER_OUTPUT_DIR_NAME = "ConvertedMP3s"
+TAG_REMOVER_DIR_NAME = "Audio_For_Tag_Removal"
+RENAMER_DIR_NAME = "Audio_For_Renaming"
+
+
+# --- Configuration for MP3 Converter --- #
+VIDEO_EXTENSIONS = {
+    '.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv',
+    '.webm', '.mpeg', '.mpg', '.ts', '.vob', '.m4v',
+    '.3gp'
+}
+AUDIO_BITRATE_CONVERTER = '192k'
+OVERWRITE_EXISTING_CONVERTED_MP3 = False
+CONVERTER_MAX_JOBS = 0  # 0 = one job per CPU core
+CONVERTER_RECURSIVE = False  # Also convert videos in sub-folders (mirrored in the output folder)
+CONVERTER_QUEUE_SIZE_PER_JOB = 2  # Pending files allowed per job before the scanner waits
+CONVERTER_STREAM_COPY = True  # Copy MP3 audio tracks as-is instead of re-encoding them
+CONVERTER_ALLOW_NATIVE_AUDIO = False  # Keep AAC/Opus/Vorbis audio in its native container instead of transcoding to MP3
+CONVERTER_NATIVE_AUDIO_EXTENSIONS = {'aac': '.m4a', 'alac': '.m4a', 'opus': '.opus', 'vorbis': '.ogg', 'flac': '.flac'}
+CONVERTER_PROBE_CACHE_FILE_NAME = ".probe_cache.json"
+CONVERTER_STDERR_TAIL_LINES = 40  # ffmpeg stderr lines kept for error reports
+CONVERTER_USE_MANIFEST = True  # Track conversions in a manifest so re-runs only process new/changed sources
+CONVERTER_MANIFEST_FILE_NAME = ".conversion_manifest.sqlite"
+CONVERTER_MANIFEST_HASH_SOURCES = False  # Also compare a SHA-256 of each source (slow for large videos)
+CONVERTER_MANIFEST_VERIFY_OUTPUTS = False  # Re-checksum outputs on every run instead of only comparing sizes
+CONVERTER_ADOPT_DURATION_TOLERANCE = 0.5  # Seconds an untracked existing output may be shorter/longer than its source
+CONVERTER_SEGMENT_MIN_DURATION = 0  # Seconds; MP3 encodes of longer inputs are split into segments encoded in parallel (0 = off)
+CONVERTER_SEGMENT_SECONDS = 600  # Length of each segment in segmented mode
+CONVERTER_SEGMENT_OVERLAP_FRAMES = 4  # Extra MP3 frames encoded (then dropped) on each side of a segment boundary
+# Named output profiles; several can be produced from a single decode, each into <output dir>/<profile name>.
+CONVERTER_PROFILES = {
+    'mp3-320': {'codec': 'libmp3lame', 'bitrate': '320k', 'extension': '.mp3'},
+    'mp3-192': {'codec': 'libmp3lame', 'bitrate': '192k', 'extension': '.mp3'},
+    'mp3-128': {'codec': 'libmp3lame', 'bitrate': '128k', 'extension': '.mp3'},
+    'opus-96': {'codec': 'libopus', 'bitrate': '96k', 'extension': '.opus'},
+    'aac-128': {'codec': 'aac', 'bitrate': '128k', 'extension': '.m4a'},
+}
+
+# --- Configuration for Directory Scanning --- #
+SCAN_IGNORE_PATTERNS = ['.*']  # Hidden files/folders (manifests, caches, in-progress temp outputs)
+
+# --- General Helper Functions --- #
+def get_main_script_directory():
+    """Gets the directory where the script is located."""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    else:
+        try:
+            return os.path.dirname(os.path.abspath(__file__))
+        except NameError:
+            return os.path.abspath(".")
+
+def load_yt_dlp():
+    """Imports yt_dlp on first use. Returns the module, or None (after printing why) if it isn't installed."""
+    global yt_dlp
+    with _lazy_import_lock:
+        if yt_dlp is None:
+            try:
+                import yt_dlp as yt_dlp_module
+            except ImportError:
+                print(f"{Fore.RED}Error: Required library 'yt_dlp' is not installed.{Style.RESET_ALL}")
+                print("Please install it using: pip install yt-dlp")
+                return None
+            yt_dlp = yt_dlp_module
+    return yt_dlp
+
+def load_mutagen():
+    """Imports mutagen and the tag classes used by the MP3 tools on first use. Returns the module or None."""
+    global mutagen, ID3, MP4, FLAC
+    if not MUTAGEN_AVAILABLE: return None
+    with _lazy_import_lock:
+        if FLAC is None:
+            import mutagen as mutagen_module
+            import mutagen.id3, mutagen.mp4, mutagen.flac, mutagen.apev2
+            ID3 = mutagen_module.id3.ID3
+            MP4 = mutagen_module.mp4.MP4
+            mutagen = mutagen_module
+            FLAC = mutagen_module.flac.FLAC  # Assigned last: other threads treat it as "loading finished"
+    return mutagen
+
+def clear_screen():
+    """Clears the terminal with an ANSI escape instead of spawning a shell (colorama translates it on Windows)."""
+    print("\033[2J\033[H", end='', flush=True)
+
+def ensure_directory_exists(dir_path):
+    """Creates a directory if it doesn't exist."""
+    if not os.path.exists(dir_path):
+        try:
+            os.makedirs(dir_path)
+            print(f"{Fore.GREEN}Directory created: {dir_path}{Style.RESET_ALL}")
+            return True
+        except OSError as e:
+            print(f"{Fore.RED}Error creating directory {dir_path}: {e}{Style.RESET_ALL}")
+            return False
+    return True
+
+NOTICE_COLORS = {'info': Fore.CYAN, 'warning': Fore.YELLOW, 'error': Fore.RED}
+
+def print_notice(level, message):
+    """Terminal presenter for the on_notice callbacks of the tool functions: prints message in the level's colour
+    ('info', 'warning' or 'error'). The tool functions never print themselves."""
+    print(f"{NOTICE_COLORS[level]}{message}{Style.RESET_ALL}")
+
+def notice_sink(on_notice):
+    """Returns on_notice, or a callback that drops notices when the caller passed none."""
+    return on_notice or (lambda level, message: None)
+
+def notice_scan_errors(notice):
+    """Returns an on_error callback for scan_media_files that reports unreadable folders through notice."""
+    return lambda e: notice('error', f"Error scanning {e.filename}: {e.strerror}")
+
+def resolve_job_count(max_jobs):
+    """Returns max_jobs as a worker count, where 0/None means one worker per CPU core."""
+    if not max_jobs or max_jobs < 1: max_jobs = os.cpu_count() or 1
+    return max(1, int(max_jobs))
+
+def scan_media_files(directory, extensions=None, recursive=False, min_size=None, max_size=None, ignore_patterns=None,
+                     on_error=None):
+    """Lazily yields os.DirEntry objects for matching files, so callers can start work while scanning continues.
+    Uses scandir's cached type/stat data instead of a separate stat per entry. ignore_patterns are fnmatch
+    patterns tested against file and directory names (default SCAN_IGNORE_PATTERNS). A folder that can't be
+    read is skipped; on_error, if given, is called with the OSError (as with os.walk's onerror)."""
+    if extensions is not None: extensions = {ext.lower() for ext in extensions}
+    if ignore_patterns is None: ignore_patterns = SCAN_IGNORE_PATTERNS
+    pending_dirs = [directory]
+    while pending_dirs:
+        current_dir = pending_dirs.pop()
+        try:
+            with os.scandir(current_dir) as entries:
+                subdirs = []
+                for entry in entries:
+                    if any(fnmatch.fnmatch(entry.name, pattern) for pattern in ignore_patterns): continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive: subdirs.append(entry.path)
+                            continue
+                        if not entry.is_file(): continue
+                        if extensions is not None and os.path.splitext(entry.name)[1].lower() not in extensions: continue
+                        if min_size is not None or max_size is not None:
+                            size = entry.stat().st_size
+                            if (min_size is not None and size < min_size) or (max_size is not None and size > max_size): continue
+                    except OSError:
+                        continue
+                    yield entry
+        except OSError as e:
+            if on_error: on_error(e)
+            continue
+        pending_dirs.extend(reversed(subdirs))
+
+def compute_file_checksum(file_path, chunk_size=1024 * 1024):
+    """Returns the SHA-256 hex digest of a file."""
+    import hashlib  # Like the other rarely needed modules imported in place: keeps it off the startup path
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# --- Metrics --- #
+METRICS_ENABLED = False  # Record per-stage timings; the CLI's --metrics* options switch this on
+METRICS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)  # Histogram upper bounds, seconds
+METRICS_REPORT_FILE = None  # JSON report written at the end of each run (path), if set
+METRICS_PROMETHEUS_FILE = None  # Prometheus textfile-collector output (path, should end in .prom), if set
+METRICS_PROFILE = None  # 'cprofile' (one .prof file per job in METRICS_PROFILE_DIR) or 'tracemalloc'
+METRICS_PROFILE_DIR = "profiles"
+METRICS_TRACEMALLOC_TOP = 15  # Allocation sites listed in the report in tracemalloc mode
+_metrics_lock = threading.Lock()
+_metrics_stages = {}  # stage -> running totals and bucket counts, so memory doesn't grow with the number of samples
+_metrics_job_memory = []  # (job label, peak traced bytes) in tracemalloc mode
+
+def metrics_start():
+    """Returns a start time for metrics_record, or None when metrics are off (the whole call pair is then a flag check)."""
+    return time.perf_counter() if METRICS_ENABLED else None
+
+def metrics_record(stage, started, bytes_in=0, bytes_out=0):
+    if started is None: return
+    metrics_record_duration(stage, time.perf_counter() - started, bytes_in, bytes_out)
+
+def metrics_record_duration(stage, seconds, bytes_in=0, bytes_out=0):
+    """Records a stage whose time was measured by the caller (e.g. summed from hooks)."""
+    bucket = next((i for i, bound in enumerate(METRICS_BUCKETS) if seconds <= bound), len(METRICS_BUCKETS))
+    with _metrics_lock:
+        totals = _metrics_stages.get(stage)
+        if totals is None:
+            totals = _metrics_stages[stage] = {'count': 0, 'seconds': 0.0, 'max': 0.0, 'bytes_in': 0, 'bytes_out': 0,
+                                               'buckets': [0] * (len(METRICS_BUCKETS) + 1)}  # The last one is +Inf
+        totals['count'] += 1
+        totals['seconds'] += seconds
+        totals['max'] = max(totals['max'], seconds)
+        totals['bytes_in'] += bytes_in or 0
+        totals['bytes_out'] += bytes_out or 0
+        totals['buckets'][bucket] += 1
+
+def metrics_profiled(label, func, *args):
+    """Calls func(*args) as one job, under cProfile or tracemalloc when METRICS_PROFILE is set."""
+    if not METRICS_PROFILE: return func(*args)
+    if METRICS_PROFILE == 'tracemalloc':
+        import tracemalloc
+        try:
+            return func(*args)
+        finally:
+            # With parallel jobs the peak also includes allocations made by other jobs at the same time.
+            with _metrics_lock:
+                _metrics_job_memory.append((label, tracemalloc.get_traced_memory()[1]))
+                tracemalloc.reset_peak()
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        os.makedirs(METRICS_PROFILE_DIR, exist_ok=True)
+        name = re.sub(r'[^\w.-]+', '_', os.path.basename(str(label)))[:80]
+        profiler.dump_stats(os.path.join(METRICS_PROFILE_DIR, f"{name}-{os.getpid()}-{threading.get_ident()}.prof"))
+
+def metrics_begin_run():
+    """Clears previous samples and starts tracemalloc if it is the configured profiler."""
+    with _metrics_lock:
+        _metrics_stages.clear(); del _metrics_job_memory[:]
+    if METRICS_PROFILE == 'tracemalloc':
+        import tracemalloc
+        if not tracemalloc.is_tracing(): tracemalloc.start()
+
+def metrics_quantile(q, buckets, count, max_seconds):
+    """Estimates a quantile from bucket counts, interpolating linearly inside the bucket it falls in (as
+    Prometheus' histogram_quantile does); the +Inf bucket ends at the largest sample."""
+    rank, seen = q * count, 0
+    for index, in_bucket in enumerate(buckets):
+        if in_bucket and seen + in_bucket >= rank:
+            lower = METRICS_BUCKETS[index - 1] if index else 0.0
+            upper = METRICS_BUCKETS[index] if index < len(METRICS_BUCKETS) else max_seconds
+            return min(max_seconds, lower + (upper - lower) * (rank - seen) / in_bucket)
+        seen += in_bucket
+    return max_seconds
+
+def metrics_snapshot():
+    """Per-stage statistics: count, total/mean/max seconds, p50/p95 estimated from the histogram, bytes in/out,
+    MB/s and cumulative bucket counts. Costs the same however many samples were recorded."""
+    with _metrics_lock:
+        stages = {stage: dict(totals, buckets=list(totals['buckets'])) for stage, totals in _metrics_stages.items()}
+    stats = {}
+    for stage, t in sorted(stages.items()):
+        total, count = t['seconds'], t['count']
+        pick = lambda q: round(metrics_quantile(q, t['buckets'], count, t['max']), 6)
+        stats[stage] = {
+            'count': count, 'total_seconds': round(total, 6), 'mean_seconds': round(total / count, 6),
+            'p50_seconds': pick(0.5), 'p95_seconds': pick(0.95), 'max_seconds': round(t['max'], 6),
+            'bytes_in': t['bytes_in'], 'bytes_out': t['bytes_out'],
+            'mb_per_second': round(max(t['bytes_in'], t['bytes_out']) / total / 1e6, 3) if total and (t['bytes_in'] or t['bytes_out']) else None,
+            'buckets': {},
+        }
+        cumulative = 0
+        for bound, in_bucket in zip(METRICS_BUCKETS, t['buckets']):
+            cumulative += in_bucket
+            stats[stage]['buckets'][str(bound)] = cumulative
+    return stats
+
+def metrics_print_summary(stats):
+    print(f"\n{Fore.CYAN}--- Stage Timings ---{Style.RESET_ALL}")
+    if not stats:
+        print(f"{Fore.YELLOW}No stages were recorded.{Style.RESET_ALL}"); return
+    print(f"{'stage':<24}{'count':>7}{'total':>10}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}{'MB/s':>9}  histogram "
+          f"({METRICS_BUCKETS[0]}s … {METRICS_BUCKETS[-1]}s)")
+    bars = " ▁▂▃▄▅▆▇█"
+    for stage, s in stats.items():
+        cumulative = list(s['buckets'].values())
+        counts = [b - a for a, b in zip([0] + cumulative, cumulative + [s['count']])]
+        histogram = "".join(bars[min(8, math.ceil(c * 8 / max(counts)))] for c in counts)
+        print(f"{Fore.YELLOW}{stage:<24}{Style.RESET_ALL}{s['count']:>7}{s['total_seconds']:>9.2f}s{s['mean_seconds']:>8.3f}s"
+              f"{s['p50_seconds']:>8.3f}s{s['p95_seconds']:>8.3f}s{s['max_seconds']:>8.3f}s"
+              f"{s['mb_per_second'] if s['mb_per_second'] is not None else '-':>9}  {Fore.GREEN}{histogram}{Style.RESET_ALL}")
+
+def metrics_prometheus_text(stats):
+    """Renders the stage statistics in the Prometheus text exposition format."""
+    lines = ["# HELP media_tools_stage_seconds Time spent per processing stage.",
+             "# TYPE media_tools_stage_seconds histogram"]
+    for stage, s in stats.items():
+        for bound, count in s['buckets'].items():
+            lines.append(f'media_tools_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'media_tools_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {s["count"]}')
+        lines.append(f'media_tools_stage_seconds_sum{{stage="{stage}"}} {s["total_seconds"]}')
+        lines.append(f'media_tools_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+    lines += ["# HELP media_tools_stage_bytes_total Bytes read and written per processing stage.",
+              "# TYPE media_tools_stage_bytes_total counter"]
+    for stage, s in stats.items():
+        lines.append(f'media_tools_stage_bytes_total{{stage="{stage}",direction="in"}} {s["bytes_in"]}')
+        lines.append(f'media_tools_stage_bytes_total{{stage="{stage}",direction="out"}} {s["bytes_out"]}')
+    return "\n".join(lines) + "\n"
+
+def metrics_write_atomic(path, text):
+    """Writes via a temp file and rename, so collectors never read a half-written file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+def metrics_end_run(tool, report_file=None, prometheus_file=None, summary=True):
+    """Prints the stage summary and writes the JSON report / Prometheus textfile if configured. Returns the stats."""
+    stats = metrics_snapshot()
+    if summary: metrics_print_summary(stats)
+    report_file, prometheus_file = report_file or METRICS_REPORT_FILE, prometheus_file or METRICS_PROMETHEUS_FILE
+    try:
+        if report_file:
+            report = {'tool': tool, 'generated_at': time.time(), 'stages': stats}
+            if METRICS_PROFILE == 'tracemalloc':
+                import tracemalloc
+                if tracemalloc.is_tracing():
+                    top = tracemalloc.take_snapshot().statistics('lineno')[:METRICS_TRACEMALLOC_TOP]
+                    report['tracemalloc'] = {'peak_bytes_per_job': _metrics_job_memory,
+                                             'top_allocations': [{'where': str(stat.traceback), 'bytes': stat.size,
+                                                                  'count': stat.count} for stat in top]}
+            metrics_write_atomic(report_file, json.dumps(report, indent=2, default=str))
+        if prometheus_file:
+            metrics_write_atomic(prometheus_file, metrics_prometheus_text(stats))
+    except OSError as e:
+        print(f"{Fore.RED}Could not write metrics output: {e}{Style.RESET_ALL}")
+    return stats
+
+# --- Shared-Folder Work Leases --- #
+LEASE_SHARED_MODE = False  # Coordinate with other hosts/processes working on the same (e.g. NFS) input folders
+LEASE_DIR_NAME = ".leases"  # Kept inside the input folder, so every node sees the same leases
+LEASE_TTL_SECONDS = 120  # A lease without a heartbeat for this long belongs to a crashed node and is taken over
+LEASE_HEARTBEAT_SECONDS = 20
+_lease_lock = threading.Lock()
+_lease_held = {}  # lease file path -> lease dict; refreshed by the heartbeat thread
+_lease_heartbeat_started = False
+
+def lease_node_id():
+    """Identifies this worker across hosts (also used in temp file names)."""
+    import socket
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def lease_path(input_directory, file_path):
+    import hashlib
+    key = hashlib.sha1(os.path.relpath(file_path, input_directory).encode('utf-8', 'surrogateescape')).hexdigest()
+    return os.path.join(input_directory, LEASE_DIR_NAME, f"{key}.lease")
+
+def lease_owned(lease):
+    """True if the lease file still carries this lease's token (i.e. no other node has taken it over)."""
+    try:
+        with open(lease['path'], 'r', encoding='utf-8') as f:
+            return json.load(f).get('token') == lease['token']
+    except (OSError, ValueError):
+        return False
+
+def lease_break_stale(path):
+    """Moves a stale lease out of the way. Returns True if the file may be claimed again.
+    The rename is atomic, so only one node wins it; the winner re-checks the age because another node may
+    have replaced the stale lease with a fresh one in the meantime, and then puts that one back."""
+    tombstone = f"{path}.stale-{lease_node_id()}-{os.urandom(4).hex()}"
+    try:
+        os.rename(path, tombstone)
+    except FileNotFoundError:
+        return True
+    try:
+        if time.time() - os.stat(tombstone).st_mtime > LEASE_TTL_SECONDS: return True
+        try: os.link(tombstone, path)  # Never overwrites a lease created in between
+        except OSError: pass
+        return False
+    finally:
+        os.remove(tombstone)
+
+def lease_heartbeat_loop():
+    while True:
+        time.sleep(LEASE_HEARTBEAT_SECONDS)
+        with _lease_lock:
+            leases = list(_lease_held.values())
+        for lease in leases:
+            if not lease_owned(lease):
+                lease['lost'] = True; continue
+            try: os.utime(lease['path'])
+            except OSError: lease['lost'] = True
+
+def lease_acquire(input_directory, file_path):
+    """Claims file_path for this node by creating its lease file with O_EXCL. A stale lease is taken over.
+    Returns the lease dict, or None if a live node holds the file."""
+    global _lease_heartbeat_started
+    path = lease_path(input_directory, file_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            try: stale = time.time() - os.stat(path).st_mtime > LEASE_TTL_SECONDS
+            except FileNotFoundError: stale = True  # Released in the meantime
+            if not stale or not lease_break_stale(path): return None
+            continue
+        lease = {'path': path, 'file': os.path.relpath(file_path, input_directory), 'node': lease_node_id(),
+                 'token': os.urandom(16).hex(), 'acquired_at': time.time()}
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(lease, f)
+        with _lease_lock:
+            _lease_held[path] = lease
+            if not _lease_heartbeat_started:
+                threading.Thread(target=lease_heartbeat_loop, daemon=True).start()
+                _lease_heartbeat_started = True
+        return lease
+    return None
+
+def lease_release(lease):
+    if lease is None: return
+    with _lease_lock:
+        _lease_held.pop(lease['path'], None)
+    if lease_owned(lease):
+        try: os.remove(lease['path'])
+        except FileNotFoundError: pass
+
+def lease_check(lease):
+    """Raises RuntimeError if this node no longer owns the lease, so results are never published twice."""
+    if lease is not None and (lease.get('lost') or not lease_owned(lease)):
+        raise RuntimeError(f"Lease on '{lease['file']}' was taken over by another node; result discarded.")
+
+# --- Duplicate Detection --- #
+DEDUP_ENABLED = False  # Opt-in: skip files whose media payload was already seen in the same input folder, and repeat downloads
+DEDUP_INDEX_FILE_NAME = ".dedup_index.sqlite"
+DEDUP_COMMIT_EVERY = 200  # Index writes per SQLite transaction; a commit per file made large runs several times slower
+DEDUP_SAMPLE_COUNT = 8  # Evenly spaced blocks hashed for the cheap first-pass fingerprint
+DEDUP_SAMPLE_BYTES = 64 * 1024
+_dedup_lock = threading.Lock()
+_dedup_pending_writes = collections.Counter()  # id(conn) -> writes since its last commit
+
+def dedup_open(index_path=None):
+    """Opens (creating if needed) the SQLite duplicate index; defaults to DEDUP_INDEX_FILE_NAME next to the script."""
+    if index_path is None: index_path = os.path.join(get_main_script_directory(), DEDUP_INDEX_FILE_NAME)
+    conn = sqlite3.connect(index_path, check_same_thread=False, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("""CREATE TABLE IF NOT EXISTS fingerprints (
+        path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,
+        payload_size INTEGER, sample_hash TEXT, full_hash TEXT, first_seen REAL)""")
+    conn.execute("CREATE INDEX IF NOT EXISTS fingerprints_sample ON fingerprints (payload_size, sample_hash)")
+    conn.execute("""CREATE TABLE IF NOT EXISTS downloads (
+        video TEXT NOT NULL, format TEXT NOT NULL, path TEXT, downloaded_at REAL, PRIMARY KEY (video, format))""")
+    conn.commit()
+    return conn
+
+def dedup_commit(conn, force=False):
+    """Counts one index write and commits once DEDUP_COMMIT_EVERY have piled up (or now, with force=True).
+    Callers hold _dedup_lock."""
+    if not force: _dedup_pending_writes[id(conn)] += 1
+    if force or _dedup_pending_writes[id(conn)] >= DEDUP_COMMIT_EVERY:
+        if conn.in_transaction: conn.commit()
+        _dedup_pending_writes.pop(id(conn), None)
+
+def dedup_flush(conn):
+    with _dedup_lock:
+        dedup_commit(conn, force=True)
+
+def dedup_close(conn):
+    """Commits the pending index writes and closes the index."""
+    dedup_flush(conn)
+    conn.close()
+
+def dedup_payload_range(file_path):
+    """Returns (start, end) of the media payload with tags left out, so copies that differ only in their tags
+    match: the audio between ID3/APE tags for MP3, everything after the metadata blocks for FLAC and the
+    'mdat' box for MP4/M4A/MOV. Other formats are fingerprinted whole."""
+    file_format, _ = tag_remover_sniff_file(file_path)
+    if file_format == 'mp3':
+        start, end, _ = tag_remover_find_payload_range(file_path)
+        return start, end
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = 4 if file_format == 'flac' else 0
+        while file_format in ('flac', 'mp4') and offset + 8 <= size:
+            f.seek(offset)
+            header = f.read(16)
+            if file_format == 'flac':
+                offset += 4 + int.from_bytes(header[1:4], 'big')
+                if header[0] & 0x80: return min(offset, size), size  # Last metadata block
+                continue
+            box_size, header_size = int.from_bytes(header[:4], 'big'), 8
+            if box_size == 1: box_size, header_size = int.from_bytes(header[8:16], 'big'), 16  # 64-bit size
+            elif box_size == 0: box_size = size - offset  # Box runs to the end of the file
+            if header[4:8] == b'mdat': return offset + header_size, min(size, offset + box_size)
+            if box_size < header_size: break
+            offset += box_size
+    return 0, size
+
+def dedup_hash_range(file_path, start, end, sampled=False):
+    """SHA-256 of bytes start..end (and their length). sampled=True reads only DEDUP_SAMPLE_COUNT evenly spaced
+    blocks of DEDUP_SAMPLE_BYTES, unless the range is small enough to hash completely anyway."""
+    import hashlib
+    length = end - start
+    digest = hashlib.sha256(str(length).encode())
+    with open(file_path, 'rb') as f:
+        if sampled and length > DEDUP_SAMPLE_COUNT * DEDUP_SAMPLE_BYTES:
+            step = (length - DEDUP_SAMPLE_BYTES) // (DEDUP_SAMPLE_COUNT - 1)
+            for index in range(DEDUP_SAMPLE_COUNT):
+                f.seek(start + index * step)
+                digest.update(f.read(DEDUP_SAMPLE_BYTES))
+            return digest.hexdigest()
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(1024 * 1024, length))
+            if not chunk: break
+            digest.update(chunk)
+            length -= len(chunk)
+    return digest.hexdigest()
+
+def dedup_fingerprint(conn, file_path, stat_result=None):
+    """Returns the indexed fingerprint of a file, re-reading it only if its size or mtime changed.
+    full_hash is None until dedup_full_hash is needed, except for payloads small enough to hash whole."""
+    path = os.path.abspath(file_path)
+    if stat_result is None: stat_result = os.stat(path)
+    with _dedup_lock:
+        row = conn.execute("SELECT * FROM fingerprints WHERE path = ?", (path,)).fetchone()
+    if row and row['size'] == stat_result.st_size and row['mtime_ns'] == stat_result.st_mtime_ns:
+        return dict(row)
+    started = metrics_start()
+    start, end = dedup_payload_range(path)
+    sample_hash = dedup_hash_range(path, start, end, sampled=True)
+    record = {'path': path, 'size': stat_result.st_size, 'mtime_ns': stat_result.st_mtime_ns, 'payload_size': end - start,
+              'sample_hash': sample_hash,
+              'full_hash': sample_hash if end - start <= DEDUP_SAMPLE_COUNT * DEDUP_SAMPLE_BYTES else None,
+              # Stripping tags changes mtime but not the payload; the file keeps its place as the original.
+              'first_seen': row['first_seen'] if row and row['sample_hash'] == sample_hash else time.time()}
+    metrics_record('dedup.fingerprint', started, min(end - start, DEDUP_SAMPLE_COUNT * DEDUP_SAMPLE_BYTES))
+    with _dedup_lock:
+        conn.execute("INSERT OR REPLACE INTO fingerprints VALUES (:path, :size, :mtime_ns, :payload_size, :sample_hash, "
+                     ":full_hash, :first_seen)", record)
+        dedup_commit(conn)
+    return record
+
+def dedup_full_hash(conn, record):
+    """Fills in record['full_hash'] (hashing the whole payload once) and stores it."""
+    if record['full_hash'] is None:
+        started = metrics_start()
+        record['full_hash'] = dedup_hash_range(record['path'], *dedup_payload_range(record['path']))
+        metrics_record('dedup.full_hash', started, record['payload_size'])
+        with _dedup_lock:
+            conn.execute("UPDATE fingerprints SET full_hash = ? WHERE path = ?", (record['full_hash'], record['path']))
+            dedup_commit(conn)
+    return record
+
+def dedup_forget(conn, paths):
+    with _dedup_lock:
+        conn.executemany("DELETE FROM fingerprints WHERE path = ?", [(p,) for p in paths])
+        dedup_commit(conn)
+
+def dedup_find_original(conn, file_path, under, stat_result=None):
+    """Indexes file_path and returns the path of an earlier-seen file under the folder `under` with the same
+    payload, or None if this is the first copy. Candidates are found by payload size and sampled hash; the
+    full hashes are only computed for those, and must match. Files seen at the same moment are ordered by path,
+    so of several copies processed in parallel exactly one is the original."""
+    record = dedup_fingerprint(conn, file_path, stat_result)
+    prefix = os.path.join(os.path.abspath(under), '')
+    with _dedup_lock:
+        candidates = conn.execute(
+            "SELECT * FROM fingerprints WHERE payload_size = ? AND sample_hash = ? AND substr(path, 1, ?) = ? "
+            "AND (first_seen < ? OR (first_seen = ? AND path < ?)) ORDER BY first_seen, path",
+            (record['payload_size'], record['sample_hash'], len(prefix), prefix,
+             record['first_seen'], record['first_seen'], record['path'])).fetchall()
+    for candidate in candidates:
+        try:
+            candidate = dedup_fingerprint(conn, candidate['path'])
+        except OSError:
+            dedup_forget(conn, [candidate['path']]); continue  # Deleted or moved away since it was indexed
+        if candidate['sample_hash'] != record['sample_hash']: continue
+        if dedup_full_hash(conn, candidate)['full_hash'] == dedup_full_hash(conn, record)['full_hash']:
+            return candidate['path']
+    return None
+
+def dedup_open_for_run(enabled=None, on_notice=None, shared=False):
+    """Opens the index for one tool run; None if duplicate detection is off (enabled defaults to DEDUP_ENABLED),
+    the run is in shared mode or the index can't be opened (reported through on_notice)."""
+    if not (DEDUP_ENABLED if enabled is None else enabled): return None
+    notice = notice_sink(on_notice)
+    if shared:  # Other nodes never see this index, and SQLite can't be shared safely over NFS
+        notice('warning', "Note: Duplicate detection is off in shared mode.")
+        return None
+    try:
+        return dedup_open()
+    except sqlite3.Error as e:
+        notice('warning', f"Warning: Could not open the duplicate index, processing every file: {e}")
+        return None
+
+def dedup_check(conn, file_path, under, stat_result=None):
+    """dedup_find_original for the tools: None without an index or if the file can't be read (the tool then
+    processes it and reports any real problem itself)."""
+    if conn is None: return None
+    try:
+        return dedup_find_original(conn, file_path, under, stat_result)
+    except (OSError, sqlite3.Error):
+        return None
+
+def dedup_download_key(url):
+    return yt_dl_get_video_id(url) or url
+
+def dedup_downloaded_path(conn, url, quality_format):
+    """Returns the file an earlier download of this video in this format produced, if it still exists."""
+    with _dedup_lock:
+        row = conn.execute("SELECT path FROM downloads WHERE video = ? AND format = ?",
+                           (dedup_download_key(url), quality_format)).fetchone()
+    return row['path'] if row and row['path'] and os.path.isfile(row['path']) else None
+
+def dedup_record_download(conn, url, quality_format, filepath):
+    with _dedup_lock:
+        conn.execute("INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?)",
+                     (dedup_download_key(url), quality_format, os.path.abspath(filepath), time.time()))
+        dedup_commit(conn, force=True)  # A lost record means downloading the video again
+
+def dedup_link(original, duplicate):
+    """Atomically replaces duplicate (byte-identical to original) with a hard link to it.
+    Returns 'linked' or 'already-linked'."""
+    original_stat, duplicate_stat = os.stat(original), os.stat(duplicate)
+    if (original_stat.st_dev, original_stat.st_ino) == (duplicate_stat.st_dev, duplicate_stat.st_ino):
+        return 'already-linked'
+    directory, name = os.path.split(duplicate)
+    temp_path = os.path.join(directory, f".{name}.link-{os.getpid()}")
+    os.link(original, temp_path)  # Fails with OSError across file systems
+    try:
+        os.replace(temp_path, duplicate)
+    except OSError:
+        os.remove(temp_path); raise
+    return 'linked'
+
+def dedup_report(directories, link=False, max_jobs=None, on_result=None, on_notice=None):
+    """Indexes every file under directories, lists the groups of files with identical media payloads (the
+    earliest-seen file first) and, with link=True, replaces each copy with a hard link to an earlier member of
+    its group that is byte-identical; copies that differ only in their tags are reported as 'differs-in-tags'.
+    on_result, if given, is called with one event dict per duplicate ({'path', 'status', 'duplicate_of',
+    'bytes', 'error'}), group by group; on_notice with (level, message) as each folder is indexed.
+    Returns the list of groups."""
+    notice = notice_sink(on_notice)
+    conn = dedup_open()
+    records = []
+    with ThreadPoolExecutor(max_workers=resolve_job_count(max_jobs or 0)) as pool:
+        for directory in directories:
+            entries = list(scan_media_files(directory, recursive=True, on_error=notice_scan_errors(notice)))
+            records += pool.map(lambda entry: dedup_fingerprint(conn, entry.path, entry.stat()), entries)
+            notice('info', f"Indexed {len(entries)} file(s) in {directory}")
+            prefix = os.path.join(os.path.abspath(directory), '')
+            seen = {record['path'] for record in records}
+            with _dedup_lock:
+                stale = [row['path'] for row in conn.execute("SELECT path FROM fingerprints WHERE substr(path, 1, ?) = ?",
+                                                             (len(prefix), prefix)) if row['path'] not in seen]
+            dedup_forget(conn, stale)
+
+    by_sample = collections.defaultdict(list)
+    for record in records: by_sample[(record['payload_size'], record['sample_hash'])].append(record)
+    groups = []
+    for candidates in by_sample.values():
+        if len(candidates) < 2: continue
+        by_full = collections.defaultdict(list)
+        for record in candidates: by_full[dedup_full_hash(conn, record)['full_hash']].append(record)
+        groups += [[r['path'] for r in sorted(group, key=lambda r: (r['first_seen'], r['path']))]
+                   for group in by_full.values() if len(group) > 1]
+    dedup_close(conn)
+
+    checksums = {}
+    checksum = lambda p: checksums[p] if p in checksums else checksums.setdefault(p, compute_file_checksum(p))
+    identical = lambda a, b: os.path.getsize(a) == os.path.getsize(b) and checksum(a) == checksum(b)
+    for group in sorted(groups):
+        for index, path in enumerate(group[1:], 1):
+            event = {'path': path, 'status': 'duplicate', 'duplicate_of': group[0], 'bytes': os.path.getsize(path), 'error': None}
+            if link:
+                try:
+                    target = next((p for p in group[:index] if identical(p, path)), None)
+                    event['status'] = dedup_link(target, path) if target else 'differs-in-tags'
+                except OSError as e:
+                    event.update(status='error', error=str(e))
+            if on_result: on_result(event)
+    return groups
+
+def dedup_print_event(event, previous=None):
+    """Prints one dedup_report event; the group's original is printed first when it differs from previous's."""
+    if previous is None or previous['duplicate_of'] != event['duplicate_of']:
+        print(f"\n{Fore.GREEN}{event['duplicate_of']}{Style.RESET_ALL}")
+    color = Fore.RED if event['status'] == 'error' else Fore.YELLOW
+    detail = f" ({event['error']})" if event['error'] else '' if event['status'] == 'duplicate' else f" [{event['status']}]"
+    print(f"  {color}= {event['path']}{detail}{Style.RESET_ALL}")
+
+def dedup_print_summary(groups, counts, link=False):
+    duplicate_bytes = sum(os.path.getsize(p) for group in groups for p in group[1:] if os.path.exists(p))
+    print(f"\n{Fore.CYAN}{len(groups)} group(s) of duplicates, {sum(len(g) - 1 for g in groups)} redundant file(s), "
+          f"{duplicate_bytes / 1024 / 1024:.1f} MB.{Style.RESET_ALL}")
+    if link:
+        print(f"{Fore.GREEN}Hard-linked: {counts['linked']}, already linked: {counts['already-linked']}, "
+              f"differ only in tags (kept): {counts['differs-in-tags']}, errors: {counts['error']}{Style.RESET_ALL}")
+
+# --- YouTube Downloader Section (Largely Unchanged from previous combined version) --- #
+def yt_dl_print_banner():
+    banner = f"""
+{Fore.CYAN}╭─────────────────────────────────────────────────────────────────╮
+{Fore.LIGHTBLUE_EX}│   ██╗   ██╗ ██████╗ ██╗   ██╗████████╗██╗   ██╗██████╗ ███████╗ │
+{Fore.LIGHTBLUE_EX}│   ╚██╗ ██╔╝██╔═══██╗██║   ██║╚══██╔══╝██║   ██║██╔══██╗██╔════╝ │
+{Fore.LIGHTCYAN_EX}│    ╚████╔╝ ██║   ██║██║   ██║   ██║   ██║   ██║██████╔╝█████╗   │
+{Fore.LIGHTCYAN_EX}│     ╚██╔╝  ██║   ██║██║   ██║   ██║   ██║   ██║██╔══██╗██╔══╝   │
+{Fore.LIGHTBLUE_EX}│      ██║   ╚██████╔╝╚██████╔╝   ██║   ╚██████╔╝██████╔╝███████╗ │
+{Fore.LIGHTBLUE_EX}│      ╚═╝    ╚═════╝  ╚═════╝    ╚═╝    ╚═════╝ ╚═════╝ ╚══════╝ │
+{Fore.CYAN}├─────────────────────────────────────────────────────────────────┤
+{Fore.LIGHTCYAN_EX}│         🚀  Y O U T U B E   D O W N L O A D E R  🚀             │
+{Fore.CYAN}╰─────────────────────────────────────────────────────────────────╯
+{Style.RESET_ALL}"""
+    print(banner)
+
+def yt_dl_sanitize_filename(filename):
+    return re.sub(r'[\\/*?:"<>|]', "", filename)
+
+def yt_dl_get_video_id(url):
+    """Returns the 11-character YouTube video ID from a URL or bare ID, or None."""
+    if not url: return None
+    if re.match(r'^[a-zA-Z0-9_-]{11}$', url): return url
+    match = re.search(r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|embed/|v/|shorts/)|youtu\.be/)([a-zA-Z0-9_-]{11})', url)
+    return match.group(1) if match else None
+
+def yt_dl_info_cache_path(video_id):
+    return os.path.join(get_main_script_directory(), YT_DL_INFO_CACHE_DIR_NAME, f"{video_id}.json")
+
+def yt_dl_load_cached_info(video_id):
+    """Returns the cached info dict for a video ID, or None if missing, unreadable or older than the TTL."""
+    if not video_id or YT_DL_INFO_CACHE_TTL_SECONDS <= 0: return None
+    try:
+        with open(yt_dl_info_cache_path(video_id), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - info.get('_cached_at', 0) > YT_DL_INFO_CACHE_TTL_SECONDS: return None
+    return info
+
+def yt_dl_save_cached_info(video_id, info):
+    if not video_id or YT_DL_INFO_CACHE_TTL_SECONDS <= 0: return
+    cache_path = yt_dl_info_cache_path(video_id)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(dict(info, _cached_at=time.time()), f)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError):
+        pass  # A missing cache entry only means extracting the info again next time
+
+def yt_dl_extract_info(url, use_cache=True):
+    """Extracts (unprocessed) video info, so the same dict can be handed to YoutubeDL.process_ie_result for download.
+    Raises on failure."""
+    load_yt_dlp()
+    video_id = yt_dl_get_video_id(url)
+    if use_cache:
+        cached = yt_dl_load_cached_info(video_id)
+        if cached: return cached
+    ydl_opts = {'quiet': True, 'no_warnings': True, 'skip_download': True}
+    started = metrics_start()
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False, process=False)
+        metrics_record('download.extract_info', started)
+        # Only a sanitized copy goes to the cache; the live dict keeps generator/LazyList-backed fields
+        # (e.g. DASH 'fragments') that the download needs. Formats with such fields can't round-trip through JSON.
+        if (info and info.get('_type', 'video') == 'video'
+                and all(isinstance(f.get('fragments', []), list) for f in info.get('formats') or [])):
+            yt_dl_save_cached_info(video_id, ydl.sanitize_info(info))
+    return info
+
+def yt_dl_get_video_info(url, use_cache=True):
+    try:
+        return yt_dl_extract_info(url, use_cache)
+    except Exception as e:
+        print(f"\n{Fore.RED}🔥 Error getting video info: {str(e)}{Style.RESET_ALL}")
+        return None
+
+def yt_dl_remove_ansi_escape(text):
+    if text is None: return ""
+    return re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])').sub('', text)
+
+def yt_dl_progress_hook(d):
+    if d['status'] == 'downloading':
+        percent = yt_dl_remove_ansi_escape(d.get('_percent_str', 'N/A')).strip('% ')
+        speed = d.get('_speed_str', 'N/A')
+        eta = d.get('_eta_str', 'N/A')
+        try: pct_num = float(percent)
+        except ValueError: pct_num = 0.0
+        spinner = ['⣾','⣽','⣻','⢿','⡿','⣟','⣯','⣷'][int(d.get('elapsed', 0)*10)%8]
+        color = Fore.LIGHTRED_EX if pct_num < 30 else Fore.LIGHTYELLOW_EX if pct_num < 70 else Fore.LIGHTGREEN_EX
+        print(f"\r{color}{spinner} {Fore.YELLOW}Progress: {color}{percent:>6}% {Fore.LIGHTMAGENTA_EX}∥ {Fore.LIGHTGREEN_EX}Speed: {Fore.CYAN}{speed:>12} {Fore.LIGHTMAGENTA_EX}∥ {Fore.LIGHTBLUE_EX}ETA: {Fore.LIGHTCYAN_EX}{eta:>8}{Style.RESET_ALL}", end='', flush=True)
+    elif d['status'] == 'finished':
+        print(f"\r{Fore.GREEN}⏳ Finalizing download... please wait{Style.RESET_ALL}                 ", end='', flush=True)
+
+def yt_dl_build_download_opts(title, quality_format, download_dir_path, progress_hooks=None, quiet=False, postprocess=True):
+    """Builds YoutubeDL options; with postprocess=False the ffmpeg step is left for a separate stage."""
+    output_template = os.path.join(download_dir_path, f"{title}.%(ext)s")
+    # FFmpegExtractAudio already stream-copies when the source codec matches; 'best' keeps native m4a/opus as-is.
+    postprocessors = [{
+        'key': 'FFmpegExtractAudio', 'preferredcodec': 'best' if YT_DL_ALLOW_NATIVE_AUDIO else 'mp3', 'preferredquality': '192',
+    }] if quality_format == 'bestaudio/best' else [{
+        'key': 'FFmpegVideoConvertor', 'preferedformat': 'mp4', 'when': 'post_process'
+    }]
+    return {
+        'format': quality_format, 'outtmpl': output_template,
+        'progress_hooks': progress_hooks or [], 'nocheckcertificate': True,
+        'quiet': quiet, 'no_warnings': quiet, 'noprogress': quiet,
+        'concurrent_fragment_downloads': max(1, YT_DL_FRAGMENT_CONCURRENCY),
+        'postprocessors': postprocessors if postprocess else []
+    }
+
+def yt_dl_http_connection(url, verify=True):
+    """Opens a connection to the host of url; http.client keeps it alive across consecutive requests."""
+    import http.client, ssl
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme == 'https':
+        context = ssl.create_default_context() if verify else ssl._create_unverified_context()
+        return http.client.HTTPSConnection(parts.netloc, timeout=YT_DL_CHUNK_TIMEOUT_SECONDS, context=context)
+    return http.client.HTTPConnection(parts.netloc, timeout=YT_DL_CHUNK_TIMEOUT_SECONDS)
+
+def yt_dl_range_request(conn, url, headers, start, end):
+    """Sends a GET for bytes start..end (inclusive) on conn and returns the response."""
+    parts = urllib.parse.urlsplit(url)
+    target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+    conn.request('GET', target, headers=dict(headers, Range=f"bytes={start}-{end}", **{'Accept-Encoding': 'identity'}))
+    return conn.getresponse()
+
+def yt_dl_request_headers(ydl, info, url):
+    """Headers yt-dlp would send for info's format: its own and the format's http_headers, plus a Cookie
+    header built from ydl's cookie jar for url (yt-dlp keeps cookies out of http_headers)."""
+    headers = {}
+    for source in (ydl.params.get('http_headers') or {}, info.get('http_headers') or {}):
+        for key, value in source.items():
+            if key.lower() in ('range', 'accept-encoding', 'cookie'): continue
+            headers = {k: v for k, v in headers.items() if k.lower() != key.lower()}
+            headers[key] = value
+    cookie = ydl.cookiejar.get_cookie_header(url)
+    if cookie: headers['Cookie'] = cookie
+    return headers
+
+def yt_dl_range_probe(ydl, info, verify=True):
+    """Requests the first byte, following redirects. Returns (final url, headers for it, total size), with
+    size None when the server doesn't answer range requests."""
+    url = info['url']
+    for _ in range(5):
+        headers = yt_dl_request_headers(ydl, info, url)
+        conn = yt_dl_http_connection(url, verify)
+        try:
+            response = yt_dl_range_request(conn, url, headers, 0, 0)
+            location = response.getheader('Location')
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+            match = re.match(r'bytes 0-0/(\d+)$', response.getheader('Content-Range') or '')
+            return url, headers, int(match.group(1)) if response.status == 206 and match else None
+        finally:
+            conn.close()  # Never read the body: a server ignoring Range would send the whole file
+    return url, headers, None
+
+def yt_dl_chunked_download(ydl, filename, info):
+    """Fetches one progressive http(s) format as YT_DL_CHUNK_SIZE byte ranges over YT_DL_CHUNKED_CONNECTIONS
+    keep-alive connections, written in place into a preallocated temp file. Finished chunks are recorded in a
+    resume map next to it, so an interrupted download continues where it stopped. Progress of all chunks is
+    reported to ydl's progress hooks as one download. Returns yt-dlp's (success, real_download) pair, or None
+    if the file is too small or the server can't serve ranges, including a chunk request answered with
+    anything but 206 (yt-dlp then downloads it as usual)."""
+    import http.client
+    verify = not ydl.params.get('nocheckcertificate')
+    if info.get('filesize') and info['filesize'] < YT_DL_CHUNKED_MIN_SIZE: return None
+    try:
+        url, headers, total = yt_dl_range_probe(ydl, info, verify)
+    except OSError:
+        return None
+    if not total or total < YT_DL_CHUNKED_MIN_SIZE: return None
+
+    part_path, map_path = f"{filename}.chunked.part", f"{filename}.chunked.json"
+    layout = {'format_id': info.get('format_id'), 'size': total, 'chunk_size': YT_DL_CHUNK_SIZE}
+    chunk_count = math.ceil(total / YT_DL_CHUNK_SIZE)
+    done = set()
+    try:
+        with open(map_path, encoding='utf-8') as f:
+            resume_map = json.load(f)
+        if {k: resume_map.get(k) for k in layout} == layout and os.path.getsize(part_path) == total:
+            done = set(resume_map['done'])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    fd = os.open(part_path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        if not done:
+            os.ftruncate(fd, 0)
+            if hasattr(os, 'posix_fallocate'): os.posix_fallocate(fd, 0, total)
+            else: os.ftruncate(fd, total)
+        pending = [index for index in range(chunk_count) if index not in done]
+        resumed_bytes = sum(min(YT_DL_CHUNK_SIZE, total - index * YT_DL_CHUNK_SIZE) for index in done)
+        if done:
+            ydl.to_screen(f"[download] Resuming chunked download: {len(done)}/{chunk_count} chunks already done")
+        ydl.to_screen(f"[download] Fetching {len(pending)} chunk(s) over {YT_DL_CHUNKED_CONNECTIONS} connections")
+
+        hooks = ydl.params.get('progress_hooks') or []
+        from yt_dlp.downloader.common import FileDownloader
+        state = {'downloaded': resumed_bytes, 'reported': 0.0, 'refused': None}
+        state_lock = threading.Lock()
+        started = time.monotonic()
+        stop = threading.Event()
+        local = threading.local()
+        connections = []
+
+        def report(count):
+            with state_lock:
+                state['downloaded'] += count
+                now = time.monotonic()
+                if now - state['reported'] < 0.1 and state['downloaded'] < total: return
+                state['reported'] = now
+                elapsed = now - started
+                speed = (state['downloaded'] - resumed_bytes) / elapsed if elapsed > 0 else None
+                eta = (total - state['downloaded']) / speed if speed else None
+                progress = {'status': 'downloading', 'filename': filename, 'tmpfilename': part_path,
+                            'downloaded_bytes': state['downloaded'], 'total_bytes': total, 'elapsed': elapsed,
+                            'speed': speed, 'eta': eta, 'info_dict': info,
+                            '_percent_str': FileDownloader.format_percent(100 * state['downloaded'] / total),
+                            '_speed_str': FileDownloader.format_speed(speed), '_eta_str': FileDownloader.format_eta(eta)}
+                for hook in hooks: hook(progress)
+
+        def mark_done(index):
+            with state_lock:
+                done.add(index)
+                os.fsync(fd)  # The map must never claim data that isn't on disk yet
+                metrics_write_atomic(map_path, json.dumps(dict(layout, done=sorted(done))))
+
+        def fetch_chunk(index):
+            chunk_started = metrics_start()
+            offset, end = index * YT_DL_CHUNK_SIZE, min(total, (index + 1) * YT_DL_CHUNK_SIZE) - 1
+            attempts = 0
+            while offset <= end:
+                if stop.is_set(): return
+                if getattr(local, 'conn', None) is None:
+                    local.conn = yt_dl_http_connection(url, verify)
+                    with state_lock: connections.append(local.conn)
+                try:
+                    response = yt_dl_range_request(local.conn, url, headers, offset, end)
+                    if response.status != 206:
+                        state['refused'] = f"HTTP Error {response.status} {response.reason} for bytes {offset}-{end}"
+                        stop.set()
+                        return
+                    while offset <= end:
+                        if stop.is_set(): return
+                        block = response.read(min(256 * 1024, end + 1 - offset))
+                        if not block: raise ConnectionError("connection closed mid-chunk")
+                        os.pwrite(fd, block, offset)
+                        offset += len(block)
+                        report(len(block))
+                except (OSError, http.client.HTTPException):
+                    local.conn.close()
+                    local.conn = None
+                    attempts += 1
+                    if attempts > YT_DL_CHUNK_RETRIES: raise
+                    time.sleep(min(0.25 * 2 ** attempts, 5.0))
+            mark_done(index)
+            metrics_record('download.chunk', chunk_started, bytes_out=end + 1 - index * YT_DL_CHUNK_SIZE)
+
+        pool = ThreadPoolExecutor(max_workers=min(YT_DL_CHUNKED_CONNECTIONS, max(1, len(pending))))
+        try:
+            for future in [pool.submit(fetch_chunk, index) for index in pending]:
+                future.result()
+        except Exception as e:
+            raise yt_dlp.utils.DownloadError(f"Chunked download failed, rerun to resume: {e}")
+        finally:
+            stop.set()  # After an error or Ctrl+C the other connections stop at their next block
+            pool.shutdown(wait=True)
+            for conn in connections: conn.close()
+    finally:
+        os.close(fd)
+    if state['refused']:
+        ydl.report_warning(f"Range request refused ({state['refused']}), downloading over one connection")
+        for path in (part_path, map_path):
+            if os.path.exists(path): os.remove(path)
+        return None
+    os.replace(part_path, filename)
+    os.remove(map_path)
+    finished = {'status': 'finished', 'filename': filename, 'total_bytes': total, 'downloaded_bytes': total,
+                'elapsed': time.monotonic() - started, 'info_dict': info}
+    for hook in hooks: hook(finished)
+    return True, True
+
+def yt_dl_enable_chunked_downloads(ydl):
+    """Routes ydl's progressive http(s) downloads through yt_dl_chunked_download. Fragmented formats, subtitles,
+    proxied sessions and platforms without os.pwrite keep yt-dlp's own downloaders."""
+    if YT_DL_CHUNKED_CONNECTIONS < 2 or ydl.params.get('proxy') or not hasattr(os, 'pwrite'): return
+    default_dl = ydl.dl
+
+    def dl(name, info, subtitle=False, test=False):
+        if (test or subtitle or name == '-' or os.path.isfile(name)
+                or yt_dlp.utils.determine_protocol(info) not in ('http', 'https')):
+            return default_dl(name, info, subtitle, test)
+        return yt_dl_chunked_download(ydl, name, info) or default_dl(name, info, subtitle, test)
+    ydl.dl = dl
+
+def yt_dl_download_from_info(url, video_info, ydl_opts):
+    """Downloads an already-extracted info dict, re-extracting once if cached stream URLs have expired.
+    Returns the processed info dict (with 'requested_downloads')."""
+    load_yt_dlp()
+    started = metrics_start()
+    postprocess = {'active': 0, 'since': 0.0, 'seconds': 0.0, 'bytes_in': 0}
+    if started is not None:
+        def postprocessor_hook(d):
+            # yt-dlp runs its postprocessors (merge, audio extraction, ...) inside process_ie_result; their time
+            # is recorded as download.postprocess and left out of download.fetch. Nested runs are counted once.
+            if d['status'] == 'started':
+                if not postprocess['active']:
+                    postprocess['since'] = time.perf_counter()
+                    path = d.get('info_dict', {}).get('filepath')
+                    if not postprocess['bytes_in'] and path and os.path.isfile(path): postprocess['bytes_in'] = os.path.getsize(path)
+                postprocess['active'] += 1
+            elif d['status'] == 'finished' and postprocess['active']:
+                postprocess['active'] -= 1
+                if not postprocess['active']: postprocess['seconds'] += time.perf_counter() - postprocess['since']
+        ydl_opts = dict(ydl_opts, postprocessor_hooks=[*ydl_opts.get('postprocessor_hooks', []), postprocessor_hook])
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        yt_dl_enable_chunked_downloads(ydl)
+        try:
+            info = ydl.process_ie_result(video_info, download=True)
+        except yt_dlp.utils.DownloadError:
+            if '_cached_at' not in video_info: raise
+            if not ydl_opts.get('quiet'):
+                print(f"\n{Fore.YELLOW}⚠ Cached video info is stale, refreshing...{Style.RESET_ALL}")
+            info = ydl.process_ie_result(yt_dl_extract_info(url, use_cache=False), download=True)
+    if started is not None:
+        output_bytes = api_output_bytes(d.get('filepath') or '' for d in info.get('requested_downloads') or [])
+        metrics_record_duration('download.fetch', time.perf_counter() - started - postprocess['seconds'],
+                                bytes_out=postprocess['bytes_in'] or output_bytes)
+        if postprocess['seconds']:
+            metrics_record_duration('download.postprocess', postprocess['seconds'], postprocess['bytes_in'], output_bytes)
+    return info
+
+def yt_dl_download_video(url, quality_format, download_dir_path):
+    if not load_yt_dlp(): return False
+    dedup = dedup_open_for_run(on_notice=print_notice)
+    try:
+        existing = dedup_downloaded_path(dedup, url, quality_format) if dedup is not None else None
+        if existing:
+            print(f"\n{Fore.YELLOW}⏭ Already downloaded, skipping: {Fore.CYAN}{existing}{Style.RESET_ALL}")
+            return True
+        video_info = yt_dl_get_video_info(url)
+        if not video_info:
+            print(f"{Fore.RED}❌ Could not get video information{Style.RESET_ALL}")
+            return False
+        title = yt_dl_sanitize_filename(video_info['title'])
+        ensure_directory_exists(download_dir_path)
+        ydl_opts = yt_dl_build_download_opts(title, quality_format, download_dir_path, [yt_dl_progress_hook])
+        print(f"\n{Fore.GREEN}📡 Downloading: {Fore.YELLOW}{title}{Style.RESET_ALL}")
+        print(f"{Fore.BLUE}⌛ Preparing download...{Style.RESET_ALL}")
+        info = yt_dl_download_from_info(url, video_info, ydl_opts)
+        if dedup is not None: dedup_record_download(dedup, url, quality_format, info['requested_downloads'][-1]['filepath'])
+        print(f"\r{Fore.GREEN}🎉 ✓ Download completed successfully!{Style.RESET_ALL}              ")
+        print(f"{Fore.CYAN}📂 File saved to: {Fore.YELLOW}{download_dir_path}{Style.RESET_ALL}")
+        return True
+    except yt_dlp.utils.DownloadError as e:
+        print(f"\n{Fore.RED}💥 yt-dlp Download Error: {str(e)}{Style.RESET_ALL}")
+        return False
+    except Exception as e:
+        print(f"\n{Fore.RED}⚡ Unexpected Error during download: {str(e)}{Style.RESET_ALL}")
+        import traceback
+        traceback.print_exc()
+        return False
+    finally:
+        if dedup is not None: dedup_close(dedup)
+
+def yt_dl_print_quality_menu():
+    print(f"\n{Fore.WHITE}╔════════════════════════════════════════╗")
+    print(f"║{Fore.MAGENTA}       📽  VIDEO QUALITY OPTIONS         {Fore.WHITE}║")
+    print(f"╠════════════════════════════════════════╣")
+    print(f"║{Fore.WHITE} 1. {Fore.GREEN}🎯 Best quality (4K if available)   {Fore.WHITE}║")
+    print(f"║{Fore.WHITE} 2. {Fore.YELLOW}🖥  1080p HD                         {Fore.WHITE}║")
+    print(f"║{Fore.WHITE} 3. {Fore.YELLOW}💻 720p HD                          {Fore.WHITE}║")
+    print(f"║{Fore.WHITE} 4. {Fore.YELLOW}📱 480p                             {Fore.WHITE}║")
+    print(f"║{Fore.WHITE} 5. {Fore.YELLOW}📼 360p                             {Fore.WHITE}║")
+    print(f"║{Fore.WHITE} 6. {Fore.CYAN}🎧 Audio only (High quality MP3)    {Fore.WHITE}║")
+    print(f"║{Fore.WHITE} 0. {Fore.RED}🚪 Return to Main Menu              {Fore.WHITE}║")
+    print(f"╚════════════════════════════════════════╝{Style.RESET_ALL}")
+
+def yt_dl_get_quality_format(choice):
+    q_map = {'1': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best',
+             '2': 'bestvideo[height<=1080][ext=mp4]+bestaudio[ext=m4a]/best[height<=1080][ext=mp4]/best[height<=1080]',
+             '3': 'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/best[height<=720][ext=mp4]/best[height<=720]',
+             '4': 'bestvideo[height<=480][ext=mp4]+bestaudio[ext=m4a]/best[height<=480][ext=mp4]/best[height<=480]',
+             '5': 'bestvideo[height<=360][ext=mp4]+bestaudio[ext=m4a]/best[height<=360][ext=mp4]/best[height<=360]',
+             '6': 'bestaudio/best'}
+    return q_map.get(choice, q_map['1'])
+
+def yt_dl_extract_youtube_url(text):
+    match = re.search(r'(?:https?://)?(?:www\.)?(?:m\.)?(?:youtube\.com|youtu\.be)/(?:watch\?v=|embed/|v/|shorts/)?([a-zA-Z0-9_-]{11})', text)
+    if match and match.group(1): return f"https://www.youtube.com/watch?v={match.group(1)}"
+    return None
+
+def yt_dl_normalize_url(text):
+    """Turns a YouTube URL, bare video ID or other http(s) URL into a downloadable URL, or None."""
+    text = text.strip()
+    if yt_dl_is_playlist_url(text): return text
+    url = yt_dl_extract_youtube_url(text)
+    if url: return url
+    if re.match(r'^[a-zA-Z0-9_-]{11}$', text): return f"https://www.youtube.com/watch?v={text}"
+    if re.match(r'^https?://', text): return text
+    return None
+
+# --- YouTube Downloader: Batch / Playlist Queue --- #
+def yt_dl_is_playlist_url(text):
+    return bool(re.search(r'(?:youtube\.com|youtu\.be)/playlist\?(?:.*&)?list=', text))
+
+def yt_dl_expand_playlist(url):
+    """Returns the video URLs of a playlist without resolving each video."""
+    load_yt_dlp()
+    ydl_opts = {'quiet': True, 'no_warnings': True, 'skip_download': True, 'extract_flat': 'in_playlist'}
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+    urls = []
+    for entry in (info or {}).get('entries') or []:
+        if not entry: continue
+        entry_url = entry.get('url') or entry.get('id')
+        if entry_url: urls.append(yt_dl_normalize_url(entry_url) or entry_url)
+    return urls
+
+def yt_dl_collect_batch_urls(source):
+    """Expands a batch file (one URL/ID per line, '#' comments allowed) or a playlist URL
+    into a list of video URLs with duplicate video IDs removed."""
+    if os.path.isfile(source):
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+    else:
+        lines = [source.strip()]
+
+    urls, seen = [], set()
+    for line in lines:
+        url = yt_dl_normalize_url(line)
+        if not url:
+            print(f"{Fore.YELLOW}⚠ Ignoring invalid entry: {line}{Style.RESET_ALL}"); continue
+        if yt_dl_is_playlist_url(url):
+            try:
+                expanded = yt_dl_expand_playlist(url)
+            except Exception as e:
+                print(f"{Fore.RED}🔥 Could not read playlist {url}: {e}{Style.RESET_ALL}"); continue
+        else:
+            expanded = [url]
+        for item_url in expanded:
+            key = yt_dl_get_video_id(item_url) or item_url
+            if key in seen: continue
+            seen.add(key)
+            urls.append(item_url)
+    return urls
+
+def yt_dl_batch_new_result(url, error=None):
+    return {'url': url, 'title': None, 'ok': False, 'error': error, 'elapsed': 0.0, 'filepath': None, 'duplicate': False}
+
+def yt_dl_batch_download_item(url, quality_format, download_dir_path, host_slots, progress_hook=None, dedup=None):
+    """Downloads one batch item quietly without postprocessing. With a duplicate index (dedup), a video already
+    downloaded in this format is not fetched again and comes back with 'duplicate' set.
+    Returns (result dict, processed info dict or None); never raises."""
+    result = yt_dl_batch_new_result(url)
+    started = time.monotonic()
+    info = None
+    try:
+        existing = dedup_downloaded_path(dedup, url, quality_format) if dedup is not None else None
+        if existing:
+            result.update(title=os.path.splitext(os.path.basename(existing))[0], ok=True, filepath=existing, duplicate=True)
+            return result, None
+        with host_slots[urllib.parse.urlparse(url).netloc.lower()]:
+            video_info = yt_dl_extract_info(url)
+            result['title'] = yt_dl_sanitize_filename(video_info.get('title') or url)
+            ydl_opts = yt_dl_build_download_opts(result['title'], quality_format, download_dir_path,
+                                                 [progress_hook] if progress_hook else None, quiet=True, postprocess=False)
+            info = yt_dl_download_from_info(url, video_info, ydl_opts)
+            result['filepath'] = info['requested_downloads'][-1]['filepath']
+            result['ok'] = True
+    except Exception as e:
+        result['error'] = yt_dl_remove_ansi_escape(str(e)).replace('ERROR: ', '', 1)
+    result['elapsed'] = round(time.monotonic() - started, 3)
+    return result, info
+
+def yt_dl_batch_postprocess_item(result, info, quality_format, download_dir_path):
+    """Runs the ffmpeg postprocessors for an already downloaded batch item; never raises."""
+    load_yt_dlp()
+    started = time.monotonic()
+    try:
+        ydl_opts = yt_dl_build_download_opts(result['title'], quality_format, download_dir_path, quiet=True)
+        stage_started = metrics_start()
+        bytes_in = os.path.getsize(result['filepath']) if stage_started is not None else 0
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            result['filepath'] = (ydl.post_process(result['filepath'], info) or {}).get('filepath', result['filepath'])
+        if stage_started is not None:
+            metrics_record('download.postprocess', stage_started, bytes_in, os.path.getsize(result['filepath']))
+    except Exception as e:
+        result['ok'] = False
+        result['error'] = f"Postprocessing failed: {yt_dl_remove_ansi_escape(str(e)).replace('ERROR: ', '', 1)}"
+    result['elapsed'] = round(result['elapsed'] + time.monotonic() - started, 3)
+    return result
+
+def yt_dl_batch_download(urls, quality_format, download_dir_path, workers=None, max_per_host=None, postprocess_workers=None,
+                         on_result=None, progress_hook=None, on_notice=None, dedup=None, stop_event=None):
+    """Downloads many URLs as a two-stage pipeline: network workers download, and a separate pool runs
+    the ffmpeg postprocessing, so encoding overlaps the next downloads. Per-host requests are capped and
+    downloaders block when the postprocessing queue is full. A failed item doesn't stop the others;
+    returns one result dict per URL, in input order (on_result is also called with each as it finishes).
+    progress_hook receives yt-dlp's progress dicts, on_notice (level, message) pairs about the run. Videos
+    already downloaded in this format are skipped with dedup=True (default DEDUP_ENABLED). Once stop_event
+    is set, items that haven't started come back as errors ('Cancelled') and running ones finish."""
+    notice = notice_sink(on_notice)
+    workers = max(1, workers or YT_DL_BATCH_WORKERS)
+    max_per_host = max(1, max_per_host or YT_DL_BATCH_MAX_PER_HOST)
+    pp_jobs = resolve_job_count(YT_DL_POSTPROCESS_WORKERS if postprocess_workers is None else postprocess_workers)
+    pp_slots = threading.BoundedSemaphore(pp_jobs * max(1, YT_DL_POSTPROCESS_QUEUE_SIZE_PER_JOB))
+    os.makedirs(download_dir_path, exist_ok=True)
+    host_slots = {urllib.parse.urlparse(url).netloc.lower(): threading.BoundedSemaphore(max_per_host) for url in urls}
+    notice('info', f"Downloading {len(urls)} item(s) with {workers} download worker(s) "
+                   f"(max {max_per_host} per host) and {pp_jobs} postprocessing worker(s)")
+    dedup_conn = dedup_open_for_run(dedup, notice)
+    results = [None] * len(urls)
+    finish_lock = threading.Lock()
+
+    def finish(index, result):
+        with finish_lock:
+            results[index] = result
+            if dedup_conn is not None and result['ok'] and not result['duplicate']:
+                try:
+                    dedup_record_download(dedup_conn, result['url'], quality_format, result['filepath'])
+                except sqlite3.Error:
+                    pass  # The download itself succeeded; a later run just won't know it can skip it
+            if on_result: on_result(result)
+
+    # Every stage exception becomes an error result, so each URL always gets exactly one result.
+    def postprocess_stage(index, result, info):
+        try:
+            result = yt_dl_batch_postprocess_item(result, info, quality_format, download_dir_path)
+        except Exception as e:
+            result = dict(result, ok=False, error=f"Postprocessing failed: {e}")
+        finally:
+            pp_slots.release()
+        finish(index, result)
+
+    def download_stage(index, url):
+        if stop_event is not None and stop_event.is_set():
+            finish(index, yt_dl_batch_new_result(url, "Cancelled")); return
+        try:
+            result, info = metrics_profiled(url, yt_dl_batch_download_item, url, quality_format, download_dir_path,
+                                            host_slots, progress_hook, dedup_conn)
+        except Exception as e:
+            result, info = yt_dl_batch_new_result(url, str(e)), None
+        if not result['ok'] or result['duplicate']:
+            finish(index, result); return
+        pp_slots.acquire()  # Backpressure: wait here while the CPU stage is saturated
+        try:
+            pp_pool.submit(postprocess_stage, index, result, info)
+        except Exception as e:
+            pp_slots.release()
+            finish(index, dict(result, ok=False, error=f"Postprocessing failed: {e}"))
+
+    # Exiting the download pool first guarantees every postprocessing job is queued before its pool shuts down.
+    with ThreadPoolExecutor(max_workers=pp_jobs) as pp_pool:
+        with ThreadPoolExecutor(max_workers=workers) as download_pool:
+            for index, url in enumerate(urls):
+                download_pool.submit(download_stage, index, url)
+    if dedup_conn is not None: dedup_close(dedup_conn)
+    return results
+
+def yt_dl_batch_printer(total):
+    """Returns an on_result callback that prints a numbered line per finished batch item."""
+    finished = [0]
+
+    def print_result(result):
+        finished[0] += 1
+        mark = f"{Fore.YELLOW}⏭" if result['duplicate'] else f"{Fore.GREEN}✓" if result['ok'] else f"{Fore.RED}✗"
+        print(f"{mark} [{finished[0]}/{total}] {Fore.YELLOW}{result['title'] or result['url']}{Style.RESET_ALL}")
+    return print_result
+
+def yt_dl_print_batch_report(results):
+    ok_count = sum(1 for r in results if r['ok'])
+    duplicate_count = sum(1 for r in results if r['duplicate'])
+    print(f"\n{Fore.CYAN}--- Batch Download Report ---{Style.RESET_ALL}")
+    for r in results:
+        if r['duplicate']:
+            print(f"{Fore.YELLOW}⏭ {r['title']} {Fore.CYAN}(already downloaded){Style.RESET_ALL}")
+        elif r['ok']:
+            print(f"{Fore.GREEN}✓ {r['title']} {Fore.CYAN}({r['elapsed']:.1f}s){Style.RESET_ALL}")
+        else:
+            print(f"{Fore.RED}✗ {r['title'] or r['url']}: {r['error']}{Style.RESET_ALL}")
+    print(f"Total: {len(results)}, Downloaded: {ok_count - duplicate_count}, Already downloaded: {duplicate_count}, "
+          f"Failed: {len(results) - ok_count}")
+
+def run_youtube_downloader():
+    main_script_dir = get_main_script_directory()
+    yt_download_path = os.path.join(main_script_dir, YOUTUBE_DOWNLOAD_SUBDIR_NAME)
+    yt_dl_print_banner()
+    if not load_yt_dlp() or not ensure_directory_exists(yt_download_path): return
+
+    while True:
+        yt_dl_print_quality_menu()
+        choice = input(f"\n{Fore.MAGENTA}✨ Enter quality choice [0-6]: {Style.RESET_ALL}").strip()
+        if choice == '0': break
+        if choice not in ['1','2','3','4','5','6']:
+            print(f"{Fore.YELLOW}⚠ Invalid choice. Using default (best).{Style.RESET_ALL}"); choice = '1'
+        
+        quality_format = yt_dl_get_quality_format(choice)
+        url_input = input(f"\n{Fore.CYAN}🌐 Enter YouTube URL, video ID, playlist URL or batch file path: {Style.RESET_ALL}").strip()
+        q_desc = {'1':'Best','2':'1080p','3':'720p','4':'480p','5':'360p','6':'Audio MP3'}.get(choice)
+        if os.path.isfile(url_input) or yt_dl_is_playlist_url(url_input):
+            urls = yt_dl_collect_batch_urls(url_input)
+            if not urls:
+                print(f"\n{Fore.RED}⚠ No valid URLs found.{Style.RESET_ALL}")
+                continue
+            print(f"\n{Fore.GREEN}⚡ Selected quality: {Fore.CYAN}{q_desc}{Style.RESET_ALL}")
+            yt_dl_print_batch_report(yt_dl_batch_download(urls, quality_format, yt_download_path,
+                                                          on_result=yt_dl_batch_printer(len(urls)), on_notice=print_notice))
+        else:
+            url = yt_dl_normalize_url(url_input)
+            if not url:
+                print(f"\n{Fore.RED}⚠ Invalid YouTube URL or video ID.{Style.RESET_ALL}")
+                continue
+            print(f"{Fore.GREEN}🔗 Using URL: {Fore.CYAN}{url}{Style.RESET_ALL}")
+            print(f"\n{Fore.GREEN}⚡ Selected quality: {Fore.CYAN}{q_desc}{Style.RESET_ALL}")
+            yt_dl_download_video(url, quality_format, yt_download_path)
+
+        if input(f"\n{Fore.MAGENTA}🔄 Download another? (y/n): {Style.RESET_ALL}").lower().strip() != 'y': break
+    print(f"\n{Fore.MAGENTA}✨ Returning to main menu. Downloads in: {Fore.YELLOW}{yt_download_path}{Style.RESET_ALL}\n")
+
+# --- Video to MP3 Converter Section --- #
+def converter_resolve_job_count(max_jobs=None):
+    """Returns the number of parallel conversion jobs to run (at least 1)."""
+    return resolve_job_count(CONVERTER_MAX_JOBS if max_jobs is None else max_jobs)
+
+# --- Video to MP3 Converter: Probing --- #
+_converter_probe_cache = None
+_converter_probe_cache_dirty = False
+_converter_probe_cache_lock = threading.Lock()
+
+def converter_probe_cache_path():
+    return os.path.join(get_main_script_directory(), CONVERTER_PROBE_CACHE_FILE_NAME)
+
+def converter_load_probe_cache():
+    global _converter_probe_cache
+    with _converter_probe_cache_lock:
+        if _converter_probe_cache is None:
+            try:
+                with open(converter_probe_cache_path(), 'r', encoding='utf-8') as f:
+                    _converter_probe_cache = json.load(f)
+            except (OSError, ValueError):
+                _converter_probe_cache = {}
+        return _converter_probe_cache
+
+def converter_save_probe_cache(on_notice=None):
+    """Writes the probe cache if it changed; a failure is reported through on_notice and retried next time."""
+    global _converter_probe_cache_dirty
+    with _converter_probe_cache_lock:
+        if not _converter_probe_cache_dirty: return
+        cache_path = converter_probe_cache_path()
+        try:
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(_converter_probe_cache, f)
+            os.replace(tmp_path, cache_path)
+            _converter_probe_cache_dirty = False
+        except OSError as e:
+            notice_sink(on_notice)('warning', f"Warning: Could not save probe cache: {e}")
+
+def converter_cached_probe(path, st):
+    """Returns the cached probe result for path if it still matches st (size and mtime), else None."""
+    entry = converter_load_probe_cache().get(os.path.abspath(path))
+    if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+        return entry['probe']
+    return None
+
+def converter_probe_media(path):
+    """Returns {'audio_codec', 'audio_bitrate', 'sample_rate', 'channels', 'duration'} for the first audio
+    stream (audio_codec is None when there is none), or None if ffprobe fails.
+    Results are cached on disk by (path, size, mtime)."""
+    global _converter_probe_cache_dirty
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    cached = converter_cached_probe(path, st)
+    if cached is not None:
+        return cached
+    key, cache = os.path.abspath(path), converter_load_probe_cache()
+
+    command = ['ffprobe', '-v', 'error', '-select_streams', 'a:0',
+               '-show_entries', 'stream=codec_name,bit_rate,sample_rate,channels:format=duration',
+               '-of', 'json', path]
+    started = metrics_start()
+    try:
+        result = subprocess.run(command, check=True, capture_output=True, text=True)
+        data = json.loads(result.stdout or '{}')
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+        return None
+    finally:
+        metrics_record('convert.probe', started)
+    stream = (data.get('streams') or [{}])[0]
+
+    def as_number(value, kind):
+        try: return kind(value)
+        except (TypeError, ValueError): return None
+
+    probe = {
+        'audio_codec': stream.get('codec_name'),
+        'audio_bitrate': as_number(stream.get('bit_rate'), int),
+        'sample_rate': as_number(stream.get('sample_rate'), int),
+        'channels': as_number(stream.get('channels'), int),
+        'duration': as_number((data.get('format') or {}).get('duration'), float),
+    }
+    with _converter_probe_cache_lock:
+        cache[key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'probe': probe}
+        _converter_probe_cache_dirty = True
+    return probe
+
+def converter_choose_audio_plan(probe):
+    """Picks the cheapest way to get the audio out: returns (output_extension, ffmpeg_codec_args, description)."""
+    codec = (probe or {}).get('audio_codec')
+    if CONVERTER_STREAM_COPY and codec == 'mp3':
+        return '.mp3', ['-c:a', 'copy'], 'stream copy (mp3)'
+    if CONVERTER_ALLOW_NATIVE_AUDIO and codec in CONVERTER_NATIVE_AUDIO_EXTENSIONS:
+        return CONVERTER_NATIVE_AUDIO_EXTENSIONS[codec], ['-c:a', 'copy'], f"stream copy ({codec})"
+    return '.mp3', ['-acodec', 'libmp3lame', '-ab', AUDIO_BITRATE_CONVERTER], f"encode (mp3 {AUDIO_BITRATE_CONVERTER})"
+
+# --- Video to MP3 Converter: Manifest --- #
+_converter_manifest_lock = threading.Lock()
+
+def converter_manifest_open(output_directory):
+    """Opens (creating if needed) the SQLite conversion manifest kept in the output directory."""
+    conn = sqlite3.connect(os.path.join(output_directory, CONVERTER_MANIFEST_FILE_NAME), check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("""CREATE TABLE IF NOT EXISTS conversions (
+        source TEXT NOT NULL, profile TEXT NOT NULL,
+        source_size INTEGER, source_mtime_ns INTEGER, source_hash TEXT,
+        output TEXT, output_size INTEGER, output_checksum TEXT, converted_at REAL,
+        PRIMARY KEY (source, profile))""")
+    conn.commit()
+    return conn
+
+def converter_manifest_lookup(conn, source, profile):
+    with _converter_manifest_lock:
+        row = conn.execute("SELECT * FROM conversions WHERE source = ? AND profile = ?",
+                           (os.path.abspath(source), profile)).fetchone()
+    return dict(row) if row else None
+
+def converter_manifest_is_current(row, source_stat, source_hash=None):
+    """True if the recorded conversion matches the source and its output is still intact."""
+    if not row or row['source_size'] != source_stat.st_size or row['source_mtime_ns'] != source_stat.st_mtime_ns:
+        return False
+    if source_hash and row['source_hash'] and row['source_hash'] != source_hash:
+        return False
+    try:
+        if os.stat(row['output']).st_size != row['output_size']:
+            return False
+    except OSError:
+        return False
+    return not CONVERTER_MANIFEST_VERIFY_OUTPUTS or compute_file_checksum(row['output']) == row['output_checksum']
+
+def converter_manifest_can_adopt(output_filepath, source_stat, source_probe):
+    """True if an output with no matching manifest row (converted before the manifest existed) can be recorded
+    as-is instead of re-converted: it is non-empty, not older than its source, and ffprobe finds it as long as the
+    source (within CONVERTER_ADOPT_DURATION_TOLERANCE), so a half-written file left by a killed run is redone."""
+    try:
+        st = os.stat(output_filepath)
+    except OSError:
+        return False
+    if st.st_size == 0 or st.st_mtime_ns < source_stat.st_mtime_ns: return False
+    source_duration = (source_probe or {}).get('duration')
+    output_duration = (converter_probe_media(output_filepath) or {}).get('duration')
+    return (source_duration is not None and output_duration is not None
+            and abs(output_duration - source_duration) <= CONVERTER_ADOPT_DURATION_TOLERANCE)
+
+def converter_manifest_record(conn, source, profile, source_stat, source_hash, output_filepath):
+    output_size = os.path.getsize(output_filepath)
+    with _converter_manifest_lock:
+        conn.execute("INSERT OR REPLACE INTO conversions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (os.path.abspath(source), profile, source_stat.st_size, source_stat.st_mtime_ns, source_hash,
+                      output_filepath, output_size, compute_file_checksum(output_filepath), time.time()))
+        conn.commit()
+
+# --- Video to MP3 Converter: Conversion --- #
+_converter_ffmpeg_slots = None
+_converter_ffmpeg_slots_lock = threading.Lock()
+_converter_print_lock = threading.Lock()
+
+def converter_progress_hook(d):
+    """Prints a live progress line for a running ffmpeg job, in the style of yt_dl_progress_hook."""
+    if d['status'] != 'converting': return
+    pct_num = d.get('percent')
+    percent = f"{pct_num:.1f}" if pct_num is not None else 'N/A'
+    speed = f"{d['speed']:.2f}x" if d.get('speed') else 'N/A'
+    eta = time.strftime('%H:%M:%S', time.gmtime(d['eta'])) if d.get('eta') is not None else 'N/A'
+    color = Fore.LIGHTRED_EX if (pct_num or 0) < 30 else Fore.LIGHTYELLOW_EX if pct_num < 70 else Fore.LIGHTGREEN_EX
+    name = d['filename'] if len(d['filename']) <= 30 else d['filename'][:27] + '...'
+    with _converter_print_lock:
+        print(f"\r{Fore.CYAN}{name:<30} {Fore.YELLOW}Progress: {color}{percent:>6}% {Fore.LIGHTMAGENTA_EX}∥ {Fore.LIGHTGREEN_EX}Speed: {Fore.CYAN}{speed:>8} {Fore.LIGHTMAGENTA_EX}∥ {Fore.LIGHTBLUE_EX}ETA: {Fore.LIGHTCYAN_EX}{eta:>8}{Style.RESET_ALL}", end='', flush=True)
+
+def converter_ffmpeg_slots():
+    """Returns the process-wide ffmpeg budget, created once with CONVERTER_MAX_JOBS slots (0 = one per CPU core).
+    Every converter_run_ffmpeg call holds one slot while it runs, so whole-file and segment encodes of all
+    runs in the process (server jobs, watch folders) together never exceed it."""
+    global _converter_ffmpeg_slots
+    with _converter_ffmpeg_slots_lock:
+        if _converter_ffmpeg_slots is None:
+            _converter_ffmpeg_slots = threading.BoundedSemaphore(converter_resolve_job_count())
+        return _converter_ffmpeg_slots
+
+def converter_run_ffmpeg(command, duration=None, progress_hook=None, filename=''):
+    """Runs an ffmpeg command, streaming its machine-readable -progress output to progress_hook.
+    Waits for a slot of the converter_ffmpeg_slots budget first. Only the last CONVERTER_STDERR_TAIL_LINES
+    lines of stderr are kept; raises subprocess.CalledProcessError (with that tail as .stderr) on failure."""
+    with converter_ffmpeg_slots():
+        command = [command[0], '-progress', 'pipe:1', '-nostats'] + command[1:]
+        stderr_tail = collections.deque(maxlen=CONVERTER_STDERR_TAIL_LINES)
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, errors='replace')
+
+        def drain_stderr():
+            for line in process.stderr:
+                stderr_tail.append(line.rstrip('\n'))
+
+        stderr_thread = threading.Thread(target=drain_stderr, daemon=True)
+        stderr_thread.start()
+        fields = {}
+        for line in process.stdout:
+            key, _, value = line.strip().partition('=')
+            if key != 'progress':
+                fields[key] = value; continue
+            if not progress_hook: continue
+            # out_time_ms is (despite its name) in microseconds, like out_time_us.
+            try: out_time = int(fields.get('out_time_us') or fields.get('out_time_ms')) / 1_000_000
+            except (TypeError, ValueError): out_time = None
+            try: speed = float(fields.get('speed', '').rstrip('x'))
+            except ValueError: speed = None
+            percent = eta = None
+            if duration and out_time is not None:
+                percent = min(100.0, max(0.0, out_time * 100 / duration))
+                if speed: eta = max(0.0, (duration - out_time) / speed)
+            progress_hook({'status': 'finished' if value == 'end' else 'converting', 'filename': filename,
+                           'percent': percent, 'speed': speed, 'eta': eta, 'out_time': out_time})
+        process.wait()
+        stderr_thread.join()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, command, stderr="\n".join(stderr_tail))
+        return process.returncode
+
+def converter_plan_outputs(input_filepath, output_directory, probe, profiles=None):
+    """Returns [(profile_key, output_filepath, ffmpeg_codec_args, description)] for one input.
+    Without profiles this is the single cheapest MP3 (or native) output; with profiles, one output per profile."""
+    base_name = os.path.splitext(os.path.basename(input_filepath))[0]
+    if not profiles:
+        output_ext, codec_args, plan_desc = converter_choose_audio_plan(probe)
+        return [('default', os.path.join(output_directory, f"{base_name}{output_ext}"), codec_args, plan_desc)]
+    outputs = []
+    for name in profiles:
+        profile = CONVERTER_PROFILES[name]
+        codec_args = ['-c:a', profile['codec'], '-b:a', profile['bitrate']]
+        outputs.append((name, os.path.join(output_directory, name, f"{base_name}{profile['extension']}"), codec_args, name))
+    return outputs
+
+# MPEG audio Layer III header tables, indexed by the header's version bits (3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5).
+CONVERTER_MP3_BITRATES = {3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+                          2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]}
+CONVERTER_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+def converter_mp3_frame_header(header):
+    """Parses a 4-byte MPEG audio Layer III frame header. Returns (frame_length, sample_rate, samples_per_frame,
+    side_info_length), or None if header isn't one (free-format frames included)."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0: return None
+    version, layer = (header[1] >> 3) & 3, (header[1] >> 1) & 3
+    bitrate_index, rate_index, padding = header[2] >> 4, (header[2] >> 2) & 3, (header[2] >> 1) & 1
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3: return None
+    bitrate = CONVERTER_MP3_BITRATES[3 if version == 3 else 2][bitrate_index] * 1000
+    sample_rate, mono = CONVERTER_MP3_SAMPLE_RATES[version][rate_index], header[3] >> 6 == 3
+    if version == 3:
+        return 144 * bitrate // sample_rate + padding, sample_rate, 1152, 17 if mono else 32
+    return 72 * bitrate // sample_rate + padding, sample_rate, 576, 9 if mono else 17
+
+def converter_mp3_frames(data, start, end):
+    """Returns [(offset, length)] of the consecutive MP3 frames in data[start:end]."""
+    frames = []
+    while True:
+        header = converter_mp3_frame_header(data[start:start + 4])
+        if not header or start + header[0] > end: return frames
+        frames.append((start, header[0]))
+        start += header[0]
+
+def converter_encode_segmented(input_filepath, output_filepath, duration, sample_rate, codec_args, jobs):
+    """Encodes one long input as MP3 segments in parallel, then splices their frames into one gapless MP3.
+    Segment boundaries sit on the MP3 frame grid, and each segment is encoded without the bit reservoir and with
+    CONVERTER_SEGMENT_OVERLAP_FRAMES of real audio around its boundaries, so the frames it keeps stand in for the
+    ones a single-pass encode would have written; only the first segment's encoder delay is kept, and the header
+    takes the last segment's end padding. Raises subprocess.CalledProcessError if an ffmpeg step fails, or
+    ValueError if a segment isn't the expected MP3 stream."""
+    samples_per_frame = 1152 if sample_rate >= 32000 else 576
+    frames_per_segment = max(1, round(CONVERTER_SEGMENT_SECONDS * sample_rate / samples_per_frame))
+    # The last segment runs to the end of the input, so it also takes the remainder (< 1 segment).
+    segment_count = max(1, int(duration * sample_rate / samples_per_frame // frames_per_segment))
+    boundaries = [i * frames_per_segment for i in range(segment_count)] + [None]
+    first_frames = [max(0, boundary - CONVERTER_SEGMENT_OVERLAP_FRAMES) for boundary in boundaries[:-1]]
+    import tempfile
+    work_dir = tempfile.mkdtemp(prefix='.segments-', dir=os.path.dirname(output_filepath))
+    segment_paths = [os.path.join(work_dir, f"segment_{i:05d}.mp3") for i in range(segment_count)]
+
+    def seconds(frames):
+        return f"{frames * samples_per_frame / sample_rate:.6f}"
+
+    def encode_segment(index):
+        # -ss before -i seeks the input; when transcoding ffmpeg decodes up to the exact sample.
+        command = ['ffmpeg', '-nostdin', '-y', '-ss', seconds(first_frames[index])]
+        if boundaries[index + 1] is not None:
+            command += ['-t', seconds(boundaries[index + 1] + CONVERTER_SEGMENT_OVERLAP_FRAMES - first_frames[index])]
+        command += ['-i', input_filepath, '-map', '0:a:0', '-vn', '-sn', '-dn'] + codec_args + ['-reservoir', '0', segment_paths[index]]
+        converter_run_ffmpeg(command)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, segment_count))) as pool:
+            for future in [pool.submit(encode_segment, i) for i in range(segment_count)]:
+                future.result()
+        spliced_path = os.path.join(work_dir, 'spliced.mp3')
+        frame_total = 0
+        with open(spliced_path, 'w+b') as out:
+            for index, segment_path in enumerate(segment_paths):
+                start, end, _ = tag_remover_find_payload_range(segment_path)
+                with open(segment_path, 'rb') as f:
+                    data = f.read(end)
+                frames = converter_mp3_frames(data, start, end)
+                header = converter_mp3_frame_header(data[start:start + 4])
+                # ffmpeg starts the stream with a Xing/Info frame whose LAME extension holds encoder delay and padding.
+                tag_offset = start + 4 + (header[3] if header else 0)
+                if (not header or header[1] != sample_rate or data[tag_offset:tag_offset + 4] not in (b'Xing', b'Info')
+                        or data[tag_offset + 7] & 0x0F != 0x0F):
+                    raise ValueError(f"Segment {index + 1} is not an MP3 stream with an Info header.")
+                audio = frames[1:]
+                keep_from = boundaries[index] - first_frames[index]
+                keep_to = len(audio) if boundaries[index + 1] is None else boundaries[index + 1] - first_frames[index]
+                if keep_from >= keep_to or keep_to > len(audio):
+                    raise ValueError(f"Segment {index + 1} is shorter than expected.")
+                if index == 0:
+                    info_header, info_start, info_offset = bytearray(data[:start + frames[0][1]]), start, tag_offset
+                    out.write(info_header)
+                out.write(data[audio[keep_from][0]:audio[keep_to - 1][0] + audio[keep_to - 1][1]])
+                frame_total += keep_to - keep_from
+                end_padding = int.from_bytes(data[tag_offset + 141:tag_offset + 144], 'big') & 0xFFF
+            # Patch the first segment's header: frame and byte counts of the spliced stream, and the last
+            # segment's end padding (the frame grid is shared, so it is what a single-pass encode would write).
+            byte_total = out.tell() - info_start  # Info frame included, ID3v2 tag not
+            info_header[info_offset + 8:info_offset + 16] = frame_total.to_bytes(4, 'big') + byte_total.to_bytes(4, 'big')
+            delay_padding = int.from_bytes(info_header[info_offset + 141:info_offset + 144], 'big') & ~0xFFF | end_padding
+            info_header[info_offset + 141:info_offset + 144] = delay_padding.to_bytes(3, 'big')
+            out.seek(0)
+            out.write(info_header)
+        # A stream-copy remux writes a fresh Info header (TOC, CRCs) from the patched counts.
+        converter_run_ffmpeg(['ffmpeg', '-nostdin', '-y', '-i', spliced_path, '-map', '0:a:0', '-c', 'copy', output_filepath])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return segment_count
+
+def converter_temp_output_path(output_filepath):
+    """Temp name next to the final output; keeps the extension so ffmpeg picks the right muxer."""
+    directory, name = os.path.split(output_filepath)
+    base_name, ext = os.path.splitext(name)
+    return os.path.join(directory, f".{base_name}.part-{lease_node_id()}-{threading.get_ident()}{ext}")
+
+def converter_convert_single_video(input_filepath, output_directory, profiles=None, segment_jobs=None, progress_hook=None, manifest=None,
+                                   source_stat=None, lease=None):
+    """Converts one video and returns (status, log_lines) instead of printing, so parallel jobs don't interleave.
+    All outputs are written by a single ffmpeg run (one decode, several mapped outputs); long single-MP3
+    encodes are split into parallel segments when CONVERTER_SEGMENT_MIN_DURATION is set.
+    Outputs are written to temp files and renamed into place (only while this node still holds the lease,
+    in shared mode); with a manifest, only new or changed sources (or missing/damaged outputs) are converted, and
+    outputs that exist without a manifest row (converted before the manifest was used) are recorded as they are
+    if they are complete (see converter_manifest_can_adopt).
+    status is 'converted', 'copied' (audio stream copied without re-encoding), 'skipped' or 'error';
+    the third item lists the output files that are now up to date."""
+    filename = os.path.basename(input_filepath)
+    lines = [f"\n{Fore.CYAN}Found video: {Style.BRIGHT}{filename}{Style.RESET_ALL}"]
+    if source_stat is None: source_stat = os.stat(input_filepath)
+    source_hash = compute_file_checksum(input_filepath) if manifest is not None and CONVERTER_MANIFEST_HASH_SOURCES else None
+
+    if manifest is not None and not OVERWRITE_EXISTING_CONVERTED_MP3:
+        # Fast path: every planned output is recorded and intact, so there's no need to probe the source.
+        # Profile outputs are named without probing; the default output's extension needs a cached probe.
+        cached_probe = converter_cached_probe(input_filepath, source_stat)
+        if profiles or cached_probe:
+            planned = [output_filepath for _, output_filepath, _, _ in
+                       converter_plan_outputs(input_filepath, output_directory, cached_probe, profiles)]
+            rows = [converter_manifest_lookup(manifest, input_filepath, key) for key in (profiles or ['default'])]
+            if all(row and row['output'] == output_filepath and converter_manifest_is_current(row, source_stat, source_hash)
+                   for row, output_filepath in zip(rows, planned)):
+                for output_filepath in planned:
+                    lines.append(f"{Fore.YELLOW}Skipping: Output '{os.path.relpath(output_filepath, output_directory)}' is up to date.{Style.RESET_ALL}")
+                return 'skipped', lines, planned
+
+    probe = converter_probe_media(input_filepath)
+    if probe and not probe['audio_codec']:
+        lines.append(f"{Fore.RED}Error converting '{filename}': No audio stream found.{Style.RESET_ALL}")
+        return 'error', lines, []
+
+    pending, outputs = [], []
+    for profile_key, output_filepath, codec_args, plan_desc in converter_plan_outputs(input_filepath, output_directory, probe, profiles):
+        output_filename = os.path.relpath(output_filepath, output_directory)
+        if not OVERWRITE_EXISTING_CONVERTED_MP3:
+            if manifest is None and os.path.exists(output_filepath):
+                lines.append(f"{Fore.YELLOW}Skipping: Output '{output_filename}' already exists.{Style.RESET_ALL}")
+                outputs.append(output_filepath); continue
+            row = converter_manifest_lookup(manifest, input_filepath, profile_key) if manifest is not None else None
+            if row and row['output'] == output_filepath and converter_manifest_is_current(row, source_stat, source_hash):
+                lines.append(f"{Fore.YELLOW}Skipping: Output '{output_filename}' is up to date.{Style.RESET_ALL}")
+                outputs.append(output_filepath); continue
+            if (manifest is not None and (not row or row['output'] != output_filepath)
+                    and converter_manifest_can_adopt(output_filepath, source_stat, probe)):
+                converter_manifest_record(manifest, input_filepath, profile_key, source_stat, source_hash, output_filepath)
+                lines.append(f"{Fore.YELLOW}Skipping: Output '{output_filename}' already exists (now tracked in the manifest).{Style.RESET_ALL}")
+                outputs.append(output_filepath); continue
+            if os.path.exists(output_filepath):
+                lines.append(f"{Fore.YELLOW}Output '{output_filename}' is stale or unverified, re-converting.{Style.RESET_ALL}")
+        pending.append((profile_key, output_filepath, converter_temp_output_path(output_filepath), codec_args))
+        lines.append(f"{Fore.LIGHTBLUE_EX}Converting to: {Style.BRIGHT}{output_filename}{Style.RESET_ALL} [{plan_desc}]...")
+    if not pending:
+        return 'skipped', lines, outputs
+
+    command = ['ffmpeg', '-nostdin', '-i', input_filepath, '-y']
+    for _, output_filepath, temp_filepath, codec_args in pending:
+        os.makedirs(os.path.dirname(output_filepath), exist_ok=True)
+        command += ['-map', '0:a:0', '-vn', '-sn', '-dn'] + codec_args + [temp_filepath]
+
+    duration, sample_rate = (probe or {}).get('duration') or 0, (probe or {}).get('sample_rate')
+    # Segments are cut on the MP3 frame grid, which needs an input rate the encoder keeps as-is.
+    use_segments = (not profiles and CONVERTER_SEGMENT_MIN_DURATION > 0 and duration >= CONVERTER_SEGMENT_MIN_DURATION
+                    and pending[0][3] != ['-c:a', 'copy'] and any(sample_rate in rates for rates in CONVERTER_MP3_SAMPLE_RATES.values()))
+    started = metrics_start()
+    try:
+        if use_segments:
+            segment_count = converter_encode_segmented(input_filepath, pending[0][2], duration, sample_rate, pending[0][3],
+                                                       converter_resolve_job_count(segment_jobs))
+        else:
+            converter_run_ffmpeg(command, duration, progress_hook, filename)
+        lease_check(lease)
+        for profile_key, output_filepath, temp_filepath, _ in pending:
+            os.replace(temp_filepath, output_filepath)
+            outputs.append(output_filepath)
+            if manifest is not None:
+                converter_manifest_record(manifest, input_filepath, profile_key, source_stat, source_hash, output_filepath)
+        if started is not None:
+            metrics_record('convert.encode', started, source_stat.st_size, sum(os.path.getsize(p) for p in outputs))
+        if use_segments:
+            lines.append(f"{Fore.GREEN}Successfully converted ({segment_count} segments encoded in parallel).{Style.RESET_ALL}")
+            return 'converted', lines, outputs
+        lines.append(f"{Fore.GREEN}Successfully converted.{Style.RESET_ALL}")
+        return ('copied' if all(args == ['-c:a', 'copy'] for *_, args in pending) else 'converted'), lines, outputs
+    except subprocess.CalledProcessError as e:
+        lines.append(f"{Fore.RED}Error converting '{filename}': {e.stderr}{Style.RESET_ALL}")
+    except Exception as e:
+        lines.append(f"{Fore.RED}Unexpected error for '{filename}': {e}{Style.RESET_ALL}")
+    finally:
+        for _, _, temp_filepath, _ in pending:
+            if os.path.exists(temp_filepath):
+                try: os.remove(temp_filepath)
+                except OSError: pass
+    return 'error', lines, outputs
+
+def converter_check_setup(profiles=None):
+    """Returns an error message if a conversion can't start (unknown profile, ffmpeg missing), else None."""
+    unknown = [name for name in profiles or [] if name not in CONVERTER_PROFILES]
+    if unknown:
+        return f"Unknown output profile(s): {', '.join(unknown)}. Available: {', '.join(CONVERTER_PROFILES)}"
+    try:
+        subprocess.run(['ffmpeg', '-version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return "ffmpeg not found. Please install ffmpeg and ensure it's in PATH."
+    return None
+
+def converter_convert_videos_to_mp3(input_directory, output_directory, max_jobs=None, profiles=None, use_manifest=None, recursive=None,
+                                    on_result=None, progress_hook=None, on_notice=None, shared=None, dedup=None, stop_event=None):
+    """Converts every video in input_directory. on_result, if given, is called with one event dict per file
+    ({'path', 'status', 'outputs', 'elapsed', 'error', 'log'}, where log holds the file's report lines for a
+    terminal); progress_hook receives the ffmpeg progress dicts and on_notice (level, message) pairs about the
+    run. With shared=True (default LEASE_SHARED_MODE) several hosts can work on the same folders: each file is
+    claimed with a lease first. With dedup=True (default DEDUP_ENABLED; off in shared mode), a video whose media
+    payload matches an earlier one in input_directory is not converted; its event has status 'duplicate' and
+    'duplicate_of'. Once stop_event is set no further files are started.
+    Returns the summary counts, or None if the run couldn't start."""
+    notice = notice_sink(on_notice)
+    jobs = converter_resolve_job_count(max_jobs)
+    if recursive is None: recursive = CONVERTER_RECURSIVE
+    if use_manifest is None: use_manifest = CONVERTER_USE_MANIFEST
+    if shared is None: shared = LEASE_SHARED_MODE
+    use_manifest = use_manifest and not shared  # SQLite can't be shared safely over NFS; outputs are checked on disk
+    setup_error = converter_check_setup(profiles)
+    if setup_error:
+        notice('error', f"Error: {setup_error}")
+        return
+    found_videos = 0
+    counts = {'converted': 0, 'copied': 0, 'skipped': 0, 'duplicate': 0, 'error': 0}
+
+    dedup_conn = dedup_open_for_run(dedup, notice, shared)
+    manifest = None
+    if use_manifest:
+        try:
+            manifest = converter_manifest_open(output_directory)
+        except sqlite3.Error as e:
+            notice('warning', f"Warning: Could not open conversion manifest, falling back to existence checks: {e}")
+
+    # Bounded queue: at most jobs * CONVERTER_QUEUE_SIZE_PER_JOB files are submitted but not yet finished.
+    slots = threading.BoundedSemaphore(jobs * max(1, CONVERTER_QUEUE_SIZE_PER_JOB))
+
+    def timed_convert(input_filepath, target_dir, source_stat):
+        started, stage_started = time.monotonic(), metrics_start()
+        lease = None
+        try:
+            lease = lease_acquire(input_directory, input_filepath) if shared else None
+            if shared and lease is None:
+                return input_filepath, 'skipped', [f"{Fore.YELLOW}Skipping: '{os.path.basename(input_filepath)}' is being "
+                                                   f"processed by another node.{Style.RESET_ALL}"], [], 0.0, None
+            duplicate_of = dedup_check(dedup_conn, input_filepath, input_directory, source_stat)
+            if duplicate_of:
+                return input_filepath, 'duplicate', [f"{Fore.YELLOW}Skipping: '{os.path.basename(input_filepath)}' is a "
+                                                     f"duplicate of '{os.path.relpath(duplicate_of, input_directory)}'."
+                                                     f"{Style.RESET_ALL}"], [], time.monotonic() - started, duplicate_of
+            status, lines, outputs = metrics_profiled(input_filepath, converter_convert_single_video, input_filepath, target_dir,
+                                                      profiles, jobs, progress_hook, manifest, source_stat, lease)
+        except Exception as e:
+            status, lines, outputs = 'error', [f"{Fore.RED}Unexpected error: {e}{Style.RESET_ALL}"], []
+        finally:
+            lease_release(lease)
+        if stage_started is not None and status != 'skipped':
+            metrics_record('convert.file', stage_started, source_stat.st_size, api_output_bytes(outputs))
+        return input_filepath, status, lines, outputs, time.monotonic() - started, None
+
+    def on_done(future):
+        try:
+            input_filepath, status, lines, outputs, elapsed, duplicate_of = future.result()
+            with _converter_print_lock:
+                counts[status] += 1
+                if on_result:
+                    event = {'path': input_filepath, 'status': status, 'outputs': outputs, 'elapsed': round(elapsed, 3),
+                             'error': yt_dl_remove_ansi_escape(lines[-1]).strip() if status == 'error' else None, 'log': lines}
+                    if duplicate_of: event['duplicate_of'] = duplicate_of
+                    on_result(event)
+        finally:
+            slots.release()  # Even if on_result raised, or the scanner would wait forever
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for entry in scan_media_files(input_directory, VIDEO_EXTENSIONS, recursive, on_error=notice_scan_errors(notice)):
+            if stop_event is not None and stop_event.is_set(): break
+            found_videos += 1
+            # Sub-folders of the input are mirrored in the output directory.
+            rel_dir = os.path.relpath(os.path.dirname(entry.path), input_directory)
+            target_dir = output_directory if rel_dir == '.' else os.path.join(output_directory, rel_dir)
+            slots.acquire()
+            pool.submit(timed_convert, entry.path, target_dir, entry.stat()).add_done_callback(on_done)
+    converter_save_probe_cache(notice)
+    if manifest is not None: manifest.close()
+    if dedup_conn is not None: dedup_close(dedup_conn)
+    return dict(counts, found=found_videos)
+
+def converter_present_run(input_directory, output_directory, max_jobs=None, profiles=None, use_manifest=None, recursive=None,
+                          shared=None, emit=None):
+    """Terminal presenter for converter_convert_videos_to_mp3, used by the menu and the CLI: prints the run
+    settings, each file's report with live ffmpeg progress, notices and the summary. emit, if given, also
+    receives every event. Returns the summary counts, or None if the run couldn't start."""
+    print(f"\n{Fore.CYAN}--- Initializing MP3 Conversion ---{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}Input Directory: {Style.BRIGHT}{input_directory}{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}Output Directory: {Style.BRIGHT}{output_directory}{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}Parallel Jobs: {Style.BRIGHT}{converter_resolve_job_count(max_jobs)}{Style.RESET_ALL}")
+    if profiles:
+        print(f"{Fore.YELLOW}Output Profiles: {Style.BRIGHT}{', '.join(profiles)}{Style.RESET_ALL}")
+    if LEASE_SHARED_MODE if shared is None else shared:
+        print(f"{Fore.YELLOW}Shared mode: Node {Style.BRIGHT}{lease_node_id()}{Style.NORMAL}, leases in "
+              f"'{LEASE_DIR_NAME}'{Style.RESET_ALL}")
+
+    def present(event):  # Called under _converter_print_lock, so it never interleaves with a progress line
+        print("\r" + "\n".join(event['log']))
+        if emit: emit(event)
+
+    counts = converter_convert_videos_to_mp3(input_directory, output_directory, max_jobs, profiles, use_manifest, recursive,
+                                             present, converter_progress_hook, print_notice, shared)
+    if counts is None: return None
+    print(f"\n{Fore.CYAN}--- Conversion Summary ---{Style.RESET_ALL}")
+    print(f"Found: {counts['found']}, Converted: {counts['converted'] + counts['copied']} (stream-copied: {counts['copied']}), "
+          f"Skipped: {counts['skipped']}, Duplicates: {counts['duplicate']}, Errors: {counts['error']}")
+    return counts
+
+
+def run_video_to_mp3_converter():
+    main_dir = get_main_script_directory()
+    input_dir = os.path.join(main_dir, VIDEO_CONVERTER_INPUT_DIR_NAME)
+    output_dir = os.path.join(main_dir, VIDEO_CONVERTER_OUTPUT_DIR_NAME)
+
+    print(f"\n{Fore.MAGENTA}--- Video to MP3 Converter ---{Style.RESET_ALL}")
+    if not ensure_directory_exists(input_dir) or not ensure_directory_exists(output_dir):
+        print(f"{Fore.RED}Could not create necessary directories. Aborting.{Style.RESET_ALL}"); return
+    
+    print(f"{Fore.YELLOW}This tool converts videos from '{VIDEO_CONVERTER_INPUT_DIR_NAME}' to MP3s in '{VIDEO_CONVERTER_OUTPUT_DIR_NAME}'.{Style.RESET_ALL}")
+    if input(f"{Fore.CYAN}Proceed? (y/n): {Style.RESET_ALL}").strip().lower() == 'y':
+        default_jobs = converter_resolve_job_count()
+        jobs_input = input(f"{Fore.CYAN}Parallel jobs [{default_jobs}]: {Style.RESET_ALL}").strip()
+        profiles_input = input(f"{Fore.CYAN}Output profiles, comma-separated ({', '.join(CONVERTER_PROFILES)}) "
+                               f"[Enter = single MP3]: {Style.RESET_ALL}").strip()
+        profiles = [p.strip() for p in profiles_input.split(',') if p.strip()]
+        converter_present_run(input_dir, output_dir, int(jobs_input) if jobs_input.isdigit() else default_jobs, profiles)
+    else:
+        print(f"{Fore.YELLOW}Conversion cancelled.{Style.RESET_ALL}")
+    print(f"\n{Fore.MAGENTA}--- Returning to main menu ---{Style.RESET_ALL}")
+
+# --- MP3 Tools: Tag Remover --- #
+TAG_REMOVER_EXTENSIONS = {'.mp3', '.m4a', '.m4b', '.mp4', '.flac', '.ogg', '.oga', '.opus'}
+TAG_REMOVER_MAX_JOBS = 0  # 0 = one worker per CPU core
+TAG_REMOVER_BYTE_RANGE_MIN_SIZE = 16 * 1024 * 1024  # MP3s at least this big are stripped by kernel-side byte-range copy
+
+def tag_remover_sniff_file(file_path):
+    """Identifies the container from its header bytes and which tag blocks are present.
+    Returns (format, tags) where format is 'mp3', 'mp4', 'flac', 'ogg' or 'unknown' and tags lists the
+    tag blocks found without parsing ('id3v2', 'id3v1', 'ape'; container tags are reported by the strippers)."""
+    tags = []
+    with open(file_path, 'rb') as f:
+        header = f.read(12)
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        tail = b''
+        if size >= 160:
+            f.seek(size - 160)
+            tail = f.read(160)
+    if header.startswith(b'ID3'): tags.append('id3v2')
+    if tail[-128:-125] == b'TAG': tags.append('id3v1')
+    # APEv2 footer sits at the very end, or just before an ID3v1 tag.
+    if tail[-32:-24] == b'APETAGEX' or (tail[:8] == b'APETAGEX' and 'id3v1' in tags): tags.append('ape')
+
+    if header[:4] == b'fLaC': file_format = 'flac'
+    elif header[:4] == b'OggS': file_format = 'ogg'
+    elif header[4:8] == b'ftyp': file_format = 'mp4'
+    elif 'id3v2' in tags or (len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0): file_format = 'mp3'
+    else: file_format = 'unknown'
+    return file_format, tags
+
+def tag_remover_find_payload_range(file_path):
+    """Locates the audio payload between leading ID3v2 tag(s) and trailing APEv2/ID3v1 tags.
+    Returns (start, end, removed) where removed lists the tag blocks outside [start, end)."""
+    removed = []
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        start = 0
+        while True:
+            f.seek(start)
+            header = f.read(10)
+            if len(header) < 10 or header[:3] != b'ID3': break
+            size = 0
+            for byte in header[6:10]: size = (size << 7) | (byte & 0x7F)  # syncsafe integer
+            start += 10 + size + (10 if header[5] & 0x10 else 0)  # flag 0x10: footer present
+            if 'id3v2' not in removed: removed.append('id3v2')
+        # Trailing tags can be stacked in either order (ID3v1 after APEv2 is usual, but not guaranteed),
+        # so peel them off the end until neither is found.
+        while True:
+            if end - start >= 128:
+                f.seek(end - 128)
+                if f.read(3) == b'TAG':
+                    end -= 128
+                    if 'id3v1' not in removed: removed.append('id3v1')
+                    continue
+            if end - start >= 32:
+                f.seek(end - 32)
+                footer = f.read(32)
+                if footer[:8] == b'APETAGEX':
+                    tag_size = int.from_bytes(footer[12:16], 'little')
+                    has_header = int.from_bytes(footer[20:24], 'little') & 0x80000000
+                    end -= max(32, tag_size + (32 if has_header else 0))
+                    if 'ape' not in removed: removed.append('ape')
+                    continue
+            break
+    return start, max(start, end), removed
+
+def tag_remover_copy_range(src_file, dst_file, offset, length):
+    """Copies length bytes starting at offset between open files, letting the kernel move the data
+    (copy_file_range, then sendfile) and falling back to mmap slices."""
+    src_fd, dst_fd = src_file.fileno(), dst_file.fileno()
+    copied = 0
+    for copy_func in ('copy_file_range', 'sendfile'):
+        if not hasattr(os, copy_func): continue
+        try:
+            while copied < length:
+                if copy_func == 'copy_file_range':
+                    n = os.copy_file_range(src_fd, dst_fd, length - copied, offset + copied)
+                else:
+                    n = os.sendfile(dst_fd, src_fd, offset + copied, length - copied)
+                if n == 0: break
+                copied += n
+            if copied == length: return
+        except OSError:
+            pass  # Unsupported on this filesystem/kernel; continue where we left off with the next method
+        os.lseek(dst_fd, copied, os.SEEK_SET)
+    if copied < length:
+        import mmap
+        with mmap.mmap(src_fd, 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                step = 8 * 1024 * 1024
+                for pos in range(offset + copied, offset + length, step):
+                    dst_file.write(view[pos:min(pos + step, offset + length)])
+            finally:
+                view.release()
+
+def tag_remover_temp_path(file_path):
+    """A hidden, node- and thread-specific temp name next to file_path (the scanner skips hidden files)."""
+    directory, name = os.path.split(file_path)
+    return os.path.join(directory, f".{name}.strip-{lease_node_id()}-{threading.get_ident()}")
+
+def tag_remover_strip_byte_range(file_path, lease=None):
+    """Strips leading/trailing tag blocks by copying only the audio payload into a temp file that
+    atomically replaces the original (only while this node still holds the lease, if one is given).
+    Returns the list of removed tag blocks."""
+    start, end, removed = tag_remover_find_payload_range(file_path)
+    if not removed: return removed
+    temp_path = tag_remover_temp_path(file_path)
+    try:
+        with open(file_path, 'rb') as src, open(temp_path, 'wb') as dst:
+            tag_remover_copy_range(src, dst, start, end - start)
+        shutil.copymode(file_path, temp_path)
+        lease_check(lease)
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path): os.remove(temp_path)
+    return removed
+
+def tag_remover_has_container_tags(file_path, file_format):
+    """True if an MP4, FLAC or Ogg file carries tags (or FLAC pictures); only reads the file."""
+    if file_format == 'mp4': return bool(MP4(file_path).tags)
+    if file_format == 'flac':
+        audio = FLAC(file_path)
+        return bool(audio.tags or audio.pictures)
+    audio = mutagen.File(file_path)
+    return audio is not None and bool(audio.tags)
+
+def tag_remover_strip_file(file_path, lease=None):
+    """Removes all known tags from one file in a single pass, without printing. With a lease (shared mode) the
+    file is never changed in place: the tags are stripped from a node-specific temp copy, which replaces the
+    original only while this node still holds the lease, so a node that lost it can't overwrite another's work.
+    Returns an outcome dict: path, format, status ('stripped', 'clean' or 'error'), removed (list), error, elapsed."""
+    outcome = {'path': file_path, 'format': 'unknown', 'status': 'clean', 'removed': [], 'error': None, 'elapsed': 0.0}
+    load_mutagen()  # Before the clock starts: the one-time import isn't part of any file's time
+    started, stage_started = time.monotonic(), metrics_start()
+    bytes_in = os.path.getsize(file_path) if stage_started is not None and os.path.exists(file_path) else 0
+    try:
+        sniff_started = metrics_start()
+        file_format, tags = tag_remover_sniff_file(file_path)
+        metrics_record('strip_tags.sniff', sniff_started)
+        outcome['format'] = file_format
+        removed = outcome['removed']
+        if file_format == 'mp3' and tags and os.path.getsize(file_path) >= TAG_REMOVER_BYTE_RANGE_MIN_SIZE:
+            # Large MP3s: copy the untouched audio payload instead of rewriting the file through mutagen.
+            removed.extend(tag_remover_strip_byte_range(file_path, lease))
+            tags = []
+        target = file_path
+        if lease is not None and (tags or (file_format in ('mp4', 'flac', 'ogg')
+                                           and tag_remover_has_container_tags(file_path, file_format))):
+            target = tag_remover_temp_path(file_path)
+            shutil.copyfile(file_path, target); shutil.copymode(file_path, target)
+        try:
+            if 'ape' in tags:
+                mutagen.apev2.delete(target); removed.append('ape')
+                # An ID3v1 tag written before the APEv2 tag is only at the end of the file once that is gone.
+                if 'id3v1' not in tags and 'id3v1' in tag_remover_sniff_file(target)[1]: tags.append('id3v1')
+            if 'id3v2' in tags or 'id3v1' in tags:
+                mutagen.id3.delete(target, delete_v1=True, delete_v2=True)
+                removed.extend(t for t in ('id3v2', 'id3v1') if t in tags)
+            if file_format == 'mp4':
+                audio = MP4(target)
+                if audio.tags:
+                    audio.delete(); removed.append('mp4')
+            elif file_format == 'flac':
+                audio = FLAC(target)
+                if audio.tags or audio.pictures:
+                    audio.clear_pictures(); audio.delete(); removed.append('vorbis comment')
+            elif file_format == 'ogg':
+                audio = mutagen.File(target)
+                if audio is not None and audio.tags:
+                    audio.delete(); removed.append('vorbis comment')
+            if target != file_path and removed:
+                lease_check(lease)
+                os.replace(target, file_path)
+        finally:
+            if target != file_path and os.path.exists(target): os.remove(target)
+        # MP3 files without ID3/APE blocks are left untouched without being parsed.
+        if removed: outcome['status'] = 'stripped'
+        elif file_format == 'unknown':
+            outcome['status'] = 'error'; outcome['error'] = "Unrecognized file format"
+    except Exception as e:
+        outcome['status'] = 'error'
+        outcome['error'] = str(e)
+    outcome['elapsed'] = round(time.monotonic() - started, 3)
+    if stage_started is not None and outcome['status'] == 'stripped':
+        metrics_record('strip_tags.file', stage_started, bytes_in, os.path.getsize(file_path))
+    return outcome
+
+def tag_remover_print_outcome(outcome):
+    name = os.path.basename(outcome['path'])
+    if outcome['status'] == 'duplicate':
+        print(f"{Fore.YELLOW}Skipped (duplicate of {os.path.basename(outcome['duplicate_of'])}): {name}{Style.RESET_ALL}"); return
+    if outcome['status'] == 'stripped':
+        print(f"{Fore.GREEN}Tags removed ({', '.join(outcome['removed'])}) from: {name}{Style.RESET_ALL}")
+    elif outcome['status'] == 'clean':
+        print(f"{Fore.YELLOW}No tags found in: {name}{Style.RESET_ALL}")
+    elif outcome['status'] == 'skipped':
+        print(f"{Fore.YELLOW}Skipped (being processed by another node): {name}{Style.RESET_ALL}")
+    else:
+        print(f"{Fore.RED}Error removing tags from {name}: {outcome['error']}{Style.RESET_ALL}")
+
+def tag_remover_process_directory(directory_path, max_jobs=None, on_result=None, shared=None, dedup=None, on_notice=None,
+                                  stop_event=None):
+    """Strips tags from every supported file under directory_path across a worker pool.
+    on_result, if given, is called with each outcome as it completes, on_notice with (level, message) pairs
+    about the run. With shared=True (default LEASE_SHARED_MODE) files are claimed with leases, and files held by
+    another node are reported as 'skipped'. With dedup=True (default DEDUP_ENABLED; off in shared mode),
+    copies of an earlier file's audio are left alone and reported as 'duplicate' (with 'duplicate_of').
+    Once stop_event is set no further files are started.
+    Returns the list of per-file outcome dicts (see tag_remover_strip_file)."""
+    if shared is None: shared = LEASE_SHARED_MODE
+    notice = notice_sink(on_notice)
+    jobs = resolve_job_count(TAG_REMOVER_MAX_JOBS if max_jobs is None else max_jobs)
+    dedup_conn = dedup_open_for_run(dedup, notice, shared)
+    outcomes = []
+    slots = threading.BoundedSemaphore(jobs * 4)
+    result_lock = threading.Lock()
+
+    def strip(file_path):
+        lease = None
+        try:
+            lease = lease_acquire(directory_path, file_path) if shared else None
+            if shared and lease is None:
+                return {'path': file_path, 'format': 'unknown', 'status': 'skipped', 'removed': [], 'error': None, 'elapsed': 0.0}
+            duplicate_of = dedup_check(dedup_conn, file_path, directory_path)
+            if duplicate_of:
+                return {'path': file_path, 'format': 'unknown', 'status': 'duplicate', 'removed': [], 'error': None,
+                        'elapsed': 0.0, 'duplicate_of': duplicate_of}
+            return metrics_profiled(file_path, tag_remover_strip_file, file_path, lease)
+        except Exception as e:
+            return {'path': file_path, 'format': 'unknown', 'status': 'error', 'removed': [], 'error': str(e), 'elapsed': 0.0}
+        finally:
+            lease_release(lease)
+
+    def on_done(future):
+        try:
+            outcome = future.result()
+            with result_lock:
+                outcomes.append(outcome)
+                if on_result: on_result(outcome)
+        finally:
+            slots.release()  # Even if on_result raised, or the scanner would wait forever
+
+    # Files are handled as the scanner finds them instead of after a full directory walk.
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for entry in scan_media_files(directory_path, TAG_REMOVER_EXTENSIONS, recursive=True, on_error=notice_scan_errors(notice)):
+            if stop_event is not None and stop_event.is_set(): break
+            slots.acquire()
+            pool.submit(strip, entry.path).add_done_callback(on_done)
+    if dedup_conn is not None: dedup_close(dedup_conn)
+    return outcomes
+
+def tag_remover_present_run(directory_path, max_jobs=None, shared=None, emit=None):
+    """Terminal presenter for tag_remover_process_directory, used by the menu and the CLI: prints each outcome,
+    notices and the summary; emit, if given, also receives every outcome. Returns the outcomes."""
+    print(f"\n{Fore.CYAN}Processing directory: {directory_path}{Style.RESET_ALL}")
+
+    def present(outcome):
+        tag_remover_print_outcome(outcome)
+        if emit: emit(outcome)
+
+    outcomes = tag_remover_process_directory(directory_path, max_jobs, present, shared, on_notice=print_notice)
+    if not outcomes:
+        print(f"{Fore.YELLOW}No compatible audio files found.{Style.RESET_ALL}"); return outcomes
+    counts = collections.Counter(o['status'] for o in outcomes)
+    claimed = f", Claimed by other nodes: {counts['skipped']}" if counts['skipped'] else ''
+    duplicates = f", Duplicates: {counts['duplicate']}" if counts['duplicate'] else ''
+    print(f"\n{Fore.GREEN}{len(outcomes)} audio file(s) scanned. Stripped: {counts['stripped']}, "
+          f"Already clean: {counts['clean']}, Errors: {counts['error']}{claimed}{duplicates}{Style.RESET_ALL}")
+    return outcomes
+
+def run_tag_remover():
+    main_dir = get_main_script_directory()
+    target_dir = os.path.join(main_dir, TAG_REMOVER_DIR_NAME)
+    print(f"\n{Fore.MAGENTA}--- MP3 Tag Remover ---{Style.RESET_ALL}")
+    if not ensure_directory_exists(target_dir):
+        print(f"{Fore.RED}Could not create directory '{TAG_REMOVER_DIR_NAME}'. Aborting.{Style.RESET_ALL}"); return
+    print(f"{Fore.YELLOW}This tool will remove ID3/APE/MP4/FLAC/Ogg tags from audio files in '{TAG_REMOVER_DIR_NAME}'.{Style.RESET_ALL}")
+    if input(f"{Fore.CYAN}Proceed? (y/n): {Style.RESET_ALL}").strip().lower() == 'y':
+        tag_remover_present_run(target_dir)
+    else:
+        print(f"{Fore.YELLOW}Tag removal cancelled.{Style.RESET_ALL}")
+
+# --- MP3 Tools: Tag Index --- #
+TAG_INDEX_FILE_NAME = ".tag_index.sqlite"
+TAG_INDEX_FIELDS = ('artist', 'title', 'album', 'duration', 'codec')
+_tag_index_lock = threading.Lock()
+
+def tag_index_open(index_path=None):
+    """Opens (creating if needed) the SQLite tag index; defaults to TAG_INDEX_FILE_NAME next to the script."""
+    if index_path is None: index_path = os.path.join(get_main_script_directory(), TAG_INDEX_FILE_NAME)
+    conn = sqlite3.connect(index_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("""CREATE TABLE IF NOT EXISTS tags (
+        path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, status TEXT, error TEXT,
+        artist TEXT, title TEXT, album TEXT, duration REAL, codec TEXT)""")
+    conn.execute("CREATE INDEX IF NOT EXISTS tags_artist ON tags (artist)")
+    conn.commit()
+    return conn
+
+def tag_index_read_tags(file_path):
+    """Parses a file with mutagen. Returns a record dict whose status is 'ok', 'unparsed' (mutagen
+    doesn't recognise the file) or 'error'."""
+    record = dict.fromkeys(TAG_INDEX_FIELDS)
+    record.update(status='ok', error=None)
+    try:
+        load_mutagen()
+        started = metrics_start()
+        audio = mutagen.File(file_path, easy=True)
+        metrics_record('tags.parse', started)
+        if not audio:
+            record['status'] = 'unparsed'; return record
+        artist_list = audio.get('artist')
+        title_list = audio.get('title')
+        album_list = audio.get('album')
+        if artist_list: record['artist'] = " / ".join(artist_list).strip() or None
+        if title_list: record['title'] = title_list[0].strip() or None
+        if album_list: record['album'] = album_list[0].strip() or None
+        info = getattr(audio, 'info', None)
+        record['duration'] = getattr(info, 'length', None)
+        record['codec'] = getattr(info, 'codec', None) or (audio.mime[0] if audio.mime else None)
+    except Exception as e:
+        record['status'] = 'error'; record['error'] = str(e)
+    return record
+
+def tag_index_get(conn, file_path, stat_result=None):
+    """Returns the indexed record for a file, re-parsing it only if its size or mtime changed."""
+    path = os.path.abspath(file_path)
+    if stat_result is None: stat_result = os.stat(path)
+    with _tag_index_lock:
+        row = conn.execute("SELECT * FROM tags WHERE path = ?", (path,)).fetchone()
+    if row and row['size'] == stat_result.st_size and row['mtime_ns'] == stat_result.st_mtime_ns:
+        return dict(row)
+    record = tag_index_read_tags(path)
+    record.update(path=path, size=stat_result.st_size, mtime_ns=stat_result.st_mtime_ns)
+    with _tag_index_lock:
+        conn.execute("INSERT OR REPLACE INTO tags (path, size, mtime_ns, status, error, artist, title, album, duration, codec) "
+                     "VALUES (:path, :size, :mtime_ns, :status, :error, :artist, :title, :album, :duration, :codec)", record)
+    return record
+
+def tag_index_move(conn, old_path, new_path):
+    """Keeps the index in step with a rename so the file doesn't need re-parsing."""
+    with _tag_index_lock:
+        conn.execute("DELETE FROM tags WHERE path = ?", (os.path.abspath(new_path),))
+        conn.execute("UPDATE tags SET path = ? WHERE path = ?", (os.path.abspath(new_path), os.path.abspath(old_path)))
+
+def tag_index_refresh(conn, directory_path, recursive=True, max_jobs=None):
+    """Brings the index up to date for a folder: parses new/changed files (max_jobs at a time, default one per
+    CPU core) and drops entries for files that no longer exist. Returns [(DirEntry, record)] for the files found."""
+    entries = list(scan_media_files(directory_path, recursive=recursive))
+    with ThreadPoolExecutor(max_workers=resolve_job_count(max_jobs)) as pool:
+        records = list(pool.map(lambda e: tag_index_get(conn, e.path, e.stat()), entries))
+    seen = {record['path'] for record in records}
+    directory = os.path.abspath(directory_path)
+    prefix = os.path.join(directory, '')
+    with _tag_index_lock:
+        stale = [row['path'] for row in conn.execute("SELECT path FROM tags WHERE substr(path, 1, ?) = ?", (len(prefix), prefix))
+                 if row['path'] not in seen and (recursive or os.path.dirname(row['path']) == directory)]
+        conn.executemany("DELETE FROM tags WHERE path = ?", [(p,) for p in stale])
+        conn.commit()
+    return list(zip(entries, records))
+
+def tag_index_query(conn, artist=None, album=None, missing=None, under=None):
+    """Yields indexed records without touching the audio files, e.g.
+    tag_index_query(conn, artist="X") or tag_index_query(conn, missing='title').
+    artist/album match case-insensitively; missing names a field that must be empty; under limits to a folder."""
+    clauses, params = ["status = 'ok'"], []
+    if artist is not None:
+        clauses.append("artist = ? COLLATE NOCASE"); params.append(artist)
+    if album is not None:
+        clauses.append("album = ? COLLATE NOCASE"); params.append(album)
+    if missing is not None:
+        if missing not in TAG_INDEX_FIELDS: raise ValueError(f"Unknown tag field: {missing}")
+        clauses.append(f"({missing} IS NULL OR {missing} = '')")
+    if under is not None:
+        prefix = os.path.join(os.path.abspath(under), '')
+        clauses.append("substr(path, 1, ?) = ?"); params += [len(prefix), prefix]
+    with _tag_index_lock:
+        rows = conn.execute(f"SELECT * FROM tags WHERE {' AND '.join(clauses)} ORDER BY path", params).fetchall()
+    for row in rows:
+        yield dict(row)
+
+# --- MP3 Tools: Renamer from Tag --- #
+RENAMER_MAX_JOBS = 0  # Tag-reading workers; 0 = one per CPU core
+RENAMER_JOURNAL_FILE_NAME = ".rename_journal"
+
+def renamer_sanitize_filename(name):
+    if not isinstance(name, str): return "Unknown"
+    name = re.sub(r'[\\/*?:"<>|\x00-\x1F]', '', name)
+    name = re.sub(r'\s+', ' ', name).strip()
+    while name.endswith('.') or name.endswith(' '): name = name[:-1]
+    return name[:150].strip() or "Unknown"
+
+def renamer_target_base_name(record):
+    """Returns ('Artist - Title', None) for an indexed record, or (None, (reason, is_error)) if it can't be renamed."""
+    if record['status'] == 'error': return None, (f"Error reading metadata: {record['error']}", True)
+    if record['status'] == 'unparsed': return None, ("Mutagen could not parse file.", False)
+    missing = [t for t in ('artist', 'title') if not record[t]]
+    if missing: return None, (f"Missing tag(s): {', '.join(missing)}.", False)
+    return f"{renamer_sanitize_filename(record['artist'])} - {renamer_sanitize_filename(record['title'])}", None
+
+def renamer_build_plan(folder_path, tag_index, max_jobs=None):
+    """Phase 1: refreshes the folder's tag index (re-reading changed files concurrently, dropping deleted ones)
+    and builds the complete rename plan in memory. Collisions are resolved against an in-memory name index
+    by numbering ('Artist - Title (2).mp3'), without stat calls per target. Returns {'moves': [(src, dst)], 'unchanged': [path], 'skipped': [(path, reason, is_error)]}."""
+    indexed = tag_index_refresh(tag_index, folder_path, recursive=False,
+                                max_jobs=RENAMER_MAX_JOBS if max_jobs is None else max_jobs)
+    entries = [entry for entry, _ in indexed]
+
+    plan = {'moves': [], 'unchanged': [], 'skipped': []}
+    wanted = []
+    for entry, record in indexed:
+        base_name, problem = renamer_target_base_name(record)
+        if problem:
+            plan['skipped'].append((entry.path, *problem)); continue
+        extension = os.path.splitext(entry.name)[1]
+        if f"{base_name}{extension}" == entry.name:
+            plan['unchanged'].append(entry.path); continue
+        wanted.append((entry, base_name, extension))
+
+    # Every name in the folder is taken (including folders, links and files the scan ignores), except the
+    # names of files that will move.
+    moving = {os.path.normcase(entry.name) for entry, _, _ in wanted}
+    claimed = {os.path.normcase(name) for name in os.listdir(folder_path)} - moving
+    for entry, base_name, extension in sorted(wanted, key=lambda w: w[0].name):
+        candidate, n = f"{base_name}{extension}", 1
+        while os.path.normcase(candidate) in claimed:
+            n += 1
+            candidate = f"{base_name} ({n}){extension}"
+        claimed.add(os.path.normcase(candidate))
+        plan['moves'].append((entry.path, os.path.join(os.path.dirname(entry.path), candidate)))
+    return plan
+
+def renamer_order_operations(moves):
+    """Orders moves so no rename overwrites a file that still has to move. Chains run back to front and
+    swap cycles (A→B, B→A) are broken by moving one file to a temporary name first."""
+    pending = {os.path.normcase(src): (src, dst) for src, dst in moves}
+    operations = []
+    while pending:
+        ready = [key for key, (src, dst) in pending.items() if os.path.normcase(dst) not in pending or os.path.normcase(dst) == key]
+        if ready:
+            for key in ready:
+                operations.append(pending.pop(key))
+            continue
+        key, (src, dst) = next(iter(pending.items()))
+        temp = os.path.join(os.path.dirname(src), f".rename-tmp-{len(operations)}-{os.path.basename(src)}")
+        operations.append((src, temp))
+        del pending[key]
+        pending[os.path.normcase(temp)] = (temp, dst)
+    return operations
+
+def renamer_move(src, dst):
+    """Renames src to dst, never replacing an existing dst (raises FileExistsError instead). A hard link
+    followed by an unlink makes the check and the move one step; where hard links aren't supported
+    (e.g. FAT, some network shares), dst is checked before the rename."""
+    try:
+        os.link(src, dst, follow_symlinks=False)
+    except FileExistsError:
+        if not os.path.samefile(src, dst): raise
+        os.rename(src, dst)  # Same file under another case on a case-insensitive filesystem
+        return
+    except (OSError, NotImplementedError):
+        if os.path.lexists(dst): raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dst)
+        os.rename(src, dst)
+        return
+    os.unlink(src)
+
+def renamer_journal_path(folder_path, finished=False):
+    return os.path.join(folder_path, RENAMER_JOURNAL_FILE_NAME + ('.last' if finished else ''))
+
+def renamer_read_journal(journal_path):
+    """Returns (operations, done_indexes) from a JSON-lines journal, or (None, None) if there is none."""
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return None, None
+    if not lines: return None, None
+    return [tuple(op) for op in lines[0]['operations']], {line['done'] for line in lines[1:] if 'done' in line}
+
+def renamer_apply_operations(folder_path, operations, tag_index, done=None):
+    """Phase 2: applies the ordered renames under a write-ahead journal. Every operation is recorded
+    before the first rename, and each completed one is appended, so an interrupted run can be resumed
+    (renamer_resume) or reverted (renamer_undo). No rename replaces an existing file; when one fails, the
+    operations that depend on it are skipped. Returns {(src, dst): error or None}."""
+    journal_path = renamer_journal_path(folder_path)
+    done = set(done or ())
+    if not os.path.exists(journal_path):
+        with open(journal_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'started_at': time.time(), 'operations': operations}) + "\n")
+            f.flush(); os.fsync(f.fileno())
+    results, blocked = {}, set()
+    with open(journal_path, 'a', encoding='utf-8') as journal:
+        for index, (src, dst) in enumerate(operations):
+            if index in done: continue
+            # After a failure, src still holds its file and dst never received it: later moves into src,
+            # or onward from dst, would overwrite or lose a file, so they are skipped (and block in turn).
+            if os.path.normcase(src) in blocked or os.path.normcase(dst) in blocked:
+                results[(src, dst)] = "Skipped: an earlier rename it depends on failed."
+                blocked.update((os.path.normcase(src), os.path.normcase(dst))); continue
+            try:
+                if os.path.exists(src) or not os.path.exists(dst):  # Otherwise already moved before a crash
+                    renamer_move(src, dst)
+                tag_index_move(tag_index, src, dst)
+                journal.write(json.dumps({'done': index}) + "\n"); journal.flush()
+                results[(src, dst)] = None
+            except OSError as e:
+                results[(src, dst)] = str(e)
+                blocked.update((os.path.normcase(src), os.path.normcase(dst)))
+    os.replace(journal_path, renamer_journal_path(folder_path, finished=True))
+    tag_index.commit()
+    return results
+
+def renamer_resume(folder_path, tag_index):
+    """Finishes an interrupted rename run, if its journal is still present."""
+    operations, done = renamer_read_journal(renamer_journal_path(folder_path))
+    if operations is None: return None
+    return renamer_apply_operations(folder_path, operations, tag_index, done)
+
+def renamer_undo(folder_path, tag_index=None):
+    """Reverts the last (or an interrupted) rename run using its journal. Returns the number of files restored."""
+    journal_path = renamer_journal_path(folder_path)
+    if not os.path.exists(journal_path): journal_path = renamer_journal_path(folder_path, finished=True)
+    operations, done = renamer_read_journal(journal_path)
+    if operations is None: return 0
+    own_index = tag_index is None
+    if own_index: tag_index = tag_index_open()
+    restored = 0
+    for index in sorted(done, reverse=True):
+        src, dst = operations[index]
+        if os.path.exists(dst) and not os.path.exists(src):
+            renamer_move(dst, src)
+            tag_index_move(tag_index, dst, src)
+            restored += 1
+    os.remove(journal_path)
+    tag_index.commit()
+    if own_index: tag_index.close()
+    return restored
+
+def renamer_process_audio_files(folder_path, dry_run=False, max_jobs=None, on_result=None, on_notice=None):
+    """Renames audio files from their tags (see renamer_build_plan / renamer_apply_operations). on_result,
+    if given, is called with one event dict per file ({'path', 'target', 'status', 'error'}, where status is
+    'renamed', 'planned', 'skipped' or 'error'), on_notice with (level, message) pairs about the run.
+    Returns the plan."""
+    notice = notice_sink(on_notice)
+    def report(path, status, target=None, error=None):
+        if on_result: on_result({'path': path, 'target': target, 'status': status, 'error': error})
+
+    tag_index = tag_index_open()
+    if not dry_run and os.path.exists(renamer_journal_path(folder_path)):
+        notice('warning', "Resuming an interrupted rename run...")
+        renamer_resume(folder_path, tag_index)
+
+    started = metrics_start()
+    plan = renamer_build_plan(folder_path, tag_index, max_jobs)
+    metrics_record('rename.plan', started)
+
+    for path, reason, is_error in plan['skipped']:
+        report(path, 'error' if is_error else 'skipped', error=reason)
+    for path in plan['unchanged']:
+        report(path, 'skipped', path, "Filename already correct.")
+
+    if dry_run:
+        for src, dst in plan['moves']:
+            report(src, 'planned', dst)
+        tag_index.commit(); tag_index.close()
+        return plan
+
+    started = metrics_start()
+    operations = renamer_order_operations(plan['moves'])
+    results = renamer_apply_operations(folder_path, operations, tag_index) if operations else {}
+    metrics_record('rename.apply', started)
+    # Map errors back to the original file, following it through any temporary (cycle-breaking) name.
+    origin, failures = {}, {}
+    for src, dst in operations:
+        origin[dst] = origin.get(src, src)
+        if results.get((src, dst)): failures.setdefault(origin[dst], results[(src, dst)])
+    for src, dst in plan['moves']:
+        error = failures.get(src)
+        if error: report(src, 'error', dst, error)
+        else: report(src, 'renamed', dst)
+
+    tag_index.commit()
+    tag_index.close()
+    return plan
+
+def renamer_present_run(folder_path, dry_run=False, max_jobs=None, emit=None):
+    """Terminal presenter for renamer_process_audio_files, used by the menu and the CLI: prints each file's
+    outcome (or the dry-run plan), notices and the summary; emit, if given, also receives every event.
+    Returns the number of events per status."""
+    print(f"\n{Fore.CYAN}--- Starting Audio File Renaming ---{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}Processing files in: {folder_path}{Style.RESET_ALL}")
+    statuses, renamed, skipped = collections.Counter(), collections.Counter(), collections.Counter()
+    plan_header = f"\n{Fore.CYAN}--- Rename Plan (dry run, nothing renamed) ---{Style.RESET_ALL}"
+
+    def present(event):
+        name, ext_lower = os.path.basename(event['path']), os.path.splitext(event['path'])[1].lower()
+        if event['status'] == 'planned':
+            if not statuses['planned']: print(plan_header)
+            print(f" {Fore.LIGHTBLUE_EX}'{name}' {Fore.WHITE}→ {Fore.GREEN}'{os.path.basename(event['target'])}'{Style.RESET_ALL}")
+        else:
+            print(f"\n{Fore.CYAN}Processing: '{name}'{Style.RESET_ALL}")
+            if event['status'] == 'renamed':
+                print(f" {Fore.GREEN}Renamed to: '{os.path.basename(event['target'])}'{Style.RESET_ALL}")
+                renamed[ext_lower] += 1
+            else:
+                if event['status'] == 'error' and event['target']:
+                    print(f" {Fore.RED}Error renaming: {event['error']}{Style.RESET_ALL}")
+                else:
+                    print(f" {Fore.RED if event['status'] == 'error' else Fore.YELLOW}Skipped: {event['error']}{Style.RESET_ALL}")
+                skipped[ext_lower] += 1
+        statuses[event['status']] += 1
+        if emit: emit(event)
+
+    renamer_process_audio_files(folder_path, dry_run, max_jobs, present, print_notice)
+    if dry_run:
+        if not statuses['planned']: print(plan_header)
+        print(f"{statuses['planned']} file(s) would be renamed, {statuses['skipped'] + statuses['error']} skipped.")
+        return statuses
+    print(f"\n{Fore.CYAN}--- Renaming Summary ---{Style.RESET_ALL}")
+    print(f"M4A Renamed: {renamed['.m4a']}, MP3 Renamed: {renamed['.mp3']}")
+    print(f"M4A Skipped: {skipped['.m4a']}, MP3 Skipped: {skipped['.mp3']}, Errors: {statuses['error']}")
+    return statuses
+
+
+def run_renamer_from_tag():
+    main_dir = get_main_script_directory()
+    target_dir = os.path.join(main_dir, RENAMER_DIR_NAME)
+    print(f"\n{Fore.MAGENTA}--- MP3/M4A Renamer from Tags ---{Style.RESET_ALL}")
+    if not ensure_directory_exists(target_dir):
+        print(f"{Fore.RED}Could not create directory '{RENAMER_DIR_NAME}'. Aborting.{Style.RESET_ALL}"); return
+    print(f"{Fore.YELLOW}This tool renames MP3/M4A files in '{RENAMER_DIR_NAME}' based on their Artist/Title tags.{Style.RESET_ALL}")
+    choice = input(f"{Fore.CYAN}Proceed? (y = rename, d = dry run, u = undo last run, n = cancel): {Style.RESET_ALL}").strip().lower()
+    if choice == 'y':
+        renamer_present_run(target_dir)
+    elif choice == 'd':
+        renamer_present_run(target_dir, dry_run=True)
+    elif choice == 'u':
+        print(f"{Fore.GREEN}{renamer_undo(target_dir)} file(s) restored to their previous names.{Style.RESET_ALL}")
+    else:
+        print(f"{Fore.YELLOW}Renaming cancelled.{Style.RESET_ALL}")
+
+# --- MP3 Tools Submenu --- #
+def display_mp3_tools_menu():
+    print(f"\n{Fore.WHITE}╔════════════════════════════════════════╗")
+    print(f"║ {Fore.YELLOW}{Style.BRIGHT}        🛠️ MP3 Tools 🛠️                {Style.RESET_ALL}{Fore.WHITE}║")
+    print(f"╠════════════════════════════════════════╣")
+    print(f"║ {Fore.CYAN}1. Remove Tags from Audio Files        {Style.RESET_ALL}{Fore.WHITE}║")
+    print(f"║ {Fore.CYAN}2. Rename Audio from Tags              {Style.RESET_ALL}{Fore.WHITE}║")
+    print(f"╠════════════════════════════════════════╣")
+    print(f"║ {Fore.RED}0. Return to Main Menu                 {Style.RESET_ALL}{Fore.WHITE}║")
+    print(f"╚════════════════════════════════════════╝{Style.RESET_ALL}")
+
+def run_mp3_tools_submenu():
+    if not MUTAGEN_AVAILABLE:
+        print(f"\n{Fore.RED}MP3 Tools require the 'mutagen' library. Please install it.{Style.RESET_ALL}")
+        return
+        
+    while True:
+        display_mp3_tools_menu()
+        choice = input(f"\n{Fore.YELLOW}{Style.BRIGHT}✨ Enter MP3 Tool choice [0-2]: {Style.RESET_ALL}").strip()
+        if choice == '1': run_tag_remover()
+        elif choice == '2': run_renamer_from_tag()
+        elif choice == '0': break
+        else: print(f"\n{Fore.RED}❌ Invalid choice.{Style.RESET_ALL}")
+        input(f"\n{Fore.CYAN}Press Enter to return to MP3 Tools menu...{Style.RESET_ALL}")
+        clear_screen()
+
+# --- Watch Folders --- #
+WATCH_SETTLE_SECONDS = 2.0  # A file is processed once its size and mtime have not changed for this long
+WATCH_POLL_INTERVAL_SECONDS = 1.0  # Settle-check interval, and folder rescan interval when polling
+WATCH_USE_INOTIFY = True  # Linux only; other platforms (or inotify failures) fall back to polling
+WATCH_MAX_JOBS = 0  # Files processed at once; 0 = one per CPU core
+_WATCH_INOTIFY_MASK = 0x00000008 | 0x00000080 | 0x00000100  # IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_WATCH_INOTIFY_ISDIR = 0x40000000
+
+def watch_inotify_open():
+    """Returns an inotify watcher dict ({'libc', 'fd', 'dirs'}), or None where inotify isn't available."""
+    if not WATCH_USE_INOTIFY or not sys.platform.startswith('linux'): return None
+    import ctypes, ctypes.util
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    return {'libc': libc, 'fd': fd, 'dirs': {}} if fd >= 0 else None
+
+def watch_inotify_add(watcher, directory_path, recursive=False):
+    """Watches directory_path (and, if recursive, its current sub-folders). Returns False if a watch failed."""
+    ok = True
+    for path in [directory_path] + ([d for d, _, _ in os.walk(directory_path)][1:] if recursive else []):
+        wd = watcher['libc'].inotify_add_watch(watcher['fd'], os.fsencode(path), _WATCH_INOTIFY_MASK)
+        if wd < 0: ok = False
+        else: watcher['dirs'][wd] = path
+    return ok
+
+def watch_inotify_read(watcher, timeout):
+    """Waits up to timeout seconds for events. Returns [(path, is_dir)] for entries created, written or moved in."""
+    import select, struct
+    if not select.select([watcher['fd']], [], [], timeout)[0]: return []
+    try: data = os.read(watcher['fd'], 64 * 1024)
+    except BlockingIOError: return []
+    events, offset = [], 0
+    while offset + 16 <= len(data):
+        wd, mask, _, name_len = struct.unpack_from('iIII', data, offset)
+        name = data[offset + 16:offset + 16 + name_len].rstrip(b'\0')
+        offset += 16 + name_len
+        if name and wd in watcher['dirs']:
+            events.append((os.path.join(watcher['dirs'][wd], os.fsdecode(name)), bool(mask & _WATCH_INOTIFY_ISDIR)))
+    return events
+
+def watch_default_folders(main_dir=None, tools=None):
+    """Returns the folder configs watched by default: the converter, tag remover and renamer input folders."""
+    main_dir = main_dir or get_main_script_directory()
+    folders = [
+        {'tool': 'convert', 'dir': os.path.join(main_dir, VIDEO_CONVERTER_INPUT_DIR_NAME),
+         'output_dir': os.path.join(main_dir, VIDEO_CONVERTER_OUTPUT_DIR_NAME), 'extensions': VIDEO_EXTENSIONS,
+         'recursive': CONVERTER_RECURSIVE},
+        {'tool': 'strip-tags', 'dir': os.path.join(main_dir, TAG_REMOVER_DIR_NAME), 'extensions': TAG_REMOVER_EXTENSIONS,
+         'recursive': True},
+        {'tool': 'rename', 'dir': os.path.join(main_dir, RENAMER_DIR_NAME), 'extensions': None, 'recursive': False},
+    ]
+    return [f for f in folders if not tools or f['tool'] in tools]
+
+def watch_process(folder, path, profiles=None, manifest=None, dedup=None):
+    """Runs the folder's tool on one settled file (the renamer always handles its whole folder). With a duplicate
+    index (dedup), a copy of a file already seen in the folder is only reported.
+    Returns (event dicts ({'tool', 'path', 'status', 'error', 'elapsed'}), paths the tool has dealt with); never raises."""
+    started = time.monotonic()
+    handled_paths = [path]
+    try:
+        duplicate_of = dedup_check(dedup, path, folder['dir']) if folder['tool'] != 'rename' else None
+        if duplicate_of:
+            events = [{'path': path, 'status': 'duplicate', 'error': None, 'duplicate_of': duplicate_of}]
+        elif folder['tool'] == 'convert':
+            rel_dir = os.path.relpath(os.path.dirname(path), folder['dir'])
+            target_dir = folder['output_dir'] if rel_dir == '.' else os.path.join(folder['output_dir'], rel_dir)
+            status, lines, _ = converter_convert_single_video(path, target_dir, profiles, None, None, manifest)
+            converter_save_probe_cache()
+            events = [{'path': path, 'status': status,
+                       'error': yt_dl_remove_ansi_escape(lines[-1]).strip() if status == 'error' else None}]
+        elif folder['tool'] == 'strip-tags':
+            outcome = tag_remover_strip_file(path)
+            events = [{'path': path, 'status': outcome['status'], 'error': outcome['error']}]
+        else:
+            events = []
+            plan = renamer_process_audio_files(folder['dir'], on_result=events.append)
+            handled_paths = [dst for _, dst in plan['moves']] + plan['unchanged'] + [p for p, _, _ in plan['skipped']]
+            events = [{'path': e['path'], 'status': e['status'], 'error': e['error'], 'target': e['target']}
+                      for e in events if e['status'] in ('renamed', 'error')]
+    except Exception as e:
+        events = [{'path': path, 'status': 'error', 'error': str(e)}]
+    elapsed = round(time.monotonic() - started, 3)
+    return [dict(event, tool=folder['tool'], elapsed=elapsed) for event in events], handled_paths
+
+def watch_print_event(event):
+    name = os.path.basename(event['path'])
+    color = Fore.RED if event['status'] == 'error' else Fore.YELLOW if event['status'] == 'duplicate' else Fore.GREEN
+    detail = (f": {event['error']}" if event.get('error') else f" → {os.path.basename(event['target'])}" if event.get('target')
+              else f" = {os.path.basename(event['duplicate_of'])}" if event.get('duplicate_of') else '')
+    print(f"{Fore.CYAN}[{time.strftime('%H:%M:%S')}] {Fore.YELLOW}{event['tool']:<10} {color}{event['status']:<9}"
+          f"{Style.RESET_ALL} {name}{detail}")
+
+def watch_folders(folders=None, max_jobs=None, profiles=None, use_inotify=None, stop_event=None, on_result=None, on_notice=None):
+    """Watches the drop folders and processes files as they arrive, until stop_event is set or Ctrl+C.
+    A file is handed to its folder's tool once its size and mtime have been stable for WATCH_SETTLE_SECONDS.
+    Existing files are reconciled at startup (converter outputs that are up to date are skipped through the
+    manifest), so restarting the daemon never loses work. Uses inotify on Linux and polling elsewhere.
+    on_result receives one event per processed file, on_notice (level, message) pairs about the run."""
+    notice = notice_sink(on_notice)
+    folders = folders or watch_default_folders()
+    if any(f['tool'] != 'convert' for f in folders) and not load_mutagen():
+        notice('error', "Tag removal and renaming require the 'mutagen' library. Please install it.")
+        return False
+    manifest = None
+    for folder in folders:
+        os.makedirs(folder['dir'], exist_ok=True)
+        if folder['tool'] == 'convert':
+            setup_error = converter_check_setup(profiles)
+            if setup_error:
+                notice('error', f"Error: {setup_error}"); return False
+            os.makedirs(folder['output_dir'], exist_ok=True)
+            if CONVERTER_USE_MANIFEST and manifest is None: manifest = converter_manifest_open(folder['output_dir'])
+    dedup = dedup_open_for_run(None, notice) if any(f['tool'] != 'rename' for f in folders) else None
+
+    watcher = watch_inotify_open() if use_inotify is not False else None
+    if watcher and not all(watch_inotify_add(watcher, f['dir'], f['recursive']) for f in folders):
+        os.close(watcher['fd']); watcher = None
+    notice('info', f"--- Watching {len(folders)} folder(s) with {'inotify' if watcher else 'polling'} (Ctrl+C to stop) ---")
+    for folder in folders:
+        notice('info', f"{folder['tool']:<10} {folder['dir']}")
+
+    def folder_for(path):
+        for folder in folders:
+            rel = os.path.relpath(path, folder['dir'])
+            if rel.startswith('..') or (os.sep in rel and not folder['recursive']): continue
+            if any(fnmatch.fnmatch(part, p) for part in rel.split(os.sep) for p in SCAN_IGNORE_PATTERNS): return None
+            if folder['extensions'] is None or os.path.splitext(path)[1].lower() in folder['extensions']: return folder
+        return None
+
+    def signature(path):
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+
+    pending, handled, in_flight = {}, {}, set()  # pending: path -> (signature, time it was last seen changing)
+    completed, completed_lock = [], threading.Lock()
+
+    def consider(path):
+        if path in pending or not folder_for(path): return
+        try: sig = signature(path)
+        except OSError: return
+        if handled.get(path) != sig: pending[path] = (sig, time.monotonic())
+
+    scan_error = notice_scan_errors(notice)
+
+    def reconcile(folder):
+        for entry in scan_media_files(folder['dir'], folder['extensions'], folder['recursive'], on_error=scan_error):
+            consider(entry.path)
+
+    def finish(key, future):
+        with completed_lock: completed.append((key, *future.result()))
+
+    def collect_completed():
+        with completed_lock:
+            done = completed[:]; del completed[:]
+        for key, events, paths in done:
+            in_flight.discard(key)
+            # Record the state after processing, so the tool's own writes don't trigger another run.
+            for path in paths:
+                try: handled[path] = signature(path)
+                except OSError: handled.pop(path, None)
+            for event in events:
+                if on_result: on_result(event)
+
+    for folder in folders: reconcile(folder)
+    jobs = resolve_job_count(WATCH_MAX_JOBS if max_jobs is None else max_jobs)
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            while not (stop_event and stop_event.is_set()):
+                if watcher:
+                    for path, is_dir in watch_inotify_read(watcher, WATCH_POLL_INTERVAL_SECONDS):
+                        if not is_dir:
+                            consider(path); continue
+                        # A new sub-folder of a recursive folder: watch it and pick up anything already inside.
+                        for folder in folders:
+                            if folder['recursive'] and not os.path.relpath(path, folder['dir']).startswith('..'):
+                                watch_inotify_add(watcher, path, recursive=True)
+                                for entry in scan_media_files(path, folder['extensions'], recursive=True, on_error=scan_error):
+                                    consider(entry.path)
+                else:
+                    time.sleep(WATCH_POLL_INTERVAL_SECONDS)
+                    for folder in folders: reconcile(folder)
+                collect_completed()
+                if dedup is not None: dedup_flush(dedup)  # Don't hold the index's write lock while idle
+                now = time.monotonic()
+                for path, (sig, since) in list(pending.items()):
+                    folder = folder_for(path)
+                    key = folder['dir'] if folder['tool'] == 'rename' else path
+                    try: current = signature(path)
+                    except OSError:
+                        del pending[path]; continue
+                    if current != sig:
+                        pending[path] = (current, now); continue  # Still being written
+                    if now - since < WATCH_SETTLE_SECONDS or key in in_flight: continue
+                    del pending[path]
+                    if handled.get(path) == sig: continue
+                    in_flight.add(key)
+                    pool.submit(watch_process, folder, path, profiles, manifest, dedup).add_done_callback(
+                        lambda future, key=key: finish(key, future))
+            notice('warning', "Stopping, waiting for running jobs...")
+    except KeyboardInterrupt:
+        notice('warning', "Stopped.")
+    collect_completed()
+    if watcher: os.close(watcher['fd'])
+    if manifest is not None: manifest.close()
+    if dedup is not None: dedup_close(dedup)
+    return True
+
+def run_watch_folders():
+    print(f"\n{Fore.MAGENTA}--- Watch Folders ---{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}New files in '{VIDEO_CONVERTER_INPUT_DIR_NAME}', '{TAG_REMOVER_DIR_NAME}' and '{RENAMER_DIR_NAME}' "
+          f"are processed automatically as soon as they have finished copying.{Style.RESET_ALL}")
+    if input(f"{Fore.CYAN}Start watching? (y/n): {Style.RESET_ALL}").strip().lower() == 'y':
+        watch_folders(on_result=watch_print_event, on_notice=print_notice)
+    else:
+        print(f"{Fore.YELLOW}Watching cancelled.{Style.RESET_ALL}")
+
+# --- Library API --- #
+# In-process entry points for embedding the tools in other programs. Nothing is printed: each processed
+# file is yielded as a FileResult as soon as it finishes, e.g.
+#   for result in api_convert_videos("in", "out", profiles=["mp3-192"]): print(result.path, result.status)
+API_QUEUE_SIZE = 64  # Results buffered for a consumer that falls behind; the tool run waits when the buffer is full
+FileResult = collections.namedtuple('FileResult', ['tool', 'path', 'status', 'outputs', 'bytes', 'elapsed', 'error', 'details'])
+
+def api_output_bytes(paths):
+    """Total size of the given files, ignoring any that no longer exist."""
+    total = 0
+    for path in paths:
+        try: total += os.path.getsize(path)
+        except OSError: pass
+    return total
+
+def api_stream_results(run, to_result):
+    """Calls run(on_result, stop_event) on a worker thread and yields to_result(event) for every event as it arrives.
+    At most API_QUEUE_SIZE events wait for the consumer; a run that gets further ahead blocks in on_result.
+    Closing the generator early (break, close() or garbage collection) sets stop_event, so the run starts no
+    further files, and returns once the files already started have finished.
+    An exception raised by run is re-raised in the consumer once the events before it have been yielded."""
+    import queue  # Only needed by library callers
+    events, stop, finished, failure = queue.Queue(maxsize=max(1, API_QUEUE_SIZE)), threading.Event(), object(), []
+
+    def put(item):
+        while not stop.is_set():  # Once the consumer is gone, events are dropped instead of blocking the run
+            try:
+                events.put(item, timeout=0.1); return
+            except queue.Full:
+                pass
+
+    def worker():
+        try: run(put, stop)
+        except BaseException as e: failure.append(e)
+        finally: put(finished)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    try:
+        while True:
+            event = events.get()
+            if event is finished: break
+            yield to_result(event)
+    finally:
+        stop.set()
+        thread.join()
+    if failure: raise failure[0]
+
+def api_convert_videos(input_directory, output_directory, max_jobs=None, profiles=None, use_manifest=None, recursive=None,
+                       progress=None):
+    """Converts every video in input_directory and yields a FileResult per file (status 'converted', 'copied',
+    'skipped', 'duplicate' (details holds duplicate_of) or 'error'). progress, if given, is called from worker threads with ffmpeg progress dicts
+    (filename, percent, speed, eta). Raises RuntimeError right away if the conversion can't start."""
+    setup_error = converter_check_setup(profiles)
+    if setup_error: raise RuntimeError(setup_error)
+    os.makedirs(output_directory, exist_ok=True)
+
+    def run(on_result, stop_event):
+        converter_convert_videos_to_mp3(input_directory, output_directory, max_jobs, profiles, use_manifest, recursive,
+                                        on_result, progress, stop_event=stop_event)
+    return api_stream_results(run, lambda e: FileResult('convert', e['path'], e['status'], e['outputs'],
+                                                        api_output_bytes(e['outputs']), e['elapsed'], e['error'],
+                                                        {'duplicate_of': e['duplicate_of']} if 'duplicate_of' in e else {}))
+
+def api_strip_tags(directory_path, max_jobs=None):
+    """Strips tags from every supported file under directory_path and yields a FileResult per file
+    (status 'stripped', 'clean', 'duplicate' or 'error'; details holds the detected format, removed tag types
+    and, for duplicates, duplicate_of)."""
+    if not load_mutagen(): raise RuntimeError("Tag removal requires the 'mutagen' library.")
+    return api_stream_results(
+        lambda on_result, stop_event: tag_remover_process_directory(directory_path, max_jobs, on_result, stop_event=stop_event),
+        lambda o: FileResult('strip-tags', o['path'], o['status'], [o['path']] if o['status'] == 'stripped' else [],
+                             api_output_bytes([o['path']]), o['elapsed'], o['error'],
+                             {'format': o['format'], 'removed': o['removed'], **({'duplicate_of': o['duplicate_of']}
+                                                                                if 'duplicate_of' in o else {})}))
+
+def api_rename_audio_files(folder_path, dry_run=False, max_jobs=None):
+    """Renames audio files from their tags and yields a FileResult per file (status 'renamed', 'planned',
+    'skipped' or 'error'; outputs holds the new name). Renaming works on the whole folder in two phases,
+    so elapsed is None, and closing the generator early still lets the run finish."""
+    if not MUTAGEN_AVAILABLE: raise RuntimeError("Renaming requires the 'mutagen' library.")
+    return api_stream_results(
+        lambda on_result, stop_event: renamer_process_audio_files(folder_path, dry_run, max_jobs, on_result),
+        lambda e: FileResult('rename', e['path'], e['status'], [e['target']] if e['target'] else [],
+                             api_output_bytes([e['target'] if e['status'] == 'renamed' else e['path']]),
+                             None, e['error'], {}))
+
+def api_download(urls, download_dir_path, quality_format=None, workers=None, max_per_host=None, postprocess_workers=None,
+                 progress=None):
+    """Downloads the given video URLs and yields a FileResult per URL (status 'downloaded', 'duplicate' (already
+    downloaded in this format, outputs holds the earlier file) or 'error';
+    details holds the title). quality_format defaults to the best available video.
+    progress, if given, is called from worker threads with yt-dlp progress dicts."""
+    if importlib.util.find_spec('yt_dlp') is None or not load_yt_dlp():
+        raise RuntimeError("Downloading requires the 'yt_dlp' library.")
+    quality_format = quality_format or yt_dl_get_quality_format('1')
+    os.makedirs(download_dir_path, exist_ok=True)
+
+    def run(on_result, stop_event):
+        yt_dl_batch_download(list(urls), quality_format, download_dir_path, workers, max_per_host, postprocess_workers,
+                             on_result, progress, stop_event=stop_event)
+    return api_stream_results(run, lambda r: FileResult(
+        'download', r['url'], 'duplicate' if r['duplicate'] else 'downloaded' if r['ok'] else 'error',
+        [r['filepath']] if r['ok'] and r['filepath'] else [],
+        api_output_bytes([r['filepath']] if r['ok'] and r['filepath'] else []), r['elapsed'], r['error'], {'title': r['title']}))
+
+# --- Non-interactive Command Line --- #
+CLI_QUALITY_CHOICES = {'best': '1', '1080p': '2', '720p': '3', '480p': '4', '360p': '5', 'audio': '6'}
+
+def cli_build_parser():
+    import argparse  # Only needed for non-interactive runs; keeps it off the menu's startup path
+    metrics = argparse.ArgumentParser(add_help=False)
+    metrics.add_argument('--metrics', action='store_true', help="Print per-stage timings with histograms at the end.")
+    metrics.add_argument('--metrics-json', metavar='PATH', help="Write per-stage timings to a JSON report.")
+    metrics.add_argument('--metrics-prom', metavar='PATH', help="Write a Prometheus textfile-collector file (*.prom).")
+    metrics.add_argument('--profile', choices=['cprofile', 'tracemalloc'], help="Profile every job (file or download).")
+    metrics.add_argument('--profile-dir', help=f"Where cProfile output goes (default {METRICS_PROFILE_DIR}).")
+    common = argparse.ArgumentParser(add_help=False, parents=[metrics])
+    common.add_argument('--jsonl', action='store_true',
+                        help="Stream one JSON event per file to stdout; human-readable output goes to stderr.")
+    common.add_argument('-j', '--jobs', type=int, help="Parallel workers (default: tool setting / CPU count).")
+
+    parser = argparse.ArgumentParser(description="Simple Media Tools. Run without arguments for the interactive menu.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    download = subparsers.add_parser('download', parents=[common], help="Download YouTube videos or audio.")
+    download.add_argument('urls', nargs='*', help="YouTube URLs, video IDs, playlist URLs or batch files.")
+    download.add_argument('-f', '--batch-file', action='append', default=[], help="Text file with one URL/ID per line.")
+    download.add_argument('-q', '--quality', choices=list(CLI_QUALITY_CHOICES), default='best')
+    download.add_argument('-o', '--output-dir', help=f"Default: {YOUTUBE_DOWNLOAD_SUBDIR_NAME} next to the script.")
+    download.add_argument('--per-host', type=int, help="Maximum concurrent downloads per host.")
+    download.add_argument('--postprocess-jobs', type=int, help="ffmpeg postprocessing workers.")
+    download.add_argument('--dedup', action='store_true', default=None, help="Skip videos already downloaded in this format.")
+    download.add_argument('--no-dedup', dest='dedup', action='store_false', help="Download again even if a video is already on disk.")
+
+    convert = subparsers.add_parser('convert', parents=[common], help="Convert videos to MP3 (or other profiles).")
+    convert.add_argument('-i', '--input-dir', help=f"Default: {VIDEO_CONVERTER_INPUT_DIR_NAME} next to the script.")
+    convert.add_argument('-o', '--output-dir', help=f"Default: {VIDEO_CONVERTER_OUTPUT_DIR_NAME} next to the script.")
+    convert.add_argument('-p', '--profiles', help=f"Comma-separated output profiles ({', '.join(CONVERTER_PROFILES)}).")
+    convert.add_argument('-b', '--bitrate', help=f"MP3 bitrate when no profiles are given (default {AUDIO_BITRATE_CONVERTER}).")
+    convert.add_argument('-r', '--recursive', action='store_true', help="Include videos in sub-folders.")
+    convert.add_argument('--overwrite', action='store_true', help="Re-convert even if outputs are up to date.")
+    convert.add_argument('--no-manifest', action='store_true', help="Skip outputs that exist instead of using the manifest.")
+    convert.add_argument('--shared', action='store_true', help="Coordinate with other hosts on the same folders via lease files.")
+    convert.add_argument('--dedup', action='store_true', default=None, help="Skip videos that duplicate an earlier one.")
+    convert.add_argument('--no-dedup', dest='dedup', action='store_false', help="Also convert videos that duplicate an earlier one.")
+
+    strip_tags = subparsers.add_parser('strip-tags', parents=[common], help="Remove tags from audio files.")
+    strip_tags.add_argument('-d', '--dir', help=f"Default: {TAG_REMOVER_DIR_NAME} next to the script.")
+    strip_tags.add_argument('--shared', action='store_true', help="Coordinate with other hosts on the same folder via lease files.")
+    strip_tags.add_argument('--dedup', action='store_true', default=None, help="Leave copies of an earlier file alone.")
+    strip_tags.add_argument('--no-dedup', dest='dedup', action='store_false', help="Also process files that duplicate an earlier one.")
+
+    rename = subparsers.add_parser('rename', parents=[common], help="Rename audio files from their Artist/Title tags.")
+    rename.add_argument('-d', '--dir', help=f"Default: {RENAMER_DIR_NAME} next to the script.")
+    rename.add_argument('-n', '--dry-run', action='store_true', help="Only print the rename plan.")
+    rename.add_argument('--undo', action='store_true', help="Revert the last rename run.")
+
+    watch = subparsers.add_parser('watch', parents=[common], help="Process files dropped into the input folders until stopped.")
+    watch.add_argument('-b', '--base-dir', help="Folder containing the input/output folders (default: next to the script).")
+    watch.add_argument('-t', '--tools', help="Comma-separated tools to run: convert, strip-tags, rename (default: all).")
+    watch.add_argument('-p', '--profiles', help="Converter output profiles, as for 'convert'.")
+    watch.add_argument('--settle', type=float, help=f"Seconds a file must stay unchanged (default {WATCH_SETTLE_SECONDS}).")
+    watch.add_argument('--poll', action='store_true', help="Poll the folders instead of using inotify.")
+    watch.add_argument('--dedup', action='store_true', default=None, help="Only report copies of a file already seen.")
+    watch.add_argument('--no-dedup', dest='dedup', action='store_false', help="Also process files that duplicate an earlier one.")
+
+    dedup = subparsers.add_parser('dedup', parents=[common], help="List files with identical media (tags ignored).")
+    dedup.add_argument('dirs', nargs='*', help="Folders to check (default: the input and download folders next to the script).")
+    dedup.add_argument('--link', action='store_true', help="Replace byte-identical copies with hard links to the first copy.")
+
+    benchmark = subparsers.add_parser('benchmark', help="Run the offline benchmark suite on synthetic corpora.")
+    benchmark.add_argument('-s', '--scale', choices=list(BENCHMARK_SCALES), default='1k', help="Audio corpus size.")
+    benchmark.add_argument('--scenarios', help=f"Comma-separated scenarios (default: {', '.join(BENCHMARK_SCENARIOS)}).")
+    benchmark.add_argument('--runs', type=int, help=f"Runs per scenario (default {BENCHMARK_RUNS}).")
+    benchmark.add_argument('-j', '--jobs', type=int, help="Parallel workers passed to each tool.")
+    benchmark.add_argument('--dir', help=f"Corpus/work folder (default: {BENCHMARK_DIR_NAME} next to the script).")
+    benchmark.add_argument('--baseline', help="Compare against this baseline file; exit code 1 on regressions.")
+    benchmark.add_argument('--save-baseline', help="Write the results as a new baseline file.")
+    for internal in ('--scenario', '--corpus', '--work', '--base-url'):  # Used for the per-run subprocesses
+        benchmark.add_argument(internal, help=argparse.SUPPRESS)
+
+    serve = subparsers.add_parser('serve', parents=[metrics], help="Run the local HTTP/JSON job server.")
+    serve.add_argument('--host', default=SERVER_HOST, help=f"Address to bind (default {SERVER_HOST}).")
+    serve.add_argument('--port', type=int, default=SERVER_PORT)
+    serve.add_argument('--network-workers', type=int, help=f"Download jobs at once (default {SERVER_NETWORK_WORKERS}).")
+    serve.add_argument('--cpu-workers', type=int, help=f"Convert/tag/rename jobs at once (default {SERVER_CPU_WORKERS}).")
+    serve.add_argument('--queue-size', type=int, help=f"Queued jobs per pool (default {SERVER_QUEUE_SIZE}).")
+    serve.add_argument('--base-dir', action='append', help="Folder jobs may read and write (repeatable; default: next to the script).")
+    return parser
+
+def cli_make_event_emitter(tool, stream):
+    """Returns a thread-safe function writing one JSON line per event, stamped with the tool and run time."""
+    started = time.monotonic()
+    lock = threading.Lock()
+
+    def emit(event, kind='file'):
+        record = {'event': kind, 'tool': tool, 't': round(time.monotonic() - started, 3)}
+        record.update((key, value) for key, value in event.items() if key != 'log')  # Terminal lines, printed on stderr
+        with lock:
+            stream.write(json.dumps(record, default=str) + "\n")
+            stream.flush()
+    return emit
+
+def cli_download(args, emit):
+    if not load_yt_dlp(): return None, False
+    output_dir = args.output_dir or os.path.join(get_main_script_directory(), YOUTUBE_DOWNLOAD_SUBDIR_NAME)
+    urls, seen = [], set()
+    for source in args.urls + args.batch_file:
+        for url in yt_dl_collect_batch_urls(source):
+            key = yt_dl_get_video_id(url) or url
+            if key not in seen:
+                seen.add(key); urls.append(url)
+    if not urls:
+        print(f"{Fore.RED}⚠ No valid URLs given.{Style.RESET_ALL}"); return None, False
+    quality_format = yt_dl_get_quality_format(CLI_QUALITY_CHOICES[args.quality])
+    print_result = yt_dl_batch_printer(len(urls))
+
+    def present(result):
+        print_result(result)
+        if emit: emit(result)
+
+    results = yt_dl_batch_download(urls, quality_format, output_dir, args.jobs, args.per_host, args.postprocess_jobs,
+                                   present, on_notice=print_notice)
+    yt_dl_print_batch_report(results)
+    failed = sum(1 for r in results if not r['ok'])
+    duplicates = sum(1 for r in results if r['duplicate'])
+    return {'total': len(results), 'downloaded': len(results) - failed - duplicates, 'duplicate': duplicates,
+            'failed': failed}, failed == 0
+
+def cli_convert(args, emit):
+    global AUDIO_BITRATE_CONVERTER, OVERWRITE_EXISTING_CONVERTED_MP3, CONVERTER_MAX_JOBS
+    main_dir = get_main_script_directory()
+    input_dir = args.input_dir or os.path.join(main_dir, VIDEO_CONVERTER_INPUT_DIR_NAME)
+    output_dir = args.output_dir or os.path.join(main_dir, VIDEO_CONVERTER_OUTPUT_DIR_NAME)
+    if not os.path.isdir(input_dir) or not ensure_directory_exists(output_dir):
+        print(f"{Fore.RED}Input directory '{input_dir}' not found or output directory unusable.{Style.RESET_ALL}")
+        return None, False
+    if args.bitrate: AUDIO_BITRATE_CONVERTER = args.bitrate
+    if args.overwrite: OVERWRITE_EXISTING_CONVERTED_MP3 = True
+    if args.jobs: CONVERTER_MAX_JOBS = args.jobs  # Also sizes the process-wide ffmpeg budget
+    profiles = [p.strip() for p in (args.profiles or '').split(',') if p.strip()]
+    counts = converter_present_run(input_dir, output_dir, args.jobs, profiles, not args.no_manifest, args.recursive or None,
+                                   args.shared or None, emit)
+    return counts, counts is not None and counts['error'] == 0
+
+def cli_strip_tags(args, emit):
+    if not load_mutagen():
+        print(f"{Fore.RED}Tag removal requires the 'mutagen' library. Please install it.{Style.RESET_ALL}")
+        return None, False
+    target_dir = args.dir or os.path.join(get_main_script_directory(), TAG_REMOVER_DIR_NAME)
+    if not os.path.isdir(target_dir):
+        print(f"{Fore.RED}Directory '{target_dir}' not found.{Style.RESET_ALL}"); return None, False
+    outcomes = tag_remover_present_run(target_dir, args.jobs, args.shared or None, emit)
+    counts = dict(collections.Counter(o['status'] for o in outcomes))
+    return counts, not counts.get('error')
+
+def cli_rename(args, emit):
+    if not MUTAGEN_AVAILABLE:  # mutagen itself is only imported once a file's tags have to be parsed
+        print(f"{Fore.RED}Renaming requires the 'mutagen' library. Please install it.{Style.RESET_ALL}")
+        return None, False
+    target_dir = args.dir or os.path.join(get_main_script_directory(), RENAMER_DIR_NAME)
+    if not os.path.isdir(target_dir):
+        print(f"{Fore.RED}Directory '{target_dir}' not found.{Style.RESET_ALL}"); return None, False
+    if args.undo:
+        restored = renamer_undo(target_dir)
+        print(f"{Fore.GREEN}{restored} file(s) restored to their previous names.{Style.RESET_ALL}")
+        return {'restored': restored}, True
+    statuses = renamer_present_run(target_dir, args.dry_run, args.jobs, emit)
+    return dict(statuses), not statuses.get('error')
+
+def cli_watch(args, emit):
+    global WATCH_SETTLE_SECONDS
+    tools = [t.strip() for t in (args.tools or '').split(',') if t.strip()]
+    unknown = [t for t in tools if t not in ('convert', 'strip-tags', 'rename')]
+    if unknown:
+        print(f"{Fore.RED}Unknown tool(s): {', '.join(unknown)}{Style.RESET_ALL}"); return None, False
+    if args.settle is not None: WATCH_SETTLE_SECONDS = args.settle
+    profiles = [p.strip() for p in (args.profiles or '').split(',') if p.strip()]
+    statuses = collections.Counter()
+
+    def present(event):
+        statuses[event['status']] += 1
+        watch_print_event(event)
+        if emit: emit(event)
+
+    ok = watch_folders(watch_default_folders(args.base_dir, tools), args.jobs, profiles, not args.poll, on_result=present,
+                       on_notice=print_notice)
+    return dict(statuses), ok
+
+def cli_dedup(args, emit):
+    main_dir = get_main_script_directory()
+    dirs = args.dirs or [path for path in (os.path.join(main_dir, name) for name in (
+        VIDEO_CONVERTER_INPUT_DIR_NAME, TAG_REMOVER_DIR_NAME, RENAMER_DIR_NAME, YOUTUBE_DOWNLOAD_SUBDIR_NAME)) if os.path.isdir(path)]
+    missing = [d for d in dirs if not os.path.isdir(d)]
+    if missing or not dirs:
+        print(f"{Fore.RED}Directory not found: {', '.join(missing) or 'no input folders yet'}{Style.RESET_ALL}"); return None, False
+    statuses, previous = collections.Counter(), [None]
+
+    def present(event):
+        statuses[event['status']] += 1
+        dedup_print_event(event, previous[0]); previous[0] = event
+        if emit: emit(event)
+
+    groups = dedup_report(dirs, args.link, args.jobs, present, print_notice)
+    dedup_print_summary(groups, statuses, args.link)
+    return dict(statuses, groups=len(groups)), not statuses.get('error')
+
+def cli_configure_metrics(args):
+    """Applies the --metrics*/--profile options. Returns True if metrics are collected for this run."""
+    global METRICS_ENABLED, METRICS_REPORT_FILE, METRICS_PROMETHEUS_FILE, METRICS_PROFILE, METRICS_PROFILE_DIR
+    METRICS_REPORT_FILE = args.metrics_json or METRICS_REPORT_FILE
+    METRICS_PROMETHEUS_FILE = args.metrics_prom or METRICS_PROMETHEUS_FILE
+    METRICS_PROFILE = args.profile or METRICS_PROFILE
+    METRICS_PROFILE_DIR = args.profile_dir or METRICS_PROFILE_DIR
+    METRICS_ENABLED = METRICS_ENABLED or bool(args.metrics or METRICS_REPORT_FILE or METRICS_PROMETHEUS_FILE or METRICS_PROFILE)
+    if METRICS_ENABLED: metrics_begin_run()
+    return METRICS_ENABLED
+
+def run_cli(argv):
+    """Runs one subcommand non-interactively and returns the process exit code (0 = no errors)."""
+    global DEDUP_ENABLED, SERVER_BASE_DIRS
+    args = cli_build_parser().parse_args(argv)
+    if args.command == 'benchmark':
+        if args.scenario:
+            print(json.dumps(bench_run_scenario(args.scenario, args.corpus, args.work, args.base_url, args.jobs))); return 0
+        scenarios = [s.strip() for s in (args.scenarios or '').split(',') if s.strip()]
+        unknown = [s for s in scenarios if s not in BENCHMARK_SCENARIOS]
+        if unknown:
+            print(f"{Fore.RED}Unknown scenario(s): {', '.join(unknown)}{Style.RESET_ALL}"); return 2
+        return 0 if run_benchmark_suite(args.scale, scenarios, args.runs, args.jobs, args.dir, args.baseline,
+                                        args.save_baseline) else 1
+    metrics_on = cli_configure_metrics(args)
+    if args.command == 'serve':
+        if args.base_dir: SERVER_BASE_DIRS = args.base_dir
+        return 0 if server_run(args.host, args.port, args.network_workers, args.cpu_workers, args.queue_size) else 1
+    if getattr(args, 'dedup', None) is not None: DEDUP_ENABLED = args.dedup
+    handler = {'download': cli_download, 'convert': cli_convert, 'strip-tags': cli_strip_tags,
+               'rename': cli_rename, 'watch': cli_watch, 'dedup': cli_dedup}[args.command]
+    emit = cli_make_event_emitter(args.command, sys.stdout) if args.jsonl else None
+    started = time.monotonic()
+    # In JSON-lines mode stdout carries only events; the usual coloured output moves to stderr.
+    with contextlib.redirect_stdout(sys.stderr) if args.jsonl else contextlib.nullcontext():
+        summary, ok = handler(args, emit)
+        if metrics_on: metrics_end_run(args.command, summary=args.metrics)
+    if emit:
+        emit({'ok': ok, 'elapsed': round(time.monotonic() - started, 3), 'counts': summary}, kind='summary')
+    return 0 if ok else 1
+
+# --- Job Server --- #
+SERVER_HOST = "127.0.0.1"  # Localhost only; change deliberately, there is no authentication
+SERVER_PORT = 8787
+SERVER_QUEUE_SIZE = 100  # Queued jobs per pool; further submissions get HTTP 429 until there is room
+SERVER_NETWORK_WORKERS = 2  # Download jobs running at once
+SERVER_CPU_WORKERS = 2  # Convert/strip-tags/rename jobs running at once (each job also parallelizes over its files)
+SERVER_MAX_FINISHED_JOBS = 500  # Finished jobs kept for status queries
+SERVER_MAX_BODY_BYTES = 1024 * 1024
+SERVER_TOOL_POOLS = {'download': 'network', 'convert': 'cpu', 'strip-tags': 'cpu', 'rename': 'cpu'}
+SERVER_BASE_DIRS = []  # Folders jobs may name in 'dir'/'input_dir'/'output_dir'; empty = the folder next to the script
+SERVER_ALLOWED_HOSTS = ('127.0.0.1', 'localhost', '[::1]')  # Host header names accepted (with the server's port)
+SERVER_PATH_PARAMS = ('dir', 'input_dir', 'output_dir')
+
+def server_base_dirs():
+    return [os.path.realpath(d) for d in (SERVER_BASE_DIRS or [get_main_script_directory()])]
+
+def server_resolve_path(value, name):
+    """Returns the real path of a job's folder parameter (relative paths start at the first base folder), or raises
+    ValueError unless it lies inside one of the base folders. Symlinks are resolved first, so they can't lead out."""
+    if not isinstance(value, str) or not value: raise ValueError(f"'{name}' must be a non-empty string.")
+    bases = server_base_dirs()
+    path = os.path.realpath(os.path.join(bases[0], value))
+    if not any(os.path.commonpath([path, base]) == base for base in bases):
+        raise ValueError(f"'{name}' must be inside {', '.join(bases)}.")
+    return path
+
+def server_check_request(method, headers, body, host, port):
+    """Returns (status, error) for a request the server refuses, else None. Any web page can make the browser send
+    requests to a local port, so only requests addressed to this server by name (no DNS rebinding), without a
+    foreign Origin, and with JSON bodies (a form or text/plain POST needs no CORS preflight) are accepted."""
+    allowed = {f"{name}:{port}" for name in SERVER_ALLOWED_HOSTS + (host,)}
+    if headers.get('host', '').lower() not in allowed:
+        return 403, f"Host must be one of: {', '.join(sorted(allowed))}."
+    origin = headers.get('origin')
+    if origin and origin.lower() not in {f"http://{name}" for name in allowed}:
+        return 403, "Cross-origin requests are not allowed."
+    content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+    if (body or method == 'POST') and content_type != 'application/json':
+        return 415, "Request bodies must be sent as 'Content-Type: application/json'."
+    return None
+
+def server_validate_job(payload):
+    """Returns (tool, params, priority) for a submitted job, or raises ValueError describing what is wrong."""
+    if not isinstance(payload, dict): raise ValueError("Expected a JSON object.")
+    tool, params, priority = payload.get('tool'), payload.get('params') or {}, payload.get('priority', 0)
+    if tool not in SERVER_TOOL_POOLS: raise ValueError(f"'tool' must be one of: {', '.join(SERVER_TOOL_POOLS)}.")
+    if not isinstance(params, dict): raise ValueError("'params' must be an object.")
+    if not isinstance(priority, int): raise ValueError("'priority' must be an integer.")
+    if tool == 'download':
+        urls = params.get('urls') or ([params['url']] if params.get('url') else [])
+        if not isinstance(urls, list) or not urls: raise ValueError("Download jobs need 'url' or 'urls'.")
+        normalized = [yt_dl_normalize_url(url) if isinstance(url, str) else None for url in urls]
+        if None in normalized: raise ValueError("'urls' contains an invalid entry.")
+        if params.get('format', 'best') not in CLI_QUALITY_CHOICES:
+            raise ValueError(f"'format' must be one of: {', '.join(CLI_QUALITY_CHOICES)}.")
+        params = dict(params, urls=normalized)
+    unknown = [name for name in params.get('profiles') or [] if name not in CONVERTER_PROFILES]
+    if unknown: raise ValueError(f"Unknown output profile(s): {', '.join(map(str, unknown))}.")
+    paths = {name: server_resolve_path(params[name], name) for name in SERVER_PATH_PARAMS if params.get(name)}
+    return tool, dict(params, **paths), priority
+
+def server_job_results(job, progress):
+    """Starts the job's tool through the library API and returns its FileResult iterator."""
+    params, main_dir, jobs = job['params'], get_main_script_directory(), job['params'].get('jobs')
+    if job['tool'] == 'download':
+        urls = []
+        for url in params['urls']:
+            urls.extend(yt_dl_expand_playlist(url) if yt_dl_is_playlist_url(url) else [url])
+        return api_download(urls, params.get('output_dir') or os.path.join(main_dir, YOUTUBE_DOWNLOAD_SUBDIR_NAME),
+                            yt_dl_get_quality_format(CLI_QUALITY_CHOICES[params.get('format', 'best')]), jobs, progress=progress)
+    if job['tool'] == 'convert':
+        return api_convert_videos(params.get('input_dir') or os.path.join(main_dir, VIDEO_CONVERTER_INPUT_DIR_NAME),
+                                  params.get('output_dir') or os.path.join(main_dir, VIDEO_CONVERTER_OUTPUT_DIR_NAME),
+                                  jobs, params.get('profiles'), params.get('use_manifest'), params.get('recursive'), progress)
+    if job['tool'] == 'strip-tags':
+        return api_strip_tags(params.get('dir') or os.path.join(main_dir, TAG_REMOVER_DIR_NAME), jobs)
+    return api_rename_audio_files(params.get('dir') or os.path.join(main_dir, RENAMER_DIR_NAME), bool(params.get('dry_run')), jobs)
+
+def server_execute_job(job, notify):
+    """Runs a job in the calling pool thread, passing each result and progress update to notify(kind, data)."""
+    def progress(update):
+        data = {key: update.get(key) for key in ('status', 'filename', 'percent', 'speed', 'eta', 'downloaded_bytes', 'total_bytes')}
+        if data['percent'] is None and update.get('total_bytes'):
+            data['percent'] = round(update.get('downloaded_bytes', 0) * 100 / update['total_bytes'], 1)
+        notify('progress', data)
+
+    for result in server_job_results(job, progress):
+        notify('result', result._asdict())
+
+def server_job_view(job, with_results=False):
+    view = {key: job[key] for key in ('id', 'tool', 'status', 'priority', 'params', 'created_at', 'started_at',
+                                      'finished_at', 'counts', 'progress', 'error')}
+    if with_results: view['results'] = job['results']
+    return view
+
+async def server_read_request(reader):
+    """Reads one HTTP/1.1 request. Returns (method, path, headers, body), with lower-case header names, or None
+    if the client sent nothing."""
+    request_line = await reader.readline()
+    if not request_line.strip(): return None
+    method, target = request_line.decode('latin-1').split()[:2]
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''): break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length') or 0)
+    if length > SERVER_MAX_BODY_BYTES: raise ValueError("Request body too large.")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), urllib.parse.urlsplit(target).path.rstrip('/') or '/', headers, body
+
+def server_http_head(status, content_type, extra=''):
+    from http import HTTPStatus
+    return (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: {content_type}\r\n"
+            f"Connection: close\r\n{extra}").encode('latin-1')
+
+def server_run(host=None, port=None, network_workers=None, cpu_workers=None, queue_size=None):
+    """Serves the HTTP/JSON job API until Ctrl+C:
+      POST   /jobs              {"tool": ..., "params": {...}, "priority": 0} -> 202 {"id": ...}; 429 when the queue is full
+      GET    /jobs              all jobs (without per-file results)
+      GET    /jobs/<id>         one job with its per-file results
+      GET    /jobs/<id>/events  streamed JSON lines (status, progress, result) until the job finishes
+      DELETE /jobs/<id>         cancels a job that hasn't started
+      GET    /metrics           per-stage timings in Prometheus format (when metrics are enabled)
+    Downloads run on the network pool, everything else on the CPU pool; higher priorities run first."""
+    import asyncio, itertools  # Only needed when serving
+    host, port = host or SERVER_HOST, port or SERVER_PORT
+    workers = {'network': max(1, network_workers or SERVER_NETWORK_WORKERS), 'cpu': resolve_job_count(cpu_workers or SERVER_CPU_WORKERS)}
+    pools = {name: ThreadPoolExecutor(max_workers=count) for name, count in workers.items()}
+    jobs, queues, sequence = {}, {}, itertools.count(1)
+
+    def publish(job, kind, data):
+        if kind == 'result':
+            job['results'].append(data)
+            job['counts'][data['status']] = job['counts'].get(data['status'], 0) + 1
+        elif kind == 'progress':
+            job['progress'] = data
+        event = dict(data, event=kind, job=job['id'])
+        for listener in job['listeners']: listener.put_nowait(event)
+
+    def finish(job, status, error=None):
+        job.update(status=status, error=error, finished_at=time.time())
+        publish(job, 'status', {'status': status, 'error': error, 'counts': job['counts']})
+        for listener in job['listeners']: listener.put_nowait(None)
+        if METRICS_ENABLED and (METRICS_REPORT_FILE or METRICS_PROMETHEUS_FILE):
+            metrics_end_run('serve', summary=False)
+        color = Fore.GREEN if status == 'done' else Fore.RED if status == 'failed' else Fore.YELLOW
+        print(f"{Fore.CYAN}[{time.strftime('%H:%M:%S')}] {color}{status:<9}{Style.RESET_ALL} job {job['id']} "
+              f"({job['tool']}) {job['counts']}{f': {error}' if error else ''}")
+        finished = [j for j in jobs.values() if j['finished_at']]
+        for old in finished[:max(0, len(finished) - SERVER_MAX_FINISHED_JOBS)]: del jobs[old['id']]
+
+    async def dispatcher(pool_name, queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, job = await queue.get()
+            if job['status'] != 'queued': continue  # Cancelled while waiting
+            job.update(status='running', started_at=time.time())
+            publish(job, 'status', {'status': 'running'})
+            notify = lambda kind, data, job=job: loop.call_soon_threadsafe(publish, job, kind, data)
+            try:
+                # The executor's completion is scheduled after every notify() the job made, so all results are in.
+                await loop.run_in_executor(pools[pool_name], server_execute_job, job, notify)
+                finish(job, 'done')
+            except Exception as e:
+                finish(job, 'failed', str(e))
+
+    async def stream_events(job, writer):
+        writer.write(server_http_head(200, 'application/x-ndjson', "Transfer-Encoding: chunked\r\n\r\n"))
+        listener = asyncio.Queue()
+        listener.put_nowait(dict(server_job_view(job), event='status', job=job['id']))
+        if job['finished_at']: listener.put_nowait(None)
+        else: job['listeners'].append(listener)
+        try:
+            while (event := await listener.get()) is not None:
+                chunk = (json.dumps(event, default=str) + "\n").encode()
+                writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+        finally:
+            if listener in job['listeners']: job['listeners'].remove(listener)
+
+    def route(method, path, body):
+        """Returns (status, payload) for a plain JSON request, or ('stream', job) for an event stream."""
+        parts = path.strip('/').split('/')
+        if parts[0] != 'jobs' or len(parts) > 3: return 404, {'error': "Not found."}
+        job = jobs.get(parts[1]) if len(parts) > 1 else None
+        if len(parts) > 1 and job is None: return 404, {'error': f"Unknown job '{parts[1]}'."}
+        if len(parts) == 3:
+            return ('stream', job) if parts[2] == 'events' and method == 'GET' else (404, {'error': "Not found."})
+        if job and method == 'GET': return 200, server_job_view(job, with_results=True)
+        if job and method == 'DELETE':
+            if job['status'] != 'queued': return 409, {'error': f"Job is already {job['status']}."}
+            finish(job, 'cancelled'); return 200, server_job_view(job)
+        if not job and method == 'GET': return 200, {'jobs': [server_job_view(j) for j in jobs.values()]}
+        if not job and method == 'POST':
+            try: tool, params, priority = server_validate_job(json.loads(body or b'null'))
+            except ValueError as e: return 400, {'error': str(e)}
+            job_id = f"{next(sequence)}"
+            job = {'id': job_id, 'tool': tool, 'params': params, 'priority': priority, 'status': 'queued',
+                   'created_at': time.time(), 'started_at': None, 'finished_at': None, 'counts': {},
+                   'progress': None, 'error': None, 'results': [], 'listeners': []}
+            try:
+                queues[SERVER_TOOL_POOLS[tool]].put_nowait((-priority, int(job_id), job))
+            except asyncio.QueueFull:
+                return 429, {'error': "Job queue is full, retry later."}
+            jobs[job_id] = job
+            return 202, server_job_view(job)
+        return 405, {'error': "Method not allowed."}
+
+    async def handle(reader, writer):
+        try:
+            try:
+                request = await server_read_request(reader)
+                if request is None: return
+                method, path, headers, body = request
+                refused = server_check_request(method, headers, body, host, port)
+                if refused:
+                    status, payload = refused[0], {'error': refused[1]}
+                elif (method, path) == ('GET', '/metrics'):
+                    body = metrics_prometheus_text(metrics_snapshot()).encode()
+                    writer.write(server_http_head(200, 'text/plain; version=0.0.4', f"Content-Length: {len(body)}\r\n\r\n") + body)
+                    await writer.drain(); return
+                else:
+                    status, payload = route(method, path, body)
+                    if status == 'stream':
+                        await stream_events(payload, writer); return
+            except (ValueError, asyncio.IncompleteReadError) as e:
+                status, payload = 400, {'error': str(e) or "Malformed request."}
+            body = json.dumps(payload, default=str).encode()
+            extra = "Retry-After: 1\r\n" if status == 429 else ""
+            writer.write(server_http_head(status, 'application/json', f"{extra}Content-Length: {len(body)}\r\n\r\n") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass  # The client went away (reset, broken pipe); a job it started keeps running
+        finally:
+            writer.close()
+
+    async def serve():
+        queues.update({name: asyncio.PriorityQueue(maxsize=queue_size or SERVER_QUEUE_SIZE) for name in workers})
+        for name, count in workers.items():
+            for _ in range(count): asyncio.ensure_future(dispatcher(name, queues[name]))
+        server = await asyncio.start_server(handle, host, port)
+        print(f"{Fore.GREEN}Job server listening on http://{host}:{port} "
+              f"({workers['network']} network / {workers['cpu']} CPU worker(s)). Ctrl+C to stop.{Style.RESET_ALL}")
+        print(f"{Fore.YELLOW}Job folders must be inside: {', '.join(server_base_dirs())}{Style.RESET_ALL}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}Stopping job server, waiting for running jobs...{Style.RESET_ALL}")
+    except OSError as e:
+        print(f"{Fore.RED}Could not start job server on {host}:{port}: {e}{Style.RESET_ALL}"); return False
+    finally:
+        for pool in pools.values(): pool.shutdown(wait=True, cancel_futures=True)
+    return True
+
+# --- Startup Benchmark --- #
+STARTUP_BUDGET_MS = 80  # Wall-clock budget for a fresh renamer-only run (`python app.py rename --dry-run` on an empty folder)
+STARTUP_BENCHMARK_RUNS = 7
+STARTUP_HEAVY_MODULES = ('yt_dlp', 'mutagen')  # Must not be imported at startup
+
+def run_startup_benchmark(runs=None, budget_ms=None):
+    """Times what a renamer-only cron job pays per call: a fresh `python app.py rename --dry-run` process on an
+    empty folder (median wall time of several runs), then lists the slowest imports of one `-X importtime` run
+    and checks the budget. Returns True if within budget."""
+    import statistics, tempfile  # Only needed here; keeps them out of the startup path being measured
+    runs = runs or STARTUP_BENCHMARK_RUNS
+    budget_ms = budget_ms or STARTUP_BUDGET_MS
+    script_dir = get_main_script_directory()
+    timings, failed = [], False
+    with tempfile.TemporaryDirectory() as folder:
+        command = [sys.executable, os.path.join(script_dir, 'app.py'), 'rename', '--dry-run', '-d', folder]
+        for run in range(runs + 1):  # The first run only warms the bytecode and OS caches
+            started = time.perf_counter()
+            result = subprocess.run(command, cwd=script_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            failed = failed or result.returncode != 0
+            if run: timings.append((time.perf_counter() - started) * 1000)
+        result = subprocess.run([sys.executable, '-X', 'importtime'] + command[1:], cwd=script_dir, capture_output=True, text=True)
+    imports, loaded = {}, set()
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+\d+\s+\|\s+(\d+)\s+\|(\s*)(\S+)', line)
+        if not match: continue
+        cumulative_ms, depth, name = int(match.group(1)) / 1000, len(match.group(2)), match.group(3)
+        loaded.add(name.split('.')[0])
+        if depth <= 3: imports[name] = cumulative_ms  # media_tools and its direct imports
+
+    median_ms = statistics.median(timings)
+    print(f"\n{Fore.CYAN}--- Startup Benchmark ({runs} runs) ---{Style.RESET_ALL}")
+    for name, cumulative_ms in sorted(imports.items(), key=lambda item: -item[1])[:8]:
+        print(f"{Fore.YELLOW}{name:<30}{Style.RESET_ALL} {cumulative_ms:8.1f} ms")
+    heavy = sorted(loaded & set(STARTUP_HEAVY_MODULES))
+    if heavy:
+        print(f"{Fore.RED}Heavy modules imported at startup: {', '.join(heavy)}{Style.RESET_ALL}")
+    if failed:
+        print(f"{Fore.RED}'app.py rename --dry-run' exited with an error.{Style.RESET_ALL}")
+    if os.environ.get('PYTHONDONTWRITEBYTECODE'):
+        print(f"{Fore.YELLOW}PYTHONDONTWRITEBYTECODE is set: unless __pycache__ already exists, media_tools.py is recompiled on every start.{Style.RESET_ALL}")
+    ok = median_ms <= budget_ms and not heavy and not failed
+    color = Fore.GREEN if ok else Fore.RED
+    print(f"{color}'python app.py rename --dry-run': {median_ms:.1f} ms (budget {budget_ms} ms) - {'OK' if ok else 'OVER BUDGET'}{Style.RESET_ALL}")
+    return ok
+
+# --- Benchmark Suite --- #
+BENCHMARK_DIR_NAME = ".benchmark"  # Corpora and scratch space next to the script (hidden, so scans skip it)
+BENCHMARK_SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000}  # Audio files in the tag/rename corpus
+BENCHMARK_SEED = 1234
+BENCHMARK_M4A_SHARE = 0.25  # Part of the audio corpus generated as M4A (needs ffmpeg; MP3 only without it)
+BENCHMARK_VIDEO_COUNT = 16
+BENCHMARK_VIDEO_SECONDS = 5
+BENCHMARK_DOWNLOAD_COUNT = 16
+BENCHMARK_DOWNLOAD_BYTES = 2 * 1024 * 1024  # Size of each file served by the local HTTP stand-in
+BENCHMARK_RUNS = 3  # Runs per scenario; the median is reported
+BENCHMARK_MAX_SLOWDOWN = 0.10  # Files/s may drop by at most this fraction against the baseline
+BENCHMARK_MAX_RSS_GROWTH = 0.25  # Peak RSS may grow by at most this fraction against the baseline
+BENCHMARK_SCENARIOS = ('convert', 'convert-warm', 'strip-tags', 'rename', 'dedup', 'download')
+_BENCHMARK_WORDS = ("amber", "blue", "crystal", "dawn", "echo", "falling", "golden", "harbor", "iron", "jade", "kite",
+                    "lunar", "midnight", "neon", "ocean", "paper", "quiet", "river", "silver", "thunder", "velvet", "winter")
+# A silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz): 4-byte header plus 413 bytes of payload.
+_BENCHMARK_MP3_FRAME = b'\xff\xfb\x90\x64' + bytes(413)
+
+def bench_ffmpeg_available():
+    try:
+        subprocess.run(['ffmpeg', '-version'], check=True, capture_output=True)
+        return True
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return False
+
+def bench_corpus_ready(directory, spec):
+    """True if directory holds a complete corpus built from the same spec (generation is skipped then)."""
+    try:
+        with open(os.path.join(directory, '.corpus.json'), 'r', encoding='utf-8') as f:
+            return json.load(f) == spec
+    except (OSError, ValueError):
+        return False
+
+def bench_mark_corpus(directory, spec):
+    with open(os.path.join(directory, '.corpus.json'), 'w', encoding='utf-8') as f:
+        json.dump(spec, f)
+
+def bench_build_audio_corpus(directory, count, seed=None):
+    """Generates count MP3/M4A files with random Artist/Title/Album tags. About 5% have no tags and 5% share
+    their tags with another file, so the renamer's skip and collision paths are exercised too. Reproducible per seed."""
+    import random
+    seed = BENCHMARK_SEED if seed is None else seed
+    with_m4a = BENCHMARK_M4A_SHARE > 0 and bench_ffmpeg_available()
+    spec = {'kind': 'audio', 'count': count, 'seed': seed, 'm4a': with_m4a}
+    if bench_corpus_ready(directory, spec): return
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    load_mutagen()
+    rng = random.Random(seed)
+    template = None
+    if with_m4a:
+        template = os.path.join(directory, '.template.m4a')
+        subprocess.run(['ffmpeg', '-nostdin', '-v', 'error', '-f', 'lavfi', '-i', 'sine=frequency=440:duration=2',
+                        '-c:a', 'aac', '-b:a', '64k', '-y', template], check=True)
+    words = lambda n: " ".join(rng.choice(_BENCHMARK_WORDS).capitalize() for _ in range(n))
+    previous = None
+    for index in range(count):
+        tags = None if rng.random() < 0.05 else previous if previous and rng.random() < 0.05 else \
+            (words(rng.randint(1, 2)), words(rng.randint(1, 4)), words(2))
+        previous = tags or previous
+        if template and rng.random() < BENCHMARK_M4A_SHARE:
+            path = os.path.join(directory, f"track{index:06d}.m4a")
+            shutil.copyfile(template, path)
+            if tags:
+                audio = MP4(path)
+                audio['\xa9ART'], audio['\xa9nam'], audio['\xa9alb'] = tags
+                audio.save()
+            continue
+        path = os.path.join(directory, f"track{index:06d}.mp3")
+        with open(path, 'wb') as f:
+            f.write(_BENCHMARK_MP3_FRAME * rng.randint(40, 400))
+        if tags:
+            id3 = ID3()
+            for frame, text in zip(('TPE1', 'TIT2', 'TALB'), tags):
+                id3.add(getattr(mutagen.id3, frame)(encoding=3, text=text))
+            id3.save(path, v1=2 if rng.random() < 0.3 else 0)
+    if template: os.remove(template)
+    bench_mark_corpus(directory, spec)
+
+def bench_build_video_corpus(directory, count=None, seconds=None):
+    """Generates test-pattern videos with a sine tone using ffmpeg's lavfi sources. Returns False without ffmpeg."""
+    count, seconds = count or BENCHMARK_VIDEO_COUNT, seconds or BENCHMARK_VIDEO_SECONDS
+    spec = {'kind': 'video', 'count': count, 'seconds': seconds}
+    if bench_corpus_ready(directory, spec): return True
+    if not bench_ffmpeg_available(): return False
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    for index in range(count):
+        subprocess.run(['ffmpeg', '-nostdin', '-v', 'error', '-f', 'lavfi', '-i', f"testsrc=size=320x240:rate=25:duration={seconds}",
+                        '-f', 'lavfi', '-i', f"sine=frequency={220 + 20 * index}:duration={seconds}",
+                        '-c:v', 'libx264', '-preset', 'ultrafast', '-c:a', 'aac', '-shortest', '-y',
+                        os.path.join(directory, f"video{index:03d}.mp4")], check=True)
+    bench_mark_corpus(directory, spec)
+    return True
+
+def bench_build_download_corpus(directory, count=None, size=None):
+    """Writes the files served by the local HTTP stand-in (copies of a test video if one exists, else random bytes)."""
+    count, size = count or BENCHMARK_DOWNLOAD_COUNT, size or BENCHMARK_DOWNLOAD_BYTES
+    spec = {'kind': 'download', 'count': count, 'size': size}
+    if bench_corpus_ready(directory, spec): return
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory)
+    payload = os.urandom(size)
+    for index in range(count):
+        with open(os.path.join(directory, f"clip{index:03d}.mp4"), 'wb') as f:
+            f.write(payload)
+    bench_mark_corpus(directory, spec)
+
+def bench_serve_directory(directory):
+    """Serves directory over HTTP on a free localhost port from a background thread. Returns (server, base_url)."""
+    import functools, http.server
+    class QuietHandler(http.server.SimpleHTTPRequestHandler):
+        def log_message(self, *args): pass
+
+    class QuietServer(http.server.ThreadingHTTPServer):
+        def handle_error(self, request, client_address): pass  # yt-dlp closing probe connections early is expected
+    server = QuietServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def bench_peak_rss_mb():
+    """(this process, largest child process) peak resident set size in MB, or (None, None) where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    unit = 1 if sys.platform == 'darwin' else 1024  # ru_maxrss is in bytes on macOS, KiB elsewhere
+    to_mb = lambda usage: round(usage.ru_maxrss * unit / 1024 / 1024, 1)
+    return to_mb(resource.getrusage(resource.RUSAGE_SELF)), to_mb(resource.getrusage(resource.RUSAGE_CHILDREN))
+
+def bench_run_scenario(name, corpus_dir, work_dir, base_url=None, max_jobs=None):
+    """Runs one scenario in this process (called in a fresh subprocess per run, so peak RSS and caches are isolated).
+    Setup such as copying the corpus is not timed. Returns the measurement dict."""
+    global METRICS_ENABLED, TAG_INDEX_FILE_NAME, CONVERTER_PROBE_CACHE_FILE_NAME, YT_DL_INFO_CACHE_TTL_SECONDS
+    global DEDUP_ENABLED, DEDUP_INDEX_FILE_NAME
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir)
+    # Absolute names override the script-relative defaults, keeping the run's caches inside work_dir.
+    TAG_INDEX_FILE_NAME = os.path.join(work_dir, 'tag_index.sqlite')
+    CONVERTER_PROBE_CACHE_FILE_NAME = os.path.join(work_dir, 'probe_cache.json')
+    DEDUP_INDEX_FILE_NAME = os.path.join(work_dir, 'dedup_index.sqlite')
+    YT_DL_INFO_CACHE_TTL_SECONDS = 0
+    DEDUP_ENABLED = False  # Measured on its own by the 'dedup' scenario
+    METRICS_ENABLED = True
+    video_dir, audio_dir = os.path.join(corpus_dir, 'videos'), os.path.join(corpus_dir, 'audio')
+
+    def input_bytes(directory):
+        return sum(entry.stat().st_size for entry in scan_media_files(directory, recursive=True))
+
+    if name in ('convert', 'convert-warm'):
+        output_dir = os.path.join(work_dir, 'out')
+        os.makedirs(output_dir)
+        if name == 'convert-warm':  # Untimed first pass fills the manifest and probe cache
+            converter_convert_videos_to_mp3(video_dir, output_dir, max_jobs)
+        run = lambda: converter_convert_videos_to_mp3(video_dir, output_dir, max_jobs)['found']
+        data_bytes = input_bytes(video_dir)
+    elif name in ('strip-tags', 'rename'):
+        target = os.path.join(work_dir, 'audio')
+        shutil.copytree(audio_dir, target, ignore=shutil.ignore_patterns('.*'))
+        data_bytes = input_bytes(target)
+        if name == 'strip-tags':
+            run = lambda: len(tag_remover_process_directory(target, max_jobs))
+        else:
+            run = lambda: sum(len(v) for v in renamer_process_audio_files(target, max_jobs=max_jobs).values())
+    elif name == 'dedup':  # Fingerprints the audio corpus in place; its reused payloads show up as duplicates
+        count = sum(1 for _ in scan_media_files(audio_dir, recursive=True))
+        def run():
+            dedup_report([audio_dir], max_jobs=max_jobs)
+            return count
+        data_bytes = input_bytes(audio_dir)
+    elif name == 'download':
+        download_dir = os.path.join(corpus_dir, 'downloads')
+        names = sorted(entry.name for entry in scan_media_files(download_dir))
+        urls = [f"{base_url}/{urllib.parse.quote(n)}" for n in names]
+        output_dir = os.path.join(work_dir, 'dl')
+        run = lambda: sum(r['ok'] for r in yt_dl_batch_download(urls, yt_dl_get_quality_format('1'), output_dir, max_jobs))
+        data_bytes = input_bytes(download_dir)
+    else:
+        raise ValueError(f"Unknown benchmark scenario '{name}'")
+
+    metrics_begin_run()
+    started = time.perf_counter()
+    files = run()
+    seconds = time.perf_counter() - started
+    rss, child_rss = bench_peak_rss_mb()
+    return {'scenario': name, 'files': files, 'bytes': data_bytes, 'seconds': round(seconds, 4),
+            'peak_rss_mb': rss, 'peak_child_rss_mb': child_rss,
+            'stages': {stage: s['total_seconds'] for stage, s in metrics_snapshot().items()}}
+
+def bench_compare(results, baseline):
+    """Returns a list of regression messages for results against a baseline (same scale only)."""
+    regressions = []
+    for name, current in results.items():
+        previous = (baseline.get('results') or {}).get(name)
+        if not previous or not previous.get('files_per_second'): continue
+        slowdown = 1 - current['files_per_second'] / previous['files_per_second']
+        if slowdown > BENCHMARK_MAX_SLOWDOWN:
+            regressions.append(f"{name}: {slowdown:.0%} fewer files/s ({current['files_per_second']} vs {previous['files_per_second']})")
+        if current.get('peak_rss_mb') and previous.get('peak_rss_mb'):
+            growth = current['peak_rss_mb'] / previous['peak_rss_mb'] - 1
+            if growth > BENCHMARK_MAX_RSS_GROWTH:
+                regressions.append(f"{name}: peak RSS up {growth:.0%} ({current['peak_rss_mb']} MB vs {previous['peak_rss_mb']} MB)")
+    return regressions
+
+def run_benchmark_suite(scale='1k', scenarios=None, runs=None, max_jobs=None, base_dir=None, baseline_file=None,
+                        save_baseline_file=None):
+    """Builds the synthetic corpora (cached between runs), runs every scenario BENCHMARK_RUNS times in fresh
+    subprocesses and reports the median files/s, MB/s, peak RSS and per-stage time. With a baseline file, reports
+    regressions beyond BENCHMARK_MAX_SLOWDOWN / BENCHMARK_MAX_RSS_GROWTH. Returns True if nothing regressed."""
+    import statistics  # Only needed here
+    runs = runs or BENCHMARK_RUNS
+    base_dir = base_dir or os.path.join(get_main_script_directory(), BENCHMARK_DIR_NAME)
+    corpus_dir = os.path.join(base_dir, f"corpus-{scale}")
+    scenarios = list(scenarios or BENCHMARK_SCENARIOS)
+    if scale not in BENCHMARK_SCALES:
+        print(f"{Fore.RED}Unknown scale '{scale}'. Available: {', '.join(BENCHMARK_SCALES)}{Style.RESET_ALL}"); return False
+    if not load_mutagen():
+        print(f"{Fore.RED}The benchmark needs the 'mutagen' library to generate tagged audio.{Style.RESET_ALL}"); return False
+
+    print(f"\n{Fore.CYAN}--- Benchmark Suite (scale {scale}, {runs} run(s) per scenario) ---{Style.RESET_ALL}")
+    print(f"{Fore.YELLOW}Preparing corpora in {corpus_dir} (reused when unchanged)...{Style.RESET_ALL}")
+    if {'strip-tags', 'rename', 'dedup'} & set(scenarios):
+        bench_build_audio_corpus(os.path.join(corpus_dir, 'audio'), BENCHMARK_SCALES[scale])
+    if {'convert', 'convert-warm'} & set(scenarios) and not bench_build_video_corpus(os.path.join(corpus_dir, 'videos')):
+        print(f"{Fore.YELLOW}ffmpeg not found: skipping the conversion scenarios.{Style.RESET_ALL}")
+        scenarios = [s for s in scenarios if s not in ('convert', 'convert-warm')]
+    server = base_url = None
+    if 'download' in scenarios:
+        if importlib.util.find_spec('yt_dlp') is None:
+            print(f"{Fore.YELLOW}yt-dlp not installed: skipping the download scenario.{Style.RESET_ALL}")
+            scenarios.remove('download')
+        else:
+            bench_build_download_corpus(os.path.join(corpus_dir, 'downloads'))
+            server, base_url = bench_serve_directory(os.path.join(corpus_dir, 'downloads'))
+
+    results = {}
+    try:
+        for name in scenarios:
+            samples = []
+            for _ in range(runs):
+                command = [sys.executable, os.path.abspath(__file__), 'benchmark', '--scenario', name, '--corpus', corpus_dir,
+                           '--work', os.path.join(base_dir, 'work'), '--base-url', base_url or '']
+                if max_jobs: command += ['--jobs', str(max_jobs)]
+                completed = subprocess.run(command, capture_output=True, text=True)
+                try:
+                    samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+                except (IndexError, ValueError):
+                    print(f"{Fore.RED}Scenario '{name}' failed:\n{completed.stderr[-2000:]}{Style.RESET_ALL}"); break
+            if len(samples) < runs: continue
+            median = sorted(samples, key=lambda s: s['seconds'])[len(samples) // 2]
+            seconds = median['seconds'] or 1e-9
+            results[name] = dict(median, runs=runs, seconds_all=[s['seconds'] for s in samples],
+                                 seconds_stdev=round(statistics.pstdev(s['seconds'] for s in samples), 4),
+                                 files_per_second=round(median['files'] / seconds, 2),
+                                 mb_per_second=round(median['bytes'] / seconds / 1e6, 2),
+                                 peak_rss_mb=max((s['peak_rss_mb'] or 0) for s in samples) or None)
+    finally:
+        if server: server.shutdown()
+
+    print(f"\n{'scenario':<14}{'files':>8}{'seconds':>10}{'files/s':>11}{'MB/s':>9}{'RSS MB':>9}{'child MB':>10}  slowest stages")
+    for name, r in results.items():
+        stages = ", ".join(f"{stage} {secs:.2f}s" for stage, secs in sorted(r['stages'].items(), key=lambda i: -i[1])[:3])
+        print(f"{Fore.YELLOW}{name:<14}{Style.RESET_ALL}{r['files']:>8}{r['seconds']:>10.3f}{r['files_per_second']:>11}"
+              f"{r['mb_per_second']:>9}{r['peak_rss_mb'] or '-':>9}{r['peak_child_rss_mb'] or '-':>10}  {stages}")
+
+    report = {'scale': scale, 'created_at': time.time(), 'python': sys.version.split()[0], 'platform': sys.platform,
+              'cpu_count': os.cpu_count(), 'results': results}
+    ok = True
+    if baseline_file:
+        try:
+            with open(baseline_file, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"{Fore.RED}Could not read baseline {baseline_file}: {e}{Style.RESET_ALL}"); return False
+        if baseline.get('scale') != scale:
+            print(f"{Fore.YELLOW}Baseline was recorded at scale {baseline.get('scale')}; not comparing.{Style.RESET_ALL}")
+        else:
+            regressions = bench_compare(results, baseline)
+            for message in regressions: print(f"{Fore.RED}✗ Regression: {message}{Style.RESET_ALL}")
+            if not regressions: print(f"{Fore.GREEN}✓ No regressions against {baseline_file}.{Style.RESET_ALL}")
+            ok = not regressions
+    if save_baseline_file:
+        metrics_write_atomic(save_baseline_file, json.dumps(report, indent=2))
+        print(f"{Fore.GREEN}Baseline saved to {save_baseline_file}{Style.RESET_ALL}")
+    return ok
+
+# --- Main Application Menu and Execution --- #
+def display_main_application_menu():
+    print(f"\n{Fore.WHITE}╔════════════════════════════════════════╗")
+    print(f"║ {Fore.YELLOW}{Style.BRIGHT}        🚀 MAIN MEDIA TOOL 🚀          {Style.RESET_ALL}{Fore.WHITE}║")
+    print(f"╠════════════════════════════════════════╣")
+    print(f"║ {Fore.LIGHTGREEN_EX}1. YouTube Video Downloader            {Style.RESET_ALL}{Fore.WHITE}║")
+    print(f"║ {Fore.LIGHTBLUE_EX}2. Convert Video to MP3                {Style.RESET_ALL}{Fore.WHITE}║")
+    print(f"║ {Fore.GREEN}3. MP3 Tools                           {Style.RESET_ALL}{Fore.WHITE}║")
+    print(f"║ {Fore.LIGHTCYAN_EX}4. Watch Folders (Auto-Process)        {Style.RESET_ALL}{Fore.WHITE}║")
+    print(f"╠════════════════════════════════════════╣")
+    print(f"║ {Fore.RED}0. Exit Application                    {Style.RESET_ALL}{Fore.WHITE}║")
+    print(f"╚════════════════════════════════════════╝{Style.RESET_ALL}")
+
+def main_combined_script():
+    """Main function to run the combined application."""
+    while True:
+        clear_screen()
+        print_main_title()
+        display_main_application_menu()
+        
+        choice = input(f"\n{Fore.MAGENTA}{Style.BRIGHT}✨ Enter your choice [0-4]: {Style.RESET_ALL}").strip()
+        if METRICS_ENABLED: metrics_begin_run()
+
+        if choice == '1':
+            run_youtube_downloader()
+        elif choice == '2':
+            run_video_to_mp3_converter()
+        elif choice == '3':
+            run_mp3_tools_submenu()
+        elif choice == '4':
+            run_watch_folders()
+        elif choice == '0':
+            print(f"\n{Fore.LIGHTMAGENTA_EX}👋 Exiting application. Goodbye!{Style.RESET_ALL}\n")
+            break
+        else:
+            print(f"\n{Fore.RED}❌ Invalid choice. Please try again.{Style.RESET_ALL}")
+        if METRICS_ENABLED and choice in ('1', '2', '3', '4'):
+            metrics_end_run(f"menu-{choice}")
+        
+        if choice != '0':
+            input(f"\n{Fore.CYAN}Press Enter to return to the main menu...{Style.RESET_ALL}")
+
+def print_main_title():
+    """Prints the main application title using 6-line ASCII art blocks, left-aligned."""
+
+    letters = {
+        'S': [
+            " ██████╗ ",
+            "██╔════╝ ",
+            "╚█████╗  ",
+            " ╚═══██╗ ",
+            "██████╔╝ ",
+            "╚═════╝  "
+        ],
+        'I': [
+            "███████╗",
+            " ╚═██╔═╝",
+            "   ██║  ",
+            "   ██║  ",
+            " ╔═██╚═╗",
+            " ███████"
+        ],
+        'M': [
+            "███╗   ███╗",
+            "████╗ ████║",
+            "██╔████╔██║",
+            "██║╚██╔╝██║",
+            "██║ ╚═╝ ██║",
+            "╚═╝     ╚═╝"
+        ],
+        'P': [
+            "██████╔╗ ",
+            "██╔══██║ ",
+            "██████╔╝ ",
+            "██╔═══╝  ",
+            "██║      ",
+            "╚═╝      "
+        ],
+        'L': [
+            "██╗      ",
+            "██║      ",
+            "██║      ",
+            "██║      ",
+            "███████╗ ",
+            "╚══════╝ "
+        ],
+        'E': [
+            "███████╗ ",
+            "██╔════╝ ",
+            "██████╗  ",
+            "██╔════╝ ",
+            "███████╗ ",
+            "╚══════╝ "
+        ],
+        'D': [
+            "██████╗  ",
+            "██╔══██╗ ",
+            "██║  ██║ ",
+            "██║  ██║ ",
+            "██████╔╝ ",
+            "╚═════╝  "
+        ],
+        'A': [
+            "  █████  ",
+            " ██╔═╗██ ",
+            "█████████",
+            "██╔═══╗██",
+            "██║   ║██",
+            "╚═╝   ╚═╝"
+        ],
+        'T': [
+            "████████╗",
+            "╚══██╔══╝",
+            "   ██║   ",
+            "   ██║   ",
+            "   ██║   ",
+            "   ╚═╝   "
+        ],
+        'O': [
+            " ██████╗ ",
+            "██╔═══██╗",
+            "██║   ██║",
+            "██║   ██║",
+            "╚██████╔╝",
+            " ╚═════╝ "
+        ]
+    }
+
+    words_config = [
+        ("SIMPLE", [Fore.GREEN, Fore.GREEN, Fore.LIGHTGREEN_EX, Fore.LIGHTGREEN_EX, Fore.GREEN, Fore.GREEN]),
+        ("MEDIA",  [Fore.CYAN, Fore.CYAN, Fore.LIGHTCYAN_EX, Fore.LIGHTCYAN_EX, Fore.CYAN, Fore.CYAN]),
+        ("TOOLS",  [Fore.BLUE, Fore.BLUE, Fore.LIGHTBLUE_EX, Fore.LIGHTBLUE_EX, Fore.BLUE, Fore.BLUE])
+    ]
+
+    letter_spacing = " "
+
+    print("\n")
+
+    for word_str, line_colors in words_config:
+        assembled_lines = [""] * 6
+        for char_key in word_str:
+            if char_key in letters:
+                letter_art = letters[char_key]
+                for i in range(6):
+                    assembled_lines[i] += letter_art[i] + letter_spacing
+            else:
+                for i in range(6):
+                    assembled_lines[i] += "        " + letter_spacing
+
+        for i in range(6):
+            line_to_print = assembled_lines[i].rstrip(letter_spacing)
+            colored_line = line_colors[i] + line_to_print + Style.RESET_ALL
+            print(colored_line)
+        
+        if word_str != words_config[-1][0]:
+             print("\n")
+
+
+def main():
+    """Entry point used by app.py: a subcommand when arguments are given, otherwise the interactive menu."""
+    if '--startup-benchmark' in sys.argv[1:]:
+        sys.exit(0 if run_startup_benchmark() else 1)
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    main_combined_script()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
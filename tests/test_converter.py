@@ -0,0 +1,72 @@
+import array
+import math
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+import media_tools
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="ffmpeg not installed")
+CODEC_ARGS = ['-acodec', 'libmp3lame', '-ab', '128k']
+
+
+def decode(path):
+    """Decoded 16-bit stereo samples and the duration ffmpeg reports from the container header."""
+    result = subprocess.run(['ffmpeg', '-nostdin', '-i', str(path), '-f', 's16le', '-ac', '2', '-'],
+                            check=True, capture_output=True)
+    hours, minutes, seconds = re.search(rb"Duration: (\d+):(\d+):([\d.]+)", result.stderr).groups()
+    samples = array.array('h')
+    samples.frombytes(result.stdout)
+    return samples, int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+@needs_ffmpeg
+def test_segmented_encode_matches_single_pass(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_tools, 'CONVERTER_SEGMENT_SECONDS', 4)
+    source, single, segmented = tmp_path / 'source.wav', tmp_path / 'single.mp3', tmp_path / 'segmented.mp3'
+    subprocess.run(['ffmpeg', '-nostdin', '-v', 'error', '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=44100:duration=13',
+                    '-f', 'lavfi', '-i', 'sine=frequency=660:sample_rate=44100:duration=13', '-filter_complex', 'amerge=inputs=2',
+                    str(source)], check=True)
+    media_tools.converter_run_ffmpeg(['ffmpeg', '-nostdin', '-y', '-i', str(source)] + CODEC_ARGS + [str(single)])
+
+    assert media_tools.converter_encode_segmented(str(source), str(segmented), 13.0, 44100, CODEC_ARGS, 2) == 3
+
+    expected, expected_duration = decode(single)
+    actual, actual_duration = decode(segmented)
+    assert len(actual) == len(expected)
+    assert actual_duration == expected_duration
+    # No gap or shift at the segment boundaries: the two encodes decode to nearly the same signal.
+    noise = sum((a - b) ** 2 for a, b in zip(actual, expected))
+    signal = sum(a * a for a in expected)
+    assert 10 * math.log10(signal / max(noise, 1)) > 40
+    assert not list(tmp_path.glob('.segments-*'))
+
+
+def test_untracked_output_is_adopted_only_when_complete(tmp_path, monkeypatch):
+    durations = {'complete.mp4': 60.0, 'complete.mp3': 60.02, 'killed.mp4': 60.0, 'killed.mp3': 12.5}
+    monkeypatch.setattr(media_tools, 'converter_probe_media', lambda path: {
+        'audio_codec': 'aac', 'audio_bitrate': None, 'sample_rate': 44100, 'channels': 2,
+        'duration': durations[os.path.basename(path)]})
+    encoded = []
+    def fake_ffmpeg(command, *args, **kwargs):
+        encoded.append(command[command.index('-i') + 1])
+        with open(command[-1], 'wb') as f: f.write(b'new')
+    monkeypatch.setattr(media_tools, 'converter_run_ffmpeg', fake_ffmpeg)
+    monkeypatch.setattr(media_tools, 'CONVERTER_PROBE_CACHE_FILE_NAME', str(tmp_path / 'probe_cache.json'))
+    monkeypatch.setattr(media_tools, 'METRICS_ENABLED', False)
+    output_dir = tmp_path / 'out'
+    output_dir.mkdir()
+    manifest = media_tools.converter_manifest_open(str(output_dir))
+    for name in ('complete', 'killed'):
+        (tmp_path / f'{name}.mp4').write_bytes(b'video')
+        (output_dir / f'{name}.mp3').write_bytes(b'old')  # Written after its source, but not in the manifest
+
+    status, _, _ = media_tools.converter_convert_single_video(str(tmp_path / 'complete.mp4'), str(output_dir), manifest=manifest)
+    assert status == 'skipped' and (output_dir / 'complete.mp3').read_bytes() == b'old'
+    status, _, _ = media_tools.converter_convert_single_video(str(tmp_path / 'killed.mp4'), str(output_dir), manifest=manifest)
+    assert status == 'converted' and (output_dir / 'killed.mp3').read_bytes() == b'new'
+    assert encoded == [str(tmp_path / 'killed.mp4')]
+    manifest.close()
@@ -0,0 +1,201 @@
+import http.cookiejar
+import http.server
+import random
+import re
+import sqlite3
+import threading
+import time
+import types
+
+import pytest
+
+import media_tools
+
+yt_dlp = pytest.importorskip('yt_dlp')
+
+URL = 'https://www.youtube.com/watch?v=abcdefghijk'
+
+
+class StubYoutubeDL:
+    """Stands in for yt_dlp.YoutubeDL: counts extractions and fails downloads of cached info while stale."""
+    extractions = 0
+    stale = False
+
+    def __init__(self, params=None):
+        self.params = params or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def extract_info(self, url, download=True, process=True):
+        assert not download and not process
+        StubYoutubeDL.extractions += 1
+        return {'_type': 'video', 'id': 'abcdefghijk', 'title': 'Title', 'formats': [{'url': 'http://x/1', 'format_id': '1'}]}
+
+    def sanitize_info(self, info):
+        return dict(info)
+
+    def process_ie_result(self, info, download=True):
+        if StubYoutubeDL.stale and '_cached_at' in info:
+            raise yt_dlp.utils.DownloadError('HTTP Error 403: Forbidden')
+        return dict(info, requested_downloads=[{'filepath': 'Title.mp4'}])
+
+
+@pytest.fixture
+def stub_ydl(tmp_path, monkeypatch):
+    StubYoutubeDL.extractions, StubYoutubeDL.stale = 0, False
+    monkeypatch.setattr(media_tools, 'yt_dlp', types.SimpleNamespace(YoutubeDL=StubYoutubeDL, utils=yt_dlp.utils))
+    monkeypatch.setattr(media_tools, 'YT_DL_INFO_CACHE_DIR_NAME', str(tmp_path / 'info_cache'))
+    monkeypatch.setattr(media_tools, 'YT_DL_CHUNKED_CONNECTIONS', 1)
+    monkeypatch.setattr(media_tools, 'METRICS_ENABLED', False)
+    return StubYoutubeDL
+
+
+def test_extract_info_runs_once_and_cache_expires(stub_ydl, monkeypatch):
+    first = media_tools.yt_dl_extract_info(URL)
+    second = media_tools.yt_dl_extract_info(URL)
+    assert stub_ydl.extractions == 1
+    assert second['title'] == first['title'] and '_cached_at' in second
+
+    later = media_tools.time.time() + media_tools.YT_DL_INFO_CACHE_TTL_SECONDS + 1
+    monkeypatch.setattr(media_tools.time, 'time', lambda: later)
+    media_tools.yt_dl_extract_info(URL)
+    assert stub_ydl.extractions == 2
+
+
+def test_download_re_extracts_once_when_cached_info_is_stale(stub_ydl):
+    media_tools.yt_dl_extract_info(URL)
+    cached = media_tools.yt_dl_extract_info(URL)
+    stub_ydl.stale = True
+
+    info = media_tools.yt_dl_download_from_info(URL, cached, {'quiet': True})
+    assert info['requested_downloads'][0]['filepath'] == 'Title.mp4'
+    assert stub_ydl.extractions == 2
+
+
+@pytest.fixture
+def http_folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_tools, 'YT_DL_INFO_CACHE_TTL_SECONDS', 0)
+    monkeypatch.setattr(media_tools, 'METRICS_ENABLED', False)
+    folder = tmp_path / 'site'
+    folder.mkdir()
+    server, base_url = media_tools.bench_serve_directory(str(folder))
+    yield folder, base_url
+    server.shutdown()
+
+
+def test_batch_downloads_through_the_generic_extractor(http_folder, tmp_path):
+    folder, base_url = http_folder
+    for index in range(3):
+        (folder / f'clip{index}.mp4').write_bytes(bytes([index]) * 200_000)
+    urls = [f'{base_url}/clip0.mp4', f'{base_url}/missing.mp4', f'{base_url}/clip1.mp4', f'{base_url}/clip2.mp4']
+
+    results = media_tools.yt_dl_batch_download(urls, media_tools.yt_dl_get_quality_format('1'), str(tmp_path / 'out'),
+                                               workers=2)
+    assert [r['url'] for r in results] == urls
+    assert [r['ok'] for r in results] == [True, False, True, True]
+    assert 'HTTP Error 404' in results[1]['error']
+    for result in (results[0], results[2], results[3]):
+        name = result['url'].rsplit('/', 1)[1]
+        assert open(result['filepath'], 'rb').read() == (folder / name).read_bytes()
+
+
+@pytest.mark.parametrize('broken', ['dedup_downloaded_path', 'yt_dl_batch_download_item'])
+def test_batch_turns_stage_exceptions_into_error_results(http_folder, tmp_path, monkeypatch, broken, capsys):
+    folder, base_url = http_folder
+    (folder / 'clip.mp4').write_bytes(bytes(200_000))
+    monkeypatch.setattr(media_tools, 'DEDUP_INDEX_FILE_NAME', str(tmp_path / 'dedup.sqlite'))
+    def fail(*args, **kwargs):
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(media_tools, broken, fail)
+
+    results = media_tools.yt_dl_batch_download([f'{base_url}/clip.mp4'], media_tools.yt_dl_get_quality_format('1'),
+                                               str(tmp_path / 'out'), dedup=True)
+    assert len(results) == 1 and not results[0]['ok']
+    assert 'database is locked' in results[0]['error']
+    media_tools.yt_dl_print_batch_report(results)
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serves server.payload with Range support, throttled to server.rate bytes/s. The first answer to each
+    chunk is cut off after 64 KiB, and with server.refuse set every range but the probe's gets a 403."""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server, payload = self.server, self.server.payload
+        match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+        with server.lock:
+            server.requests.append((self.headers.get('Range'), self.headers.get('Cookie'), self.headers.get('X-Test')))
+            first_try = match and match.group(1) not in server.dropped
+            if first_try: server.dropped.add(match.group(1))
+        if match and server.refuse and match.group(1) != '0':
+            self.send_response(403)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        start, end = (int(match.group(1)), int(match.group(2) or len(payload) - 1)) if match else (0, len(payload) - 1)
+        self.send_response(206 if match else 200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(end + 1 - start))
+        if match: self.send_header('Content-Range', f'bytes {start}-{end}/{len(payload)}')
+        self.end_headers()
+        for offset in range(start, end + 1, 16 * 1024):
+            if first_try and offset - start >= 64 * 1024 and end > 0:
+                self.close_connection = True
+                return
+            self.wfile.write(payload[offset:min(end + 1, offset + 16 * 1024)])
+            time.sleep(16 * 1024 / server.rate)
+
+
+@pytest.fixture
+def range_server(monkeypatch):
+    monkeypatch.setattr(media_tools, 'YT_DL_CHUNKED_CONNECTIONS', 4)
+    monkeypatch.setattr(media_tools, 'YT_DL_CHUNKED_MIN_SIZE', 1024 * 1024)
+    monkeypatch.setattr(media_tools, 'YT_DL_CHUNK_SIZE', 256 * 1024)
+    monkeypatch.setattr(media_tools, 'METRICS_ENABLED', False)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    server.daemon_threads = True
+    server.payload, server.rate, server.refuse = random.Random(7).randbytes(1536 * 1024), 4 * 1024 * 1024, False
+    server.lock, server.requests, server.dropped = threading.Lock(), [], set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def chunked_download(server, tmp_path):
+    """Downloads the server's payload through a real YoutubeDL with chunking enabled and a cookie in its jar."""
+    url = f'http://127.0.0.1:{server.server_address[1]}/video.mp4'
+    ydl = yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True, 'noprogress': True})
+    ydl.cookiejar.set_cookie(http.cookiejar.Cookie(
+        0, 'session', 'abc', None, False, '127.0.0.1', False, False, '/', True, False, None, False, None, None, {}))
+    media_tools.yt_dl_enable_chunked_downloads(ydl)
+    target = tmp_path / 'video.mp4'
+    info = {'id': 'video', 'url': url, 'ext': 'mp4', 'protocol': 'http', 'format_id': '0',
+            'http_headers': {'X-Test': 'yes', 'User-Agent': 'test'}}
+    assert ydl.dl(str(target), info)[0]
+    return target
+
+
+def test_chunked_download_survives_dropped_connections(range_server, tmp_path):
+    target = chunked_download(range_server, tmp_path)
+    assert target.read_bytes() == range_server.payload
+    assert not list(tmp_path.glob('*.chunked.*'))
+    ranged = [request for request in range_server.requests if request[0]]
+    assert len(ranged) > 1 + 6 * 2  # The probe, then every chunk at least twice
+    assert all(cookie == 'session=abc' and test == 'yes' for _, cookie, test in range_server.requests)
+
+
+def test_chunked_download_falls_back_when_ranges_are_refused(range_server, tmp_path):
+    range_server.refuse = True
+    target = chunked_download(range_server, tmp_path)
+    assert target.read_bytes() == range_server.payload
+    assert not list(tmp_path.glob('*.chunked.*'))
+    assert any(request[0] is None for request in range_server.requests)
+    assert all(cookie == 'session=abc' for _, cookie, _ in range_server.requests)
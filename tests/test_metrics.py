@@ -0,0 +1,19 @@
+import media_tools
+
+
+def test_stage_metrics_are_fixed_size_and_estimate_quantiles(monkeypatch):
+    monkeypatch.setattr(media_tools, 'METRICS_ENABLED', True)
+    media_tools.metrics_begin_run()
+    for index in range(10_000):
+        media_tools.metrics_record_duration('stage', 0.2 if index % 10 else 3.0, 100, 50)
+
+    totals = media_tools._metrics_stages['stage']
+    assert sum(totals['buckets']) == 10_000 and len(totals['buckets']) == len(media_tools.METRICS_BUCKETS) + 1
+
+    stats = media_tools.metrics_snapshot()['stage']
+    assert stats['count'] == 10_000 and stats['max_seconds'] == 3.0
+    assert stats['bytes_in'] == 1_000_000 and stats['bytes_out'] == 500_000
+    assert 0.1 < stats['p50_seconds'] <= 0.25  # the bucket holding 0.2
+    assert 2.5 < stats['p95_seconds'] <= 3.0  # between the 2.5 bound and the largest sample
+    assert stats['buckets']['0.25'] == 9_000 and stats['buckets']['5'] == 10_000
+    media_tools.metrics_begin_run()
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+import media_tools
+
+
+@pytest.fixture
+def tag_index(tmp_path):
+    conn = media_tools.tag_index_open(str(tmp_path / 'index.sqlite'))
+    yield conn
+    conn.close()
+
+
+def make_mp3(path, artist, title):
+    from mutagen.id3 import ID3, TIT2, TPE1
+    path.write_bytes((b'\xff\xfb\x90\x00' + bytes(413)) * 4)
+    tags = ID3()
+    tags.add(TPE1(encoding=3, text=artist))
+    tags.add(TIT2(encoding=3, text=title))
+    tags.save(str(path))
+
+
+def contents(folder):
+    return sorted(p.read_bytes() for p in folder.iterdir() if p.is_file() and not p.name.startswith('.'))
+
+
+def test_failed_move_skips_the_moves_that_depend_on_it(tmp_path, tag_index):
+    folder = tmp_path / 'music'
+    folder.mkdir()
+    (folder / 'A - One.mp3').mkdir()  # Obstacle: the first move can't take this name
+    (folder / 'B - Two.mp3').write_bytes(b'b')
+    (folder / 'c.mp3').write_bytes(b'c')
+    operations = [(str(folder / 'B - Two.mp3'), str(folder / 'A - One.mp3')),
+                  (str(folder / 'c.mp3'), str(folder / 'B - Two.mp3'))]  # Needs the slot the first move frees
+
+    results = media_tools.renamer_apply_operations(str(folder), operations, tag_index)
+
+    assert all(results.values())
+    assert (folder / 'B - Two.mp3').read_bytes() == b'b'
+    assert (folder / 'c.mp3').read_bytes() == b'c'
+
+
+def test_move_never_replaces_an_existing_file(tmp_path, tag_index):
+    (tmp_path / 'a.mp3').write_bytes(b'a')
+    (tmp_path / 'b.mp3').write_bytes(b'b')
+
+    results = media_tools.renamer_apply_operations(str(tmp_path), [(str(tmp_path / 'a.mp3'), str(tmp_path / 'b.mp3'))], tag_index)
+
+    assert list(results.values())[0]
+    assert (tmp_path / 'a.mp3').read_bytes() == b'a' and (tmp_path / 'b.mp3').read_bytes() == b'b'
+
+
+def test_rename_run_with_cycle_and_folder_obstacle_keeps_every_file(tmp_path, monkeypatch):
+    pytest.importorskip('mutagen')
+    monkeypatch.setattr(media_tools, 'TAG_INDEX_FILE_NAME', str(tmp_path / 'index.sqlite'))
+    folder = tmp_path / 'music'
+    folder.mkdir()
+    make_mp3(folder / 'P - Q.mp3', 'R', 'S')  # Swap cycle with 'R - S.mp3'
+    make_mp3(folder / 'R - S.mp3', 'P', 'Q')
+    make_mp3(folder / 'x.mp3', 'X', 'Y')
+    (folder / 'X - Y.mp3').mkdir()  # A folder already holds x.mp3's name
+    before = contents(folder)
+
+    plan = media_tools.renamer_process_audio_files(str(folder))
+
+    assert contents(folder) == before
+    assert (folder / 'X - Y.mp3').is_dir()
+    assert sorted(os.path.basename(dst) for _, dst in plan['moves']) == ['P - Q.mp3', 'R - S.mp3', 'X - Y (2).mp3']
+    assert sorted(p.name for p in folder.iterdir() if p.is_file() and not p.name.startswith('.')) == \
+        ['P - Q.mp3', 'R - S.mp3', 'X - Y (2).mp3']
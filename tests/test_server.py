@@ -0,0 +1,78 @@
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+import media_tools
+
+pytest.importorskip('mutagen')
+
+
+@pytest.fixture
+def server(tmp_path):
+    base = tmp_path / 'base'
+    (base / 'music').mkdir(parents=True)
+    (base / 'escape').symlink_to(tmp_path.anchor)
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    app = os.path.join(os.path.dirname(media_tools.__file__), 'app.py')
+    process = subprocess.Popen([sys.executable, app, 'serve', '--port', str(port), '--base-dir', str(base)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close(); break
+        except OSError:
+            assert process.poll() is None and time.monotonic() < deadline, "server did not start"
+            time.sleep(0.05)
+    yield port, base
+    process.send_signal(signal.SIGINT)
+    process.wait(10)
+
+
+def request(port, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                       headers=dict({'Content-Type': 'application/json'}, **(headers or {})))
+    response = connection.getresponse()
+    payload = json.loads(response.read())
+    connection.close()
+    return response.status, payload
+
+
+def test_server_refuses_requests_a_web_page_could_send(server):
+    port, _ = server
+    job = {'tool': 'rename', 'params': {'dir': 'music', 'dry_run': True}}
+    assert request(port, 'POST', '/jobs', job, {'Content-Type': 'text/plain'})[0] == 415
+    assert request(port, 'POST', '/jobs', job, {'Content-Type': 'application/x-www-form-urlencoded'})[0] == 415
+    assert request(port, 'POST', '/jobs', job, {'Host': f'attacker.example:{port}'})[0] == 403
+    assert request(port, 'GET', '/jobs', headers={'Host': f'attacker.example:{port}'})[0] == 403
+    assert request(port, 'POST', '/jobs', job, {'Origin': 'http://attacker.example'})[0] == 403
+    assert request(port, 'GET', '/jobs') == (200, {'jobs': []})
+
+
+@pytest.mark.parametrize('params', [{'dir': '/'}, {'dir': '../..'}, {'dir': 'music/../../..'},
+                                    {'dir': 'escape'}, {'output_dir': '/tmp'}, {'dir': 5}])
+def test_server_keeps_job_folders_inside_the_base_folders(server, params):
+    port, _ = server
+    status, payload = request(port, 'POST', '/jobs', {'tool': 'strip-tags', 'params': params})
+    assert status == 400, payload
+
+
+def test_server_runs_a_job_in_a_base_folder(server):
+    port, base = server
+    status, job = request(port, 'POST', '/jobs', {'tool': 'rename', 'params': {'dir': 'music', 'dry_run': True}},
+                          {'Host': f'localhost:{port}', 'Origin': f'http://localhost:{port}'})
+    assert status == 202 and job['params']['dir'] == os.path.realpath(base / 'music')
+    deadline = time.monotonic() + 10
+    while job['status'] in ('queued', 'running') and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = request(port, 'GET', f"/jobs/{job['id']}")[1]
+    assert job['status'] == 'done', job
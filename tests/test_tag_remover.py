@@ -0,0 +1,101 @@
+import collections
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import media_tools
+
+pytest.importorskip('mutagen')
+
+PAYLOAD = (b'\xff\xfb\x90\x00' + bytes(413)) * 40  # 40 silent 128 kbit/s MPEG-1 Layer III frames
+ID3V2 = b'ID3\x03\x00\x00\x00\x00\x00\x10' + b'TIT2\x00\x00\x00\x06\x00\x00\x00Title'  # one TIT2 frame
+ID3V1 = b'TAG' + b'Title'.ljust(30, b'\0') + bytes(94) + b'\xff'
+
+
+def ape_tag():
+    item = (6).to_bytes(4, 'little') + bytes(4) + b'Artist\0' + b'Artist'
+    def block(flags):
+        return (b'APETAGEX' + (2000).to_bytes(4, 'little') + (len(item) + 32).to_bytes(4, 'little')
+                + (1).to_bytes(4, 'little') + flags.to_bytes(4, 'little') + bytes(8))
+    return block(0xA0000000) + item + block(0x80000000)  # header, item, footer
+
+
+@pytest.mark.parametrize('leading', [b'', ID3V2], ids=['no-id3v2', 'id3v2'])
+@pytest.mark.parametrize('trailing', [ape_tag() + ID3V1, ID3V1 + ape_tag()], ids=['ape-then-id3v1', 'id3v1-then-ape'])
+def test_byte_range_strip_matches_mutagen_strip(tmp_path, monkeypatch, leading, trailing):
+    byte_range_path, mutagen_path = tmp_path / 'byte_range.mp3', tmp_path / 'mutagen.mp3'
+    for path in (byte_range_path, mutagen_path):
+        path.write_bytes(leading + PAYLOAD + trailing)
+
+    assert set(media_tools.tag_remover_strip_byte_range(str(byte_range_path))) >= {'ape', 'id3v1'}
+    monkeypatch.setattr(media_tools, 'TAG_REMOVER_BYTE_RANGE_MIN_SIZE', 1 << 40)
+    outcome = media_tools.tag_remover_strip_file(str(mutagen_path))
+    assert outcome['status'] == 'stripped', outcome['error']
+
+    assert mutagen_path.read_bytes() == PAYLOAD
+    assert byte_range_path.read_bytes() == mutagen_path.read_bytes()
+
+
+def test_failed_lease_is_an_error_outcome_not_a_hang(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_tools, 'METRICS_ENABLED', False)
+    (tmp_path / 'song.mp3').write_bytes(ID3V2 + PAYLOAD)
+    (tmp_path / media_tools.LEASE_DIR_NAME).write_bytes(b'')  # a file where the lease folder should go
+
+    outcomes = media_tools.tag_remover_process_directory(str(tmp_path), max_jobs=1, shared=True)
+    assert [outcome['status'] for outcome in outcomes] == ['error']
+
+
+def test_closing_the_api_stream_stops_the_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(media_tools, 'METRICS_ENABLED', False)
+    monkeypatch.setattr(media_tools, 'API_QUEUE_SIZE', 1)
+    for index in range(200):
+        (tmp_path / f'song{index:03}.mp3').write_bytes(ID3V2 + PAYLOAD)
+
+    results = media_tools.api_strip_tags(str(tmp_path), max_jobs=1)
+    assert next(results).status == 'stripped'
+    results.close()  # returns once the files already started are done
+
+    stripped = sum(path.read_bytes() == PAYLOAD for path in tmp_path.glob('*.mp3'))
+    assert 1 <= stripped < 20
+
+
+def test_shared_mode_strips_each_file_exactly_once_across_processes(tmp_path):
+    names = [f'song{index:03}.mp3' for index in range(80)]
+    for name in names:
+        (tmp_path / name).write_bytes(ID3V2 + PAYLOAD)
+    app = os.path.join(os.path.dirname(media_tools.__file__), 'app.py')
+    command = [sys.executable, app, 'strip-tags', '-d', str(tmp_path), '--shared', '--jsonl', '-j', '2']
+    processes = [subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True) for _ in range(4)]
+
+    stripped, statuses = collections.Counter(), collections.Counter()
+    for process in processes:
+        output, _ = process.communicate(timeout=60)
+        assert process.returncode == 0
+        for event in map(json.loads, output.splitlines()):
+            if event['event'] != 'file': continue
+            statuses[event['status']] += 1
+            if event['status'] == 'stripped': stripped[os.path.basename(event['path'])] += 1
+
+    assert stripped == collections.Counter(names), statuses
+    assert all((tmp_path / name).read_bytes() == PAYLOAD for name in names)
+    leftovers = [p.name for p in tmp_path.iterdir() if p.name not in names and p.name != media_tools.LEASE_DIR_NAME]
+    assert leftovers == [] and list((tmp_path / media_tools.LEASE_DIR_NAME).iterdir()) == []
+
+
+@pytest.mark.parametrize('byte_range', [False, True], ids=['mutagen', 'byte-range'])
+def test_lost_lease_leaves_the_file_untouched(tmp_path, monkeypatch, byte_range):
+    monkeypatch.setattr(media_tools, 'TAG_REMOVER_BYTE_RANGE_MIN_SIZE', 0 if byte_range else 1 << 40)
+    path = tmp_path / 'song.mp3'
+    path.write_bytes(ID3V2 + PAYLOAD + ID3V1)
+    lease = media_tools.lease_acquire(str(tmp_path), str(path))
+    lease['lost'] = True  # as the heartbeat marks it once another node has taken the file over
+    try:
+        outcome = media_tools.tag_remover_strip_file(str(path), lease)
+    finally:
+        media_tools.lease_release(lease)
+    assert outcome['status'] == 'error' and 'taken over' in outcome['error']
+    assert path.read_bytes() == ID3V2 + PAYLOAD + ID3V1
+    assert sorted(p.name for p in tmp_path.iterdir()) == [media_tools.LEASE_DIR_NAME, 'song.mp3']